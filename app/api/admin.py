@@ -0,0 +1,180 @@
+from fastapi import APIRouter, HTTPException, Request, Depends, BackgroundTasks
+from fastapi.responses import FileResponse
+from app.core.auth import get_current_user
+from app.core import profiling
+from app.jobs import final_report_batch, account_purge, score_stats_backfill, transcript_migration
+from app.schemas.admin import FinalReportBatchRequest, PurgeInactiveRequest
+from app.services import user_service, score_stats_service
+
+router = APIRouter()
+
+
+def require_admin(user_uuid: str = Depends(get_current_user)) -> str:
+    profile = user_service.get_user_profile(user_uuid)
+    if not profile or profile.get("role") != "관리자":
+        raise HTTPException(status_code=403, detail="관리자만 사용할 수 있습니다.")
+    return user_uuid
+
+# =================================================
+# 최종 보고서 일괄 평가
+# =================================================
+
+@router.post("/api/admin/report/final/batch")
+def create_final_report_batch_api(
+    req: FinalReportBatchRequest,
+    request: Request,
+    background_tasks: BackgroundTasks,
+    admin_uuid: str = Depends(require_admin)
+):
+    job_id = final_report_batch.create_job(
+        requested_by=admin_uuid,
+        user_uuids=req.user_uuids,
+        max_concurrency=req.max_concurrency,
+    )
+    background_tasks.add_task(
+        final_report_batch.run_job, job_id, request.app.state.llm, request.app.state.report_service
+    )
+
+    return {"job_id": job_id, "message": "최종 보고서 일괄 평가가 시작되었습니다."}
+
+@router.post("/api/admin/report/final/batch/{job_id}/resume")
+def resume_final_report_batch_api(
+    job_id: str,
+    request: Request,
+    background_tasks: BackgroundTasks,
+    _: str = Depends(require_admin)
+):
+    job = final_report_batch.get_job(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="작업을 찾을 수 없습니다.")
+    # heartbeat 가 끊긴(프로세스가 죽은) running 작업은 다시 선점 가능
+    lease_token = final_report_batch.claim_job(job_id)
+    if lease_token is None:
+        raise HTTPException(status_code=409, detail="이미 실행 중인 작업입니다.")
+
+    background_tasks.add_task(
+        final_report_batch.run_job, job_id, request.app.state.llm, request.app.state.report_service, lease_token
+    )
+
+    return {"job_id": job_id, "message": "작업을 이어서 실행합니다."}
+
+@router.get("/api/admin/report/final/batch/{job_id}")
+def get_final_report_batch_api(job_id: str, _: str = Depends(require_admin)):
+    job = final_report_batch.get_job(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="작업을 찾을 수 없습니다.")
+
+    return {"job": job}
+
+# =================================================
+# 계정 삭제
+# =================================================
+
+@router.delete("/api/admin/user/{user_uuid}")
+def delete_user_api(
+    user_uuid: str,
+    background_tasks: BackgroundTasks,
+    admin_uuid: str = Depends(require_admin)
+):
+    job_id = account_purge.create_job(admin_uuid, [user_uuid], reason="delete")
+    background_tasks.add_task(account_purge.run_job, job_id)
+
+    return {"job_id": job_id, "message": "계정 삭제가 시작되었습니다."}
+
+@router.post("/api/admin/user/purge-inactive")
+def purge_inactive_users_api(
+    req: PurgeInactiveRequest,
+    background_tasks: BackgroundTasks,
+    admin_uuid: str = Depends(require_admin)
+):
+    user_uuids = account_purge.find_inactive_users(req.inactive_days, req.role, exclude=[admin_uuid])
+    if req.dry_run or not user_uuids:
+        return {"count": len(user_uuids), "user_uuids": user_uuids}
+
+    job_id = account_purge.create_job(admin_uuid, user_uuids, reason=f"inactive_{req.inactive_days}d")
+    background_tasks.add_task(account_purge.run_job, job_id)
+
+    return {"job_id": job_id, "count": len(user_uuids), "message": "비활성 계정 삭제가 시작되었습니다."}
+
+@router.post("/api/admin/purge/{job_id}/resume")
+def resume_purge_api(
+    job_id: str,
+    background_tasks: BackgroundTasks,
+    _: str = Depends(require_admin)
+):
+    job = account_purge.get_job(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="작업을 찾을 수 없습니다.")
+    # heartbeat 가 끊긴(프로세스가 죽은) running 작업은 다시 선점 가능
+    lease_token = account_purge.claim_job(job_id)
+    if lease_token is None:
+        raise HTTPException(status_code=409, detail="이미 실행 중인 작업입니다.")
+
+    background_tasks.add_task(account_purge.run_job, job_id, lease_token)
+
+    return {"job_id": job_id, "message": "작업을 이어서 실행합니다."}
+
+@router.get("/api/admin/purge/{job_id}")
+def get_purge_api(job_id: str, _: str = Depends(require_admin)):
+    job = account_purge.get_job(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="작업을 찾을 수 없습니다.")
+
+    return {"job": job}
+
+# =================================================
+# 책별 점수 집계
+# =================================================
+
+@router.get("/api/admin/stats/curriculum/{step}")
+def list_step_stats_api(step: int, _: str = Depends(require_admin)):
+    return {"step": step, "books": score_stats_service.list_step_stats(step)}
+
+@router.get("/api/admin/stats/curriculum/{step}/{curriculum_id}")
+def get_book_stats_api(step: int, curriculum_id: int, _: str = Depends(require_admin)):
+    stats = score_stats_service.get_book_stats(step, curriculum_id)
+    if stats is None:
+        raise HTTPException(status_code=404, detail="집계된 점수가 없습니다.")
+
+    return {"stats": stats}
+
+@router.post("/api/admin/stats/curriculum/backfill")
+def backfill_curriculum_stats_api(
+    background_tasks: BackgroundTasks,
+    _: str = Depends(require_admin)
+):
+    background_tasks.add_task(score_stats_backfill.run_backfill)
+
+    return {"message": "책별 점수 집계 재계산이 시작되었습니다."}
+
+# =================================================
+# 대화 기록 chunk 이전
+# =================================================
+
+@router.post("/api/admin/transcripts/migrate")
+def migrate_transcripts_api(
+    background_tasks: BackgroundTasks,
+    _: str = Depends(require_admin)
+):
+    background_tasks.add_task(transcript_migration.run_migration)
+
+    return {"message": "대화 기록 이전이 시작되었습니다."}
+
+# =================================================
+# 요청 프로파일
+# =================================================
+
+@router.get("/api/admin/profiles")
+def list_profiles_api(_: str = Depends(require_admin)):
+    return {"profiles": profiling.list_profiles()}
+
+@router.get("/api/admin/profiles/{profile_id}")
+def download_profile_api(profile_id: str, _: str = Depends(require_admin)):
+    """
+    speedscope 형식 파일 (https://www.speedscope.app 에서 열기)
+    """
+    path = profiling.profile_file(profile_id, "speedscope.json")
+    if path is None:
+        raise HTTPException(status_code=404, detail="프로파일을 찾을 수 없습니다.")
+
+    return FileResponse(path, media_type="application/json", filename=f"{profile_id}.speedscope.json")
@@ -1,9 +1,11 @@
-from fastapi import APIRouter, Request, Depends
+from typing import Optional
+from fastapi import APIRouter, Request, Depends, Query, Response
 from app.core.auth import get_current_user 
+from app.schemas.book import Book
 
 router = APIRouter()
 
-@router.get("/api/book/{chat_id}")
+@router.get("/api/book/{chat_id}", response_model=Book)
 async def book_api(
     chat_id: str,
     request: Request,
@@ -16,9 +18,26 @@ async def book_api(
 
     return book_data
 
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    # If-None-Match는 약한 비교 (W/ 접두어 무시)
+    candidates = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+    return etag in candidates
+
 @router.get("/api/list/curriculum")
-async def get_all_curriculum_api(request: Request):
+def get_all_curriculum_api(
+    request: Request,
+    fields: Optional[str] = Query(None, description="반환할 작품 필드 (예: title,author)"),
+):
+    field_list = [f.strip() for f in fields.split(",") if f.strip()] if fields else None
+
+    etag, body = request.app.state.book_service.get_curriculum_payload(field_list)
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
 
-    curriculums = request.app.state.book_service.load_all_curriculums()
+    if _etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
 
-    return {"curriculums": curriculums}
\ No newline at end of file
+    return Response(content=body, media_type="application/json", headers=headers)
\ No newline at end of file
@@ -1,6 +1,20 @@
-from fastapi import APIRouter, Request, Depends
-from app.schemas.chat import ChatMessageRequest
-from app.core.auth import get_current_user 
+from typing import Optional
+from fastapi import APIRouter, Request, Depends, Query, Header, HTTPException, WebSocket, WebSocketDisconnect
+from starlette.concurrency import run_in_threadpool
+from app.schemas.chat import (
+    ChatMessageRequest,
+    ChatCreateResponse,
+    ChatReplyResponse,
+    ChatListResponse,
+    ChatDetailResponse,
+)
+from app.core.auth import get_current_user, decode_token
+from app.core import idempotency
+from app.config.errors import (
+    ChatNotFoundError,
+    CurriculumNotFoundError,
+    InvalidChatStateError,
+)
 
 router = APIRouter()
 
@@ -8,7 +22,7 @@ router = APIRouter()
 # post
 # =================================================
 
-@router.post("/api/chat/create")
+@router.post("/api/chat/create", response_model=ChatCreateResponse)
 def create_chat_id(request: Request, user_uuid: str = Depends(get_current_user) ):
     chat_id, book_data = request.app.state.chat_service.create_chat(user_uuid)
 
@@ -18,25 +32,33 @@ def create_chat_id(request: Request, user_uuid: str = Depends(get_current_user)
         "message": "채팅방이 생성되었습니다."
     }
 
-@router.post("/api/chat/{chat_id}/message")
-async def create_message_api(
+@router.post("/api/chat/{chat_id}/message", response_model=ChatReplyResponse)
+def create_message_api(
     chat_id: str,
     req: ChatMessageRequest,
     request: Request,
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key"),
     user_uuid: str = Depends(get_current_user)
 ):
     llm = request.app.state.llm
 
-    reply = request.app.state.chat_service.process_chat(
-        llm=llm,
-        user_uuid=user_uuid,
-        chat_id=chat_id,
-        user_message=req.message
+    def run():
+        reply = request.app.state.chat_service.process_chat(
+            llm=llm,
+            user_uuid=user_uuid,
+            chat_id=chat_id,
+            user_message=req.message
+        )
+        return {"reply": reply}
+
+    return idempotency.run_once(
+        f"{user_uuid}:chat_message:{chat_id}",
+        run,
+        idempotency_key=idempotency_key,
+        request_fingerprint=idempotency.fingerprint(req.message),
     )
 
-    return {"reply": reply}
-
-@router.post("/api/assistant/{chat_id}/message")
+@router.post("/api/assistant/{chat_id}/message", response_model=ChatReplyResponse)
 async def create_assistant_message_api(
     chat_id: str,
     req: ChatMessageRequest,
@@ -55,26 +77,100 @@ async def create_assistant_message_api(
     return {"reply": reply}
 
 
+# =================================================
+# websocket
+# =================================================
+
+@router.websocket("/api/chat/{chat_id}/ws")
+async def chat_session_ws(websocket: WebSocket, chat_id: str):
+    """
+    토론 채팅 세션 채널. 연결 시 1회 인증/상태 로딩 후
+    {"message": "..."} 를 받을 때마다 token 이벤트와 최종 reply 를 보냅니다.
+    토큰은 ?token= 또는 Authorization 헤더로 전달합니다.
+    """
+    token = websocket.query_params.get("token")
+    auth_header = websocket.headers.get("authorization")
+    if not token and auth_header and auth_header.startswith("Bearer "):
+        token = auth_header.split(" ")[1]
+
+    try:
+        user_uuid = decode_token(token) if token else None
+    except HTTPException:
+        user_uuid = None
+
+    if user_uuid is None:
+        await websocket.close(code=1008)
+        return
+
+    await websocket.accept()
+
+    chat_service = websocket.app.state.chat_service
+    try:
+        session = await run_in_threadpool(chat_service.open_session, user_uuid, chat_id)
+    except (ChatNotFoundError, CurriculumNotFoundError) as e:
+        await websocket.send_json({"type": "error", "detail": str(e) or "채팅방을 찾을 수 없습니다."})
+        await websocket.close(code=1011)
+        return
+
+    try:
+        while True:
+            try:
+                data = await websocket.receive_json()
+            except (ValueError, KeyError):
+                # JSON 이 아니거나 바이너리 프레임이면 오류만 알리고 세션은 유지
+                await websocket.send_json({"type": "error", "detail": "JSON 메시지만 보낼 수 있습니다."})
+                continue
+            message = data.get("message") if isinstance(data, dict) else None
+            if not message:
+                await websocket.send_json({"type": "error", "detail": "message 가 비어 있습니다."})
+                continue
+
+            try:
+                async for event in chat_service.stream_session_chat(
+                    websocket.app.state.llm, session, message
+                ):
+                    await websocket.send_json(event)
+            except InvalidChatStateError:
+                await websocket.send_json({"type": "error", "detail": "잘못된 토론 상태입니다."})
+            except Exception as e:
+                print(f"[ERROR] 채팅 세션 처리 실패: {e}")
+                await websocket.send_json({"type": "error", "detail": "답변 생성에 실패했습니다."})
+    except WebSocketDisconnect:
+        pass
+
+
 # =================================================
 # get
 # =================================================
 
-@router.get("/api/list/chat")
-def get_chats_api(request: Request, user_uuid: str = Depends(get_current_user) ):
-    chats = request.app.state.chat_service.list_chats(user_uuid)
+@router.get("/api/list/chat", response_model=ChatListResponse)
+def get_chats_api(
+    request: Request,
+    limit: int = Query(20, ge=1, le=100, description="페이지 크기"),
+    start_after: Optional[str] = Query(None, description="이전 응답의 next_cursor"),
+    user_uuid: str = Depends(get_current_user)
+):
+    chats, next_cursor = request.app.state.chat_service.list_chats(
+        user_uuid,
+        limit=limit,
+        start_after=start_after,
+    )
 
-    return {"chats": chats}
+    return {"chats": chats, "next_cursor": next_cursor}
 
-@router.get("/api/chat/{chat_id}/message")
-async def get_messages_api(
+@router.get("/api/chat/{chat_id}/message", response_model=ChatDetailResponse, response_model_exclude_unset=True)
+def get_messages_api(
     chat_id: str,
     request: Request,
+    since: Optional[str] = Query(None, description="이전 응답의 next_since, 마지막으로 받은 messageId 또는 ISO timestamp"),
+    meta: bool = Query(True, description="false 면 제목/단계 정보 없이 메시지만 반환"),
     user_uuid: str = Depends(get_current_user)
 ):
     chat = request.app.state.chat_service.get_chat_detail(
         user_uuid=user_uuid,
         chat_id=chat_id,
-        mode="chat_messages"
+        since=since,
+        include_meta=meta,
     )
 
     return {"chat": chat}
\ No newline at end of file
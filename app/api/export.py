@@ -0,0 +1,37 @@
+from fastapi import APIRouter, HTTPException, Depends, Query
+from fastapi.responses import StreamingResponse
+from app.core.auth import get_current_user
+from app.services import user_service, export_service
+
+router = APIRouter()
+
+
+def _can_export(requester_uuid: str, target_uuid: str) -> bool:
+    if requester_uuid == target_uuid:
+        return True
+    profile = user_service.get_user_profile(requester_uuid) or {}
+    if profile.get("role") == "관리자":
+        return True
+    return profile.get("role") == "학부모" and profile.get("relation") == target_uuid
+
+# 사용자 전체 기록 내보내기 (NDJSON 스트리밍)
+@router.get("/api/export/user/{user_uuid}")
+def export_user_api(
+    user_uuid: str,
+    gzip: bool = Query(False, description="gzip 압축 여부"),
+    requester_uuid: str = Depends(get_current_user)
+):
+    if not _can_export(requester_uuid, user_uuid):
+        raise HTTPException(status_code=403, detail="내보내기 권한이 없습니다.")
+
+    body = export_service.iter_user_export(user_uuid)
+    headers = {"Content-Disposition": f'attachment; filename="{user_uuid}.ndjson"'}
+
+    if gzip:
+        body = export_service.gzip_stream(body)
+        headers["Content-Encoding"] = "gzip"
+    else:
+        # GZipMiddleware 가 버퍼링하지 않도록 명시 (첫 바이트 즉시 전송)
+        headers["Content-Encoding"] = "identity"
+
+    return StreamingResponse(body, media_type="application/x-ndjson", headers=headers)
@@ -0,0 +1,27 @@
+from fastapi import APIRouter, HTTPException, Depends
+from app.core.auth import get_current_user
+from app.services import user_service, dashboard_service
+
+router = APIRouter()
+
+# 연결된 자녀의 학습 요약
+@router.get("/api/parent/dashboard")
+def get_parent_dashboard_api(user_uuid: str = Depends(get_current_user)):
+    profile = user_service.get_user_profile(user_uuid)
+    if not profile or profile.get("role") != "학부모":
+        raise HTTPException(status_code=403, detail="학부모만 사용할 수 있습니다.")
+
+    child_uuid = profile.get("relation")
+    if not child_uuid:
+        raise HTTPException(status_code=404, detail="연결된 학생이 없습니다.")
+
+    child = user_service.get_user_profile(child_uuid)
+    if not child:
+        raise HTTPException(status_code=404, detail="연결된 학생을 찾을 수 없습니다.")
+
+    dashboard = dashboard_service.get_dashboard(child_uuid)
+
+    return {
+        "child": {"id": child.get("id"), "name": child.get("name")},
+        "dashboard": dashboard,
+    }
@@ -1,6 +1,17 @@
-from fastapi import APIRouter, Request, Depends
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+from fastapi import APIRouter, Request, Depends, Query, Header
 from app.schemas.chat import BookReportRequest
+from app.schemas.report import (
+    FinalReportCreateResponse,
+    FinalReportListResponse,
+    FinalReportDetailResponse,
+    BookReportListResponse,
+    BookReportDetailResponse,
+    TotalReportResponse,
+)
 from app.core.auth import get_current_user 
+from app.core import idempotency
 
 router = APIRouter()
 
@@ -26,40 +37,62 @@ async def create_book_report_api(
     return {"message": "감상문이 성공적으로 저장되었습니다."}
 
 
-@router.post("/api/report/final/{chat_id}")
-async def create_final_report_api(
+@router.post("/api/report/final/{chat_id}", response_model=FinalReportCreateResponse)
+def create_final_report_api(
     chat_id: str,
     request: Request,
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key"),
     user_uuid: str = Depends(get_current_user)
 ):
     llm = request.app.state.llm
-
-    final_report = request.app.state.report_service.create_final_report(
-        llm=llm,
-        user_uuid=user_uuid,
-        chat_id=chat_id
+    chat_service = request.app.state.chat_service
+
+    # 재시도 시 보고서 재평가 + 새 채팅방 생성이 반복되지 않도록 응답 전체를 한 번만 실행
+    def run():
+        # 다음 채팅 준비(읽기)는 보고서 평가와 겹쳐 실행하고, 생성은 보고서 저장 후에만
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            plan_future = executor.submit(chat_service.prepare_chat, user_uuid)
+            final_report = request.app.state.report_service.create_final_report(
+                llm=llm,
+                user_uuid=user_uuid,
+                chat_id=chat_id
+            )
+            plan = plan_future.result()
+        new_chat_id, book_data = chat_service.commit_chat(user_uuid, plan)
+
+        return {"final_report": final_report,         
+                "chat_id": new_chat_id,
+                "message": "채팅방이 생성되었습니다."}
+
+    return idempotency.run_once(
+        f"{user_uuid}:final_report:{chat_id}",
+        run,
+        idempotency_key=idempotency_key,
     )
-    chat_id, book_data = request.app.state.chat_service.create_chat(user_uuid)
-
-    return {"final_report": final_report,         
-            "chat_id": chat_id,
-            "message": "채팅방이 생성되었습니다."}
 
-@router.post("/api/report/total")
-async def create_total_report_api(
+@router.post("/api/report/total", response_model=TotalReportResponse)
+def create_total_report_api(
     request: Request,
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key"),
     user_uuid: str = Depends(get_current_user)
 ):
     llm = request.app.state.llm
-    total_report = request.app.state.report_service.create_total_report(llm, user_uuid)
 
-    return {"total_report": total_report}
+    def run():
+        total_report = request.app.state.report_service.create_total_report(llm, user_uuid)
+        return {"total_report": total_report}
+
+    return idempotency.run_once(
+        f"{user_uuid}:total_report",
+        run,
+        idempotency_key=idempotency_key,
+    )
 
 # =================================================
 # get
 # =================================================
 
-@router.get("/api/report/book/{chat_id}")
+@router.get("/api/report/book/{chat_id}", response_model=BookReportDetailResponse)
 async def get_book_report_api(
     chat_id: str,
     request: Request,
@@ -73,7 +106,7 @@ async def get_book_report_api(
 
     return {"book_report": book_report}
 
-@router.get("/api/report/final/{chat_id}")
+@router.get("/api/report/final/{chat_id}", response_model=FinalReportDetailResponse)
 async def get_final_report_api(
     chat_id: str,
     request: Request,
@@ -88,7 +121,7 @@ async def get_final_report_api(
 
     return {"final_report": final_report}
 
-@router.get("/api/report/total")
+@router.get("/api/report/total", response_model=TotalReportResponse)
 async def get_total_report_api(
     request: Request,
     user_uuid: str = Depends(get_current_user)
@@ -97,28 +130,35 @@ async def get_total_report_api(
     
     return { "total_report" : total_report}
 
-@router.get("/api/list/report/final")
-async def get_final_reports_api(
+@router.get("/api/list/report/final", response_model=FinalReportListResponse)
+def get_final_reports_api(
     request: Request,
+    limit: int = Query(20, ge=1, le=100, description="페이지 크기"),
+    start_after: Optional[str] = Query(None, description="이전 응답의 next_cursor"),
     user_uuid: str = Depends(get_current_user)
 ):
-    print("user_uuid", user_uuid)
-    final_reports = request.app.state.report_service.list_all_final_reports(
+    final_reports, next_cursor = request.app.state.report_service.list_all_final_reports(
         user_uuid=user_uuid,
+        limit=limit,
+        start_after=start_after,
     )
     
     return {
-        "final_reports": final_reports}
+        "final_reports": final_reports,
+        "next_cursor": next_cursor}
 
-@router.get("/api/list/report/book")
-async def get_book_reports_api(
+@router.get("/api/list/report/book", response_model=BookReportListResponse)
+def get_book_reports_api(
     request: Request,
+    limit: int = Query(20, ge=1, le=100, description="페이지 크기"),
+    start_after: Optional[str] = Query(None, description="이전 응답의 next_cursor"),
     user_uuid: str = Depends(get_current_user)
 ):
-    print("user_uuid", user_uuid)
-    book_reports = request.app.state.report_service.list_all_book_reports(
+    book_reports, next_cursor = request.app.state.report_service.list_all_book_reports(
         user_uuid=user_uuid,
+        limit=limit,
+        start_after=start_after,
     )
 
-    return {"book_reports": book_reports}
+    return {"book_reports": book_reports, "next_cursor": next_cursor}
 
@@ -23,7 +23,7 @@ def search_user_ids(prefix: str = Query(..., description="검색할 아이디 pr
 def get_user_profile(id: str, _: str = Depends(auth.get_current_user)):
     user_data = user_service.get_user_by_id(id)
     if not user_data:
-        user_data = user_service.get_user_by_uuid(user_uuid=id)
+        user_data = user_service.get_user_profile(user_uuid=id)
         if not user_data:
             raise HTTPException(status_code=400, detail="존재하지 않는 사용자입니다.")
     return {
@@ -46,7 +46,9 @@ def get_check_id(id: str):
 # 내 정보 조회
 @router.get("/api/me", response_model=User)
 def get_my_profile(user_uuid: str = Depends(auth.get_current_user)):
-    user_data = user_service.get_user_by_uuid(user_uuid=user_uuid)
+    user_data = user_service.get_user_profile(user_uuid=user_uuid)
+    if not user_data:
+        raise HTTPException(status_code=400, detail="존재하지 않는 사용자입니다.")
     return {
         "id": user_data["id"],
         "name": user_data["name"] if user_data["name"] else "",
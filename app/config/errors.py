@@ -15,3 +15,21 @@ class InvalidChatStateError(Exception):
 
 class LLMRetryFailedError(Exception):
     pass
+
+class InvalidCursorError(Exception):
+    pass
+
+class IdempotencyConflictError(Exception):
+    pass
+
+class IdempotencyKeyReusedError(Exception):
+    pass
+
+class InvalidIdempotencyKeyError(Exception):
+    pass
+
+class LLMCassetteMissError(Exception):
+    pass
+
+class PurgeIncompleteError(Exception):
+    pass
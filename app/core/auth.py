@@ -3,10 +3,9 @@ from fastapi import Request
 from datetime import datetime, timedelta, timezone
 from jose import jwt, JWTError
 from fastapi import HTTPException
-from dotenv import load_dotenv
 
-BASE_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-load_dotenv(os.path.join(BASE_DIR, ".env"))
+from app.config.settings import BASE_DIR  # noqa: F401  (.env 로딩)
+
 SECRET_KEY = os.getenv("SECRET_KEY")
 ALGORITHM = "HS256"
 REFRESH_TOKEN_EXPIRE_DAYS = 7  
@@ -26,7 +25,13 @@ def get_current_user(request: Request) -> str:
         raise HTTPException(status_code=401, detail="Authorization header missing or invalid")
 
     token = auth_header.split(" ")[1]
-    
+    return decode_token(token)
+
+
+def decode_token(token: str) -> str:
+    """
+    JWT 를 검증하고 sub(user_uuid)를 반환합니다.
+    """
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
         user_uuid = payload.get("sub")
@@ -0,0 +1,543 @@
+import base64
+import os
+import sys
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import Future
+from datetime import datetime
+
+import orjson
+
+# 캐시에 없음을 나타내는 값 (None 도 캐시할 수 있도록 구분)
+MISSING = object()
+
+KEY_PREFIX = os.getenv("CACHE_KEY_PREFIX", "nexture")
+
+
+# ================================
+# 직렬화 (L2 저장 형식)
+# ================================
+# L2 값은 다른 프로세스도 쓰므로 임의 객체를 복원하는 pickle 대신 JSON(orjson)으로 저장합니다.
+# JSON 에 없는 tuple/set/bytes/datetime 은 태그를 붙여 원래 타입으로 복원합니다.
+# (chat state 의 update_time 은 나노초까지 그대로 돌아와야 쓰기 전제조건에 쓸 수 있음)
+_TYPE_TAG = "__cache_type__"
+
+
+def _encode(value):
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value
+    if isinstance(value, list):
+        return [_encode(v) for v in value]
+    if isinstance(value, dict):
+        if all(isinstance(k, str) for k in value) and _TYPE_TAG not in value:
+            return {k: _encode(v) for k, v in value.items()}
+        return {_TYPE_TAG: "dict", "v": [[_encode(k), _encode(v)] for k, v in value.items()]}
+    if isinstance(value, tuple):
+        return {_TYPE_TAG: "tuple", "v": [_encode(v) for v in value]}
+    if isinstance(value, (set, frozenset)):
+        return {_TYPE_TAG: "set", "v": [_encode(v) for v in value]}
+    if isinstance(value, bytes):
+        return {_TYPE_TAG: "bytes", "v": base64.b64encode(value).decode("ascii")}
+    if isinstance(value, datetime):
+        # Firestore DatetimeWithNanoseconds 는 나노초를 보존하는 rfc3339 로
+        if hasattr(value, "rfc3339") and value.tzinfo is not None:
+            return {_TYPE_TAG: "datetime_ns", "v": value.rfc3339()}
+        return {_TYPE_TAG: "datetime", "v": value.isoformat()}
+    raise TypeError(f"캐시에 저장할 수 없는 타입: {type(value).__name__}")
+
+
+def _decode(value):
+    if isinstance(value, list):
+        return [_decode(v) for v in value]
+    if not isinstance(value, dict):
+        return value
+
+    tag = value.get(_TYPE_TAG)
+    if tag is None:
+        return {k: _decode(v) for k, v in value.items()}
+    raw = value["v"]
+    if tag == "dict":
+        return {_decode(k): _decode(v) for k, v in raw}
+    if tag == "tuple":
+        return tuple(_decode(v) for v in raw)
+    if tag == "set":
+        return {_decode(v) for v in raw}
+    if tag == "bytes":
+        return base64.b64decode(raw)
+    if tag == "datetime_ns":
+        from google.api_core.datetime_helpers import DatetimeWithNanoseconds
+
+        return DatetimeWithNanoseconds.from_rfc3339(raw)
+    if tag == "datetime":
+        return datetime.fromisoformat(raw)
+    raise ValueError(f"알 수 없는 캐시 타입 태그: {tag}")
+
+
+def dumps(value) -> bytes:
+    return orjson.dumps(_encode(value))
+
+
+def loads(raw: bytes):
+    return _decode(orjson.loads(raw))
+
+
+# ================================
+# L1: 프로세스 내 LRU
+# ================================
+def _serialized_size(value) -> int:
+    try:
+        return len(dumps(value))
+    except TypeError:
+        return sys.getsizeof(value)
+
+
+class LRUCache:
+    """
+    TTL 을 지원하는 프로세스 내 LRU 캐시.
+    max_bytes 를 주면 항목 크기(sizeof, 기본은 직렬화 크기) 합계도 그 이하로 유지합니다.
+    """
+    def __init__(self, max_size: int = 1024, max_bytes: int = None, sizeof=_serialized_size):
+        self._max_size = max_size
+        self._max_bytes = max_bytes
+        self._sizeof = sizeof
+        self._bytes = 0
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            item = self._items.get(key)
+            if item is None:
+                return MISSING
+
+            value, expires_at, size = item
+            if expires_at is not None and expires_at <= time.monotonic():
+                del self._items[key]
+                self._bytes -= size
+                return MISSING
+
+            self._items.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl: float = None):
+        expires_at = time.monotonic() + ttl if ttl else None
+        size = self._sizeof(value) if self._max_bytes else 0
+        if self._max_bytes and size > self._max_bytes:
+            self.delete(key)
+            return
+
+        with self._lock:
+            old = self._items.pop(key, None)
+            if old is not None:
+                self._bytes -= old[2]
+            self._items[key] = (value, expires_at, size)
+            self._bytes += size
+            while len(self._items) > self._max_size or (self._max_bytes and self._bytes > self._max_bytes):
+                _, (_, _, evicted_size) = self._items.popitem(last=False)
+                self._bytes -= evicted_size
+
+    def delete(self, key):
+        with self._lock:
+            item = self._items.pop(key, None)
+            if item is not None:
+                self._bytes -= item[2]
+
+    def delete_prefix(self, prefix: str):
+        with self._lock:
+            for key in [k for k in self._items if k.startswith(prefix)]:
+                self._bytes -= self._items.pop(key)[2]
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+            self._bytes = 0
+
+    @property
+    def size_bytes(self) -> int:
+        return self._bytes
+
+    def __len__(self):
+        return len(self._items)
+
+
+# ================================
+# L2: Redis 호환 공유 저장소
+# ================================
+class MemoryL2:
+    """
+    테스트/단일 프로세스용 Redis 대체 구현.
+    TwoTierCache 가 사용하는 명령(get/set/delete/scan_iter/eval)만 같은 시그니처로 제공합니다.
+    """
+    def __init__(self):
+        self._data = {}
+        self._lock = threading.Lock()
+
+    def _alive(self, key):
+        item = self._data.get(key)
+        if item is None:
+            return None
+        value, expires_at = item
+        if expires_at is not None and expires_at <= time.time():
+            del self._data[key]
+            return None
+        return value
+
+    def get(self, key):
+        with self._lock:
+            return self._alive(key)
+
+    def set(self, key, value, ex: int = None, nx: bool = False):
+        with self._lock:
+            if nx and self._alive(key) is not None:
+                return None
+            self._data[key] = (value, time.time() + ex if ex else None)
+            return True
+
+    def delete(self, *keys):
+        with self._lock:
+            removed = 0
+            for key in keys:
+                if self._data.pop(key, None) is not None:
+                    removed += 1
+            return removed
+
+    def scan_iter(self, match: str = None):
+        prefix = match[:-1] if match and match.endswith("*") else match
+        with self._lock:
+            keys = list(self._data)
+        return iter([k for k in keys if prefix is None or k.startswith(prefix)])
+
+    def eval(self, script: str, numkeys: int, *keys_and_args):
+        """
+        락 해제 스크립트(_RELEASE_LOCK_SCRIPT)만 지원합니다.
+        """
+        if script != _RELEASE_LOCK_SCRIPT:
+            raise NotImplementedError("MemoryL2 는 락 해제 스크립트만 지원합니다.")
+        key, token = keys_and_args
+        with self._lock:
+            if self._alive(key) == token:
+                del self._data[key]
+                return 1
+            return 0
+
+
+# 토큰이 같을 때만 락을 지움 (TTL 이 지나 다른 프로세스가 잡은 락을 지우지 않도록)
+_RELEASE_LOCK_SCRIPT = """
+if redis.call("get", KEYS[1]) == ARGV[1] then
+    return redis.call("del", KEYS[1])
+end
+return 0
+"""
+
+
+_l2 = None
+
+
+def configure_l2(client=None):
+    """
+    공유 L2 를 설정합니다. client 가 없으면 REDIS_URL 로 redis 클라이언트를 만들고,
+    REDIS_URL 도 없으면 L2 없이 L1 만 사용합니다.
+    """
+    global _l2
+
+    if client is None:
+        redis_url = os.getenv("REDIS_URL")
+        if redis_url:
+            import redis
+
+            client = redis.Redis.from_url(redis_url)
+
+    _l2 = client
+    return _l2
+
+
+def get_l2():
+    return _l2
+
+
+# ================================
+# L1 + L2
+# ================================
+class TwoTierCache:
+    """
+    namespace 단위 2단 캐시.
+    L1(프로세스 LRU)에서 먼저 찾고, 없으면 L2(워커/레플리카 공유)를 조회합니다.
+    get_or_load 는 같은 키의 동시 로딩을 프로세스 안에서는 키별 in-flight Future 로,
+    프로세스 사이에서는 L2 의 SET NX 락으로 한 번만 수행되게 합니다.
+    (다른 키는 서로 기다리지 않으므로 loader 가 LLM 호출처럼 길거나 다른 키를 읽어도 됨)
+    """
+    def __init__(
+        self,
+        namespace: str,
+        ttl: float = 300,
+        l1_size: int = 1024,
+        l1_max_bytes: int = None,
+        l1_ttl: float = None,
+        l2=None,
+        lock_ttl: float = 30,
+        lock_wait: float = 5,
+    ):
+        self.namespace = namespace
+        self.ttl = ttl
+        self.l1_ttl = l1_ttl if l1_ttl is not None else ttl
+        self.lock_ttl = lock_ttl
+        self.lock_wait = lock_wait
+        self._l1 = LRUCache(l1_size, max_bytes=l1_max_bytes)
+        self._l2 = l2
+        # 로딩 중인 키 -> Future (로딩이 끝나면 제거되므로 크기는 동시 로딩 수로 제한됨)
+        self._inflight = {}
+        self._inflight_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._stats = {
+            "l1_hits": 0,
+            "l2_hits": 0,
+            "misses": 0,
+            "loads": 0,
+            "load_errors": 0,
+            "lock_waits": 0,
+            "shared_loads": 0,
+            "l2_errors": 0,
+        }
+
+    # ---------- 내부 ----------
+    @property
+    def l2(self):
+        return self._l2 if self._l2 is not None else _l2
+
+    def _full_key(self, key: str) -> str:
+        return f"{KEY_PREFIX}:{self.namespace}:{key}"
+
+    def _count(self, name: str):
+        with self._stats_lock:
+            self._stats[name] += 1
+
+    def _l2_get(self, full_key):
+        l2 = self.l2
+        if l2 is None:
+            return MISSING
+        try:
+            raw = l2.get(full_key)
+        except Exception as e:
+            self._count("l2_errors")
+            print(f"[WARN] L2 get 실패 ({self.namespace}): {e}")
+            return MISSING
+        if raw is None:
+            return MISSING
+        try:
+            return loads(raw)
+        except Exception as e:
+            self._count("l2_errors")
+            print(f"[WARN] L2 값 복원 실패 ({self.namespace}): {e}")
+            return MISSING
+
+    def _l2_set(self, full_key, value, ttl):
+        l2 = self.l2
+        if l2 is None:
+            return
+        try:
+            l2.set(full_key, dumps(value), ex=int(ttl) if ttl else None)
+        except Exception as e:
+            self._count("l2_errors")
+            print(f"[WARN] L2 set 실패 ({self.namespace}): {e}")
+
+    # ---------- 공개 API ----------
+    def get(self, key: str):
+        full_key = self._full_key(key)
+
+        value = self._l1.get(full_key)
+        if value is not MISSING:
+            self._count("l1_hits")
+            return value
+
+        value = self._l2_get(full_key)
+        if value is not MISSING:
+            self._count("l2_hits")
+            self._l1.set(full_key, value, self.l1_ttl)
+            return value
+
+        self._count("misses")
+        return MISSING
+
+    def set(self, key: str, value, ttl: float = None):
+        ttl = ttl or self.ttl
+        full_key = self._full_key(key)
+        self._l1.set(full_key, value, min(ttl, self.l1_ttl) if self.l1_ttl else ttl)
+        self._l2_set(full_key, value, ttl)
+
+    def delete(self, key: str):
+        full_key = self._full_key(key)
+        self._l1.delete(full_key)
+        l2 = self.l2
+        if l2 is not None:
+            try:
+                l2.delete(full_key)
+            except Exception as e:
+                self._count("l2_errors")
+                print(f"[WARN] L2 delete 실패 ({self.namespace}): {e}")
+
+    def delete_prefix(self, prefix: str = "", l1_only: bool = False):
+        """
+        namespace 안에서 prefix 로 시작하는 키를 모두 지웁니다. (l1_only 면 이 프로세스의 L1 만)
+        """
+        full_prefix = self._full_key(prefix)
+        self._l1.delete_prefix(full_prefix)
+        l2 = self.l2
+        if l2 is not None and not l1_only:
+            try:
+                keys = list(l2.scan_iter(match=full_prefix + "*"))
+                if keys:
+                    l2.delete(*keys)
+            except Exception as e:
+                self._count("l2_errors")
+                print(f"[WARN] L2 prefix 삭제 실패 ({self.namespace}): {e}")
+
+    def get_or_load(self, key: str, loader, ttl: float = None):
+        """
+        캐시에 없으면 loader() 결과를 저장하고 반환합니다.
+        """
+        value = self.get(key)
+        if value is not MISSING:
+            return value
+
+        full_key = self._full_key(key)
+        with self._inflight_lock:
+            future = self._inflight.get(full_key)
+            owner = future is None
+            if owner:
+                future = self._inflight[full_key] = Future()
+
+        if not owner:
+            # 같은 키를 로딩 중인 스레드의 결과(또는 예외)를 공유
+            self._count("shared_loads")
+            return future.result()
+
+        try:
+            value = self._load(key, full_key, loader, ttl)
+            future.set_result(value)
+            return value
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._inflight_lock:
+                self._inflight.pop(full_key, None)
+
+    def _load(self, key: str, full_key: str, loader, ttl: float = None):
+        # 앞의 get 과 Future 등록 사이에 다른 스레드가 채웠을 수 있음
+        value = self._l1.get(full_key)
+        if value is not MISSING:
+            self._count("l1_hits")
+            return value
+
+        lock_token = self._acquire_l2_lock(full_key)
+        if lock_token is None:
+            # 다른 프로세스가 로딩 중 → 잠깐 기다렸다가 L2 에서 가져옴
+            value = self._wait_for_l2(full_key)
+            if value is not MISSING:
+                self._l1.set(full_key, value, self.l1_ttl)
+                return value
+
+        try:
+            self._count("loads")
+            try:
+                value = loader()
+            except Exception:
+                self._count("load_errors")
+                raise
+            self.set(key, value, ttl)
+            return value
+        finally:
+            if lock_token:
+                self._release_l2_lock(full_key, lock_token)
+
+    def acquire_lock(self, key: str):
+        """
+        프로세스 사이에서 key 작업을 선점합니다. 다른 프로세스가 선점 중이면 None
+        (L2 가 없으면 항상 선점 성공)
+        """
+        return self._acquire_l2_lock(self._full_key(key))
+
+    def release_lock(self, key: str, token):
+        self._release_l2_lock(self._full_key(key), token)
+
+    def wait_for(self, key: str):
+        """
+        다른 프로세스가 채울 값을 lock_wait 초까지 기다립니다. 시간 초과 시 MISSING
+        """
+        full_key = self._full_key(key)
+        value = self._wait_for_l2(full_key)
+        if value is not MISSING:
+            self._l1.set(full_key, value, self.l1_ttl)
+        return value
+
+    def _acquire_l2_lock(self, full_key):
+        l2 = self.l2
+        if l2 is None:
+            return True
+        token = uuid.uuid4().hex
+        try:
+            if l2.set(full_key + ":lock", token, ex=int(self.lock_ttl), nx=True):
+                return token
+            return None
+        except Exception as e:
+            self._count("l2_errors")
+            print(f"[WARN] L2 lock 실패 ({self.namespace}): {e}")
+            return True
+
+    def _release_l2_lock(self, full_key, token):
+        l2 = self.l2
+        if l2 is None or token is True:
+            return
+        try:
+            l2.eval(_RELEASE_LOCK_SCRIPT, 1, full_key + ":lock", token)
+        except Exception:
+            self._count("l2_errors")
+
+    def _wait_for_l2(self, full_key):
+        self._count("lock_waits")
+        deadline = time.monotonic() + self.lock_wait
+        while time.monotonic() < deadline:
+            time.sleep(0.05)
+            value = self._l2_get(full_key)
+            if value is not MISSING:
+                self._count("l2_hits")
+                return value
+        return MISSING
+
+    def stats(self) -> dict:
+        with self._stats_lock:
+            counts = dict(self._stats)
+        lookups = counts["l1_hits"] + counts["l2_hits"] + counts["misses"]
+        hits = counts["l1_hits"] + counts["l2_hits"]
+        return {
+            **counts,
+            "l1_size": len(self._l1),
+            "l1_bytes": self._l1.size_bytes if self._l1._max_bytes else None,
+            "hit_rate": round(hits / lookups, 4) if lookups else None,
+        }
+
+
+# ================================
+# namespace 레지스트리
+# ================================
+_caches = {}
+_caches_lock = threading.Lock()
+
+
+def get_cache(namespace: str, **kwargs) -> TwoTierCache:
+    """
+    namespace 별 캐시를 하나만 만들어 공유합니다. (kwargs 는 최초 생성 시에만 적용)
+    """
+    with _caches_lock:
+        cache = _caches.get(namespace)
+        if cache is None:
+            cache = _caches[namespace] = TwoTierCache(namespace, **kwargs)
+        return cache
+
+
+def cache_stats() -> dict:
+    with _caches_lock:
+        caches = dict(_caches)
+    return {namespace: cache.stats() for namespace, cache in caches.items()}
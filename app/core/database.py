@@ -1,14 +1,292 @@
+import itertools
 import os
-import firebase_admin
-from firebase_admin import credentials, firestore, messaging
-from dotenv import load_dotenv
+import threading
 
-BASE_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-load_dotenv(os.path.join(BASE_DIR, ".env"))
+from app.config.settings import BASE_DIR  # noqa: F401  (.env 로딩)
 
-cred = credentials.Certificate(os.environ["FIREBASE_CREDENTIAL_PATH"])
+# 클라이언트(= gRPC 채널) 수. 채널 1개가 동시 스트림 한도(기본 100)에 걸리지 않도록 워커 동시성에 맞춰 늘림
+FIRESTORE_POOL_SIZE = int(os.getenv("FIRESTORE_POOL_SIZE", "1"))
+# least_loaded | round_robin
+FIRESTORE_POOL_STRATEGY = os.getenv("FIRESTORE_POOL_STRATEGY", "least_loaded")
+FIRESTORE_KEEPALIVE_MS = int(os.getenv("FIRESTORE_KEEPALIVE_MS", "30000"))
+FIRESTORE_KEEPALIVE_TIMEOUT_MS = int(os.getenv("FIRESTORE_KEEPALIVE_TIMEOUT_MS", "10000"))
+FIRESTORE_HEALTH_INTERVAL = float(os.getenv("FIRESTORE_HEALTH_INTERVAL", "60"))
 
-if not firebase_admin._apps:
-    firebase_admin.initialize_app(cred)
+_pool = None
+_lock = threading.Lock()
 
-db = firestore.client()
\ No newline at end of file
+
+def _channel_options(index: int) -> list:
+    return [
+        ("grpc.keepalive_time_ms", FIRESTORE_KEEPALIVE_MS),
+        ("grpc.keepalive_timeout_ms", FIRESTORE_KEEPALIVE_TIMEOUT_MS),
+        ("grpc.keepalive_permit_without_calls", 1),
+        ("grpc.http2.max_pings_without_data", 0),
+        # 같은 옵션의 채널끼리 TCP 연결을 공유하지 않도록 (채널마다 별도 연결)
+        ("grpc.use_local_subchannel_pool", 1),
+    ]
+
+
+# PooledClient 가 재정의하는 비공개 구현에서 사용하는 속성
+# (requirements.txt 의 google-cloud-firestore 버전에 맞춤. 바뀌면 기본 채널로 동작)
+_PRIVATE_CLIENT_ATTRS = ("_firestore_api_internal", "_emulator_host", "_target", "_client_options", "_client_info")
+
+
+def _client_class(base, index: int):
+    """
+    keepalive/연결 분리 옵션으로 gRPC 채널을 만드는 Firestore 클라이언트
+    (기본 구현은 keepalive_time_ms 만 지정하고 채널끼리 연결을 공유함)
+    """
+    if not callable(getattr(base, "_firestore_api_helper", None)):
+        print("[WARN] Firestore 클라이언트 구현이 달라 채널 옵션 없이 기본 클라이언트를 사용합니다.")
+        return base
+
+    class PooledClient(base):
+        def _firestore_api_helper(self, transport, client_class, client_module):
+            if not all(hasattr(self, attr) for attr in _PRIVATE_CLIENT_ATTRS):
+                return super()._firestore_api_helper(transport, client_class, client_module)
+            if self._firestore_api_internal is None and self._emulator_host is None:
+                channel = transport.create_channel(
+                    self._target, credentials=self._credentials, options=_channel_options(index)
+                )
+                self._transport = transport(host=self._target, channel=channel)
+                self._firestore_api_internal = client_class(
+                    transport=self._transport, client_options=self._client_options
+                )
+                client_module._client_info = self._client_info
+            return super()._firestore_api_helper(transport, client_class, client_module)
+
+    return PooledClient
+
+
+def _firebase_app():
+    import firebase_admin
+    from firebase_admin import credentials
+
+    if not firebase_admin._apps:
+        cred = credentials.Certificate(os.environ["FIREBASE_CREDENTIAL_PATH"])
+        firebase_admin.initialize_app(cred)
+    return firebase_admin.get_app()
+
+
+def _create_client(index: int):
+    from google.cloud import firestore
+
+    app = _firebase_app()
+    return _client_class(firestore.Client, index)(
+        project=app.project_id,
+        credentials=app.credential.get_credential(),
+    )
+
+
+# ================================
+# 클라이언트 풀
+# ================================
+class _Slot:
+    def __init__(self, index: int, client):
+        self.index = index
+        self.client = client
+        self.threads = 0
+        self.healthy = True
+        self.failures = 0
+
+
+class _Binding:
+    """
+    스레드에 고정된 slot. 스레드가 끝나면(thread-local 정리) 부하 계산에서 빠짐
+    """
+    def __init__(self, pool, slot):
+        self.pool = pool
+        self.slot = slot
+
+    def __del__(self):
+        with self.pool._lock:
+            self.slot.threads -= 1
+
+
+class ClientPool:
+    """
+    Firestore 클라이언트 N개(채널 N개).
+
+    - client(): 호출 스레드에 고정된 클라이언트. 처음 쓰는 스레드에 strategy 로 배정하며,
+      같은 스레드의 트랜잭션/참조가 항상 같은 클라이언트를 쓰도록 보장합니다.
+    - check_health(): 클라이언트마다 가벼운 쿼리를 보내고 실패한 클라이언트는 새로 만듭니다.
+    """
+    def __init__(self, factory, size: int, strategy: str = "least_loaded"):
+        if strategy not in ("least_loaded", "round_robin"):
+            raise ValueError(f"지원하지 않는 Firestore 풀 전략: {strategy}")
+        self._factory = factory
+        self._strategy = strategy
+        # _Binding.__del__ 가 GC 로 lock 안에서 불릴 수 있어 RLock
+        self._lock = threading.RLock()
+        self._slots = [_Slot(i, factory(i)) for i in range(max(1, size))]
+        self._round_robin = itertools.count()
+        self._local = threading.local()
+        self._stats = {"recreated": 0}
+
+    def _pick(self):
+        """
+        lock 을 잡은 상태에서 호출
+        """
+        candidates = [s for s in self._slots if s.healthy] or self._slots
+        if self._strategy == "round_robin":
+            return candidates[next(self._round_robin) % len(candidates)]
+        return min(candidates, key=lambda s: (s.threads, s.index))
+
+    @property
+    def clients(self) -> list:
+        return [slot.client for slot in self._slots]
+
+    def client(self):
+        binding = getattr(self._local, "binding", None)
+        if binding is None:
+            with self._lock:
+                slot = self._pick()
+                slot.threads += 1
+            binding = self._local.binding = _Binding(self, slot)
+        return binding.slot.client
+
+    def check_health(self, probe) -> list:
+        """
+        probe(client) 가 실패한 slot 은 unhealthy 로 표시하고 클라이언트를 새로 만듭니다.
+        (slot 에 배정된 스레드도 다음 호출부터 새 클라이언트를 씀. 이전 클라이언트의 채널은 닫음)
+        """
+        results = []
+        for slot in self._slots:
+            try:
+                probe(slot.client)
+                slot.healthy, slot.failures = True, 0
+            except Exception as e:
+                slot.healthy = False
+                slot.failures += 1
+                print(f"[WARN] Firestore 채널 {slot.index} 상태 확인 실패 ({slot.failures}회): {e}")
+                try:
+                    new_client = self._factory(slot.index)
+                    with self._lock:
+                        old_client, slot.client = slot.client, new_client
+                    self._stats["recreated"] += 1
+                    _close_client(old_client)
+                except Exception as create_error:
+                    print(f"[ERROR] Firestore 채널 {slot.index} 재생성 실패: {create_error}")
+            results.append(slot.healthy)
+        return results
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                **self._stats,
+                "strategy": self._strategy,
+                "channels": [
+                    {
+                        "index": s.index,
+                        "threads": s.threads,
+                        "healthy": s.healthy,
+                        "failures": s.failures,
+                    }
+                    for s in self._slots
+                ],
+            }
+
+
+def _close_client(client):
+    """
+    교체된 클라이언트의 gRPC 채널을 닫습니다. (열어 두면 채널과 keepalive 가 계속 남음)
+    """
+    try:
+        close = getattr(client, "close", None)
+        if callable(close):
+            close()
+        else:
+            client._firestore_api._transport.close()
+    except Exception as e:
+        print(f"[WARN] 이전 Firestore 클라이언트 종료 실패: {e}")
+
+
+# ================================
+# 초기화 / 공개 API
+# ================================
+def init_db():
+    """
+    Firebase 앱과 Firestore 클라이언트 풀을 최초 1회만 초기화합니다.
+    firebase_admin 임포트도 이 시점까지 미룹니다. 반환값은 호출 스레드의 클라이언트입니다.
+    """
+    global _pool
+
+    if _pool is None:
+        with _lock:
+            if _pool is None:
+                _pool = ClientPool(_create_client, FIRESTORE_POOL_SIZE, strategy=FIRESTORE_POOL_STRATEGY)
+
+    return _pool.client()
+
+
+def get_pool() -> ClientPool:
+    init_db()
+    return _pool
+
+
+def _probe(client):
+    list(client.collection("curriculums").select([]).limit(1).stream())
+
+
+def warm_db():
+    """
+    가벼운 쿼리 1회로 모든 채널의 gRPC 연결과 인증 토큰을 미리 준비합니다.
+    """
+    get_pool().check_health(_probe)
+
+
+def check_db_health() -> list:
+    return get_pool().check_health(_probe)
+
+
+def db_pool_stats() -> dict:
+    return {"sync": _pool.stats() if _pool else None}
+
+
+class _HealthChecker(threading.Thread):
+    def __init__(self, interval: float):
+        super().__init__(name="firestore-health", daemon=True)
+        self.interval = interval
+        self._stop_event = threading.Event()
+
+    def run(self):
+        while not self._stop_event.wait(self.interval):
+            check_db_health()
+
+    def stop(self):
+        self._stop_event.set()
+
+
+_health_checker = None
+
+
+def start_health_checks():
+    """
+    FIRESTORE_HEALTH_INTERVAL 초마다 채널 상태 확인 (0 이면 사용 안 함)
+    """
+    global _health_checker
+
+    if _health_checker is None and FIRESTORE_HEALTH_INTERVAL > 0:
+        _health_checker = _HealthChecker(FIRESTORE_HEALTH_INTERVAL)
+        _health_checker.start()
+
+
+def stop_health_checks():
+    global _health_checker
+
+    if _health_checker is not None:
+        _health_checker.stop()
+        _health_checker = None
+
+
+class _LazyClient:
+    """
+    `from app.core.database import db` 사용처를 그대로 두기 위한 지연 프록시.
+    호출 스레드에 배정된 풀 클라이언트로 위임합니다.
+    """
+    def __getattr__(self, name):
+        return getattr(init_db(), name)
+
+
+db = _LazyClient()
@@ -0,0 +1,105 @@
+import hashlib
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+
+from app.config.settings import env_flag
+
+# 공감 답변 마감 시간. 넘기면 대체 문구로 바로 다음 질문을 보냄 (0 이면 끝까지 기다림)
+EMPATHY_DEADLINE = float(os.getenv("EMPATHY_DEADLINE_MS", "4000")) / 1000
+# 마감 초과/실패 시 동작: pool(대체 문구) | skip(공감 생략)
+EMPATHY_FALLBACK = os.getenv("EMPATHY_FALLBACK", "pool")
+# 늦게 도착한 LLM 공감 답변을 다음 질문 뒤에 이어 붙일지
+EMPATHY_LATE_APPEND = env_flag("EMPATHY_LATE_APPEND", False)
+
+# 최근 WINDOW 턴의 대체 비율이 BREAKER_RATE 이상이면 COOLDOWN 동안 LLM 을 부르지 않음 (공급자 장애)
+EMPATHY_WINDOW = int(os.getenv("EMPATHY_WINDOW", "20"))
+EMPATHY_BREAKER_RATE = float(os.getenv("EMPATHY_BREAKER_RATE", "0.5"))
+EMPATHY_COOLDOWN = float(os.getenv("EMPATHY_COOLDOWN", "30"))
+
+FALLBACK_PHRASES = [
+    "그렇게 생각했군요. 좋은 생각이에요.",
+    "이야기해줘서 고마워요. 잘 들었어요.",
+    "그럴 수 있겠네요. 솔직하게 말해줘서 좋아요.",
+    "오, 그런 생각을 했군요! 흥미로워요.",
+    "차분하게 잘 설명해줬네요.",
+    "그 마음 충분히 이해돼요.",
+]
+
+# 공감 호출 전용 풀 (요청 스레드는 마감 시간까지만 기다림)
+_executor = ThreadPoolExecutor(
+    max_workers=int(os.getenv("EMPATHY_WORKERS", "32")),
+    thread_name_prefix="empathy",
+)
+
+_lock = threading.Lock()
+_recent = deque(maxlen=EMPATHY_WINDOW)
+_open_until = 0.0
+_stats = {"llm": 0, "timeout": 0, "error": 0, "breaker": 0, "late_appended": 0, "late_dropped": 0}
+
+
+def fallback_phrase(user_message: str) -> Optional[str]:
+    """
+    대체 공감 문구. 같은 답변에는 같은 문구 (skip 모드면 None)
+    """
+    if EMPATHY_FALLBACK == "skip":
+        return None
+    digest = hashlib.md5(user_message.encode("utf-8")).digest()
+    return FALLBACK_PHRASES[digest[0] % len(FALLBACK_PHRASES)]
+
+
+def join_reply(empathy_text: Optional[str], next_text: str) -> str:
+    return f"{empathy_text}\n\n{next_text}" if empathy_text else next_text
+
+
+# ================================
+# 대체 비율 / 차단기
+# ================================
+def should_call_llm() -> bool:
+    """
+    차단기가 열려 있으면 False (LLM 을 부르지 않고 바로 대체)
+    """
+    with _lock:
+        if time.monotonic() < _open_until:
+            _stats["breaker"] += 1
+            return False
+        return True
+
+
+def record(outcome: str):
+    """
+    outcome: llm | timeout | error | late_appended | late_dropped
+    """
+    global _open_until
+
+    with _lock:
+        _stats[outcome] += 1
+        if outcome not in ("llm", "timeout", "error"):
+            return
+
+        _recent.append(outcome != "llm")
+        if len(_recent) == _recent.maxlen and sum(_recent) / len(_recent) >= EMPATHY_BREAKER_RATE:
+            _open_until = time.monotonic() + EMPATHY_COOLDOWN
+            _recent.clear()
+            print(f"[WARN] 공감 답변 대체 비율이 높아 {EMPATHY_COOLDOWN:.0f}초 동안 LLM 호출을 생략합니다.")
+
+
+def stats() -> dict:
+    with _lock:
+        turns = _stats["llm"] + _stats["timeout"] + _stats["error"] + _stats["breaker"]
+        fallbacks = turns - _stats["llm"]
+        return {
+            **_stats,
+            "turns": turns,
+            "fallback_rate": round(fallbacks / turns, 4) if turns else 0.0,
+            "recent_fallback_rate": round(sum(_recent) / len(_recent), 4) if _recent else 0.0,
+            "breaker_open": time.monotonic() < _open_until,
+            "deadline_ms": EMPATHY_DEADLINE * 1000,
+        }
+
+
+def submit(fn, *args):
+    return _executor.submit(fn, *args)
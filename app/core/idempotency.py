@@ -0,0 +1,114 @@
+import hashlib
+import json
+import os
+import threading
+from concurrent.futures import Future
+from typing import Callable, Optional
+
+from app.config.errors import IdempotencyConflictError, IdempotencyKeyReusedError, InvalidIdempotencyKeyError
+from app.core.cache import get_cache, MISSING
+
+# Idempotency-Key 가 있는 요청의 응답 보관 시간
+IDEMPOTENCY_TTL = float(os.getenv("IDEMPOTENCY_TTL", str(24 * 60 * 60)))
+# 다른 프로세스가 처리 중일 때 결과를 기다리는 시간 (LLM 호출 시간보다 길게)
+IDEMPOTENCY_WAIT = float(os.getenv("IDEMPOTENCY_WAIT", "90"))
+
+MAX_KEY_LENGTH = 255
+
+_inflight = {}
+_inflight_lock = threading.Lock()
+
+
+def _cache():
+    return get_cache(
+        "idempotency",
+        ttl=IDEMPOTENCY_TTL,
+        lock_ttl=IDEMPOTENCY_WAIT + 30,
+        lock_wait=IDEMPOTENCY_WAIT,
+    )
+
+
+def fingerprint(*parts) -> str:
+    """
+    요청 본문 지문. 같은 키로 다른 요청이 오는 것을 구분합니다.
+    """
+    raw = json.dumps(parts, ensure_ascii=False, sort_keys=True, default=str)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def run_once(scope: str, fn: Callable, idempotency_key: Optional[str] = None, request_fingerprint: str = ""):
+    """
+    scope(사용자/엔드포인트/채팅) 안에서 같은 요청은 fn 을 한 번만 실행합니다.
+
+    - Idempotency-Key 가 있으면 응답을 IDEMPOTENCY_TTL 동안 보관하고 재시도에 그대로 돌려줍니다.
+      같은 키로 본문이 다른 요청이 오면 IdempotencyKeyReusedError.
+      프로세스 사이에서는 캐시 L2 락으로 합치며, 다른 프로세스의 처리가 IDEMPOTENCY_WAIT 안에
+      끝나지 않으면 IdempotencyConflictError.
+    - 키가 없으면 같은 본문으로 "동시에" 처리 중인 요청만 하나로 합칩니다. (프로세스 안, 결과는 보관하지 않음)
+      끝난 뒤 같은 본문이 다시 오면("네" 를 두 번 보내는 경우 등) 새 요청으로 실행합니다.
+    - 실패한 요청은 보관하지 않으므로 재시도하면 다시 실행됩니다.
+    """
+    if idempotency_key and len(idempotency_key) > MAX_KEY_LENGTH:
+        raise InvalidIdempotencyKeyError(f"Idempotency-Key 는 {MAX_KEY_LENGTH}자 이하여야 합니다.")
+
+    if idempotency_key:
+        key = f"{scope}:key:{idempotency_key}"
+        cache = _cache()
+
+        def unwrap(stored):
+            if stored["fingerprint"] != request_fingerprint:
+                raise IdempotencyKeyReusedError("같은 Idempotency-Key 로 다른 요청을 보낼 수 없습니다.")
+            return stored["response"]
+
+        stored = cache.get(key)
+        if stored is not MISSING:
+            return unwrap(stored)
+
+        return unwrap(_share_inflight(key, lambda: _run_across_processes(cache, key, fn, request_fingerprint)))
+
+    return _share_inflight(f"{scope}:inflight:{request_fingerprint}", fn)
+
+
+def _share_inflight(key: str, fn: Callable):
+    """
+    프로세스 안에서 같은 key 로 처리 중인 요청이 있으면 그 결과(Future)를 기다려 공유합니다.
+    """
+    with _inflight_lock:
+        future = _inflight.get(key)
+        owner = future is None
+        if owner:
+            future = _inflight[key] = Future()
+    if not owner:
+        return future.result()
+
+    try:
+        result = fn()
+        future.set_result(result)
+        return result
+    except BaseException as e:
+        future.set_exception(e)
+        raise
+    finally:
+        with _inflight_lock:
+            _inflight.pop(key, None)
+
+
+def _run_across_processes(cache, key: str, fn: Callable, request_fingerprint: str) -> dict:
+    token = cache.acquire_lock(key)
+    if token is None:
+        stored = cache.wait_for(key)
+        if stored is MISSING:
+            raise IdempotencyConflictError("같은 요청을 처리하고 있습니다. 잠시 후 다시 시도해 주세요.")
+        return stored
+
+    try:
+        # 락을 얻는 사이 다른 프로세스가 끝냈을 수 있음
+        stored = cache.get(key)
+        if stored is not MISSING:
+            return stored
+
+        stored = {"fingerprint": request_fingerprint, "response": fn()}
+        cache.set(key, stored, IDEMPOTENCY_TTL)
+        return stored
+    finally:
+        cache.release_lock(key, token)
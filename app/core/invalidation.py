@@ -0,0 +1,182 @@
+"""
+캐시 무효화 버스.
+
+키 형식 (prefix 로 구독)
+- curriculum:{step 문서 id}   커리큘럼 변경 (빈 suffix 는 전체)
+- profile:{user_uuid}         사용자 프로필 변경
+- user:{user_uuid}            사용자 전체 (계정 삭제 등)
+- report_view:{user}:{chat}:  조립된 보고서 화면
+
+publish 는 같은 프로세스의 구독자를 바로 호출하고, invalidations 컬렉션에 이벤트를 남겨
+다른 레플리카에 전달합니다. 각 레플리카는 invalidations 와 curriculums 를 snapshot listener 로
+구독하므로, Firebase 콘솔에서 커리큘럼을 고쳐도 캐시가 바로 비워집니다.
+
+공유 L2 는 발행한 레플리카가 이미 지웠으므로, 다른 레플리카에서 받은 이벤트는 L1 만 지웁니다.
+(레플리카마다 SCAN+DEL 을 반복하거나 발행자가 다시 채운 L2 를 지우지 않도록)
+"""
+import threading
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Optional
+
+from app.config.settings import env_flag
+
+
+EVENT_COLLECTION = "invalidations"
+# 이벤트 문서 보관 기간 (Firestore TTL 정책을 expire_at 에 걸어 정리)
+EVENT_RETENTION = timedelta(hours=1)
+
+ORIGIN = uuid.uuid4().hex
+
+_subscribers = []
+_subscribers_lock = threading.Lock()
+_watches = []
+_stats = {"published": 0, "broadcast": 0, "received": 0, "dispatched": 0, "errors": 0}
+
+
+# ================================
+# 구독 / 발행
+# ================================
+def subscribe(
+    prefix: str,
+    callback: Callable[[str], None],
+    on_remote: Optional[Callable[[str], None]] = None,
+):
+    """
+    prefix 로 시작하는 키가 발행되면 callback(suffix) 를 호출합니다.
+    다른 레플리카에서 받은 이벤트는 on_remote 가 있으면 그쪽을 호출합니다.
+    """
+    with _subscribers_lock:
+        _subscribers.append((prefix, callback, on_remote or callback))
+
+
+def bind_cache(cache, prefix: str, to_cache_prefix: Optional[Callable[[str], str]] = None):
+    """
+    캐시를 prefix 에 연결합니다. suffix 를 캐시 키 prefix 로 바꿔(to_cache_prefix) 지우며,
+    suffix 가 비어 있으면 namespace 전체를 지웁니다. 다른 레플리카의 이벤트는 L1 만 지웁니다.
+    """
+    def cache_prefix(suffix: str) -> str:
+        return to_cache_prefix(suffix) if (suffix and to_cache_prefix) else suffix
+
+    subscribe(
+        prefix,
+        lambda suffix: cache.delete_prefix(cache_prefix(suffix)),
+        on_remote=lambda suffix: cache.delete_prefix(cache_prefix(suffix), l1_only=True),
+    )
+
+
+def _dispatch(key: str, remote: bool = False):
+    with _subscribers_lock:
+        subscribers = list(_subscribers)
+
+    for prefix, callback, on_remote in subscribers:
+        if key.startswith(prefix):
+            try:
+                (on_remote if remote else callback)(key[len(prefix):])
+                _stats["dispatched"] += 1
+            except Exception as e:
+                _stats["errors"] += 1
+                print(f"[ERROR] 캐시 무효화 처리 실패 ({key}): {e}")
+
+
+def publish(key: str, broadcast: bool = True):
+    """
+    로컬 구독자에게 즉시 전달하고, broadcast 면 다른 레플리카에도 전달합니다.
+    """
+    _stats["published"] += 1
+    _dispatch(key)
+
+    if broadcast and _watches:
+        from app.core.database import db
+
+        now = datetime.now(timezone.utc)
+        try:
+            db.collection(EVENT_COLLECTION).add({
+                "key": key,
+                "origin": ORIGIN,
+                "created_at": now,
+                "expire_at": now + EVENT_RETENTION,
+            })
+            _stats["broadcast"] += 1
+        except Exception as e:
+            _stats["errors"] += 1
+            print(f"[WARN] 무효화 이벤트 전송 실패 ({key}): {e}")
+
+
+# ================================
+# snapshot listener
+# ================================
+def _on_events(snapshots, changes, read_time):
+    for change in changes:
+        if change.type.name != "ADDED":
+            continue
+        data = change.document.to_dict() or {}
+        if data.get("origin") == ORIGIN or not data.get("key"):
+            continue
+        _stats["received"] += 1
+        _dispatch(data["key"], remote=True)
+
+
+def _claim_l2_cleanup(event_id: str) -> bool:
+    """
+    publish 를 거치지 않은 변경(콘솔 수정 등)은 L2 를 지운 레플리카가 없으므로,
+    같은 변경을 받은 레플리카 중 하나만 L2 까지 지우도록 SET NX 로 선점합니다.
+    """
+    from app.core.cache import KEY_PREFIX, get_l2
+
+    l2 = get_l2()
+    if l2 is None:
+        return False
+    try:
+        return bool(l2.set(
+            f"{KEY_PREFIX}:invalidation:{event_id}", ORIGIN,
+            ex=int(EVENT_RETENTION.total_seconds()), nx=True,
+        ))
+    except Exception as e:
+        print(f"[WARN] 무효화 L2 선점 실패 ({event_id}): {e}")
+        return True
+
+
+def _curriculum_listener():
+    initial = [True]
+
+    def on_snapshot(snapshots, changes, read_time):
+        # 첫 스냅샷은 현재 상태 전체이므로 무시
+        if initial[0]:
+            initial[0] = False
+            return
+        for change in changes:
+            _stats["received"] += 1
+            changed_at = change.document.update_time or read_time
+            event_id = f"curriculum:{change.document.id}:{changed_at.timestamp()}"
+            _dispatch(f"curriculum:{change.document.id}", remote=not _claim_l2_cleanup(event_id))
+
+    return on_snapshot
+
+
+def start():
+    """
+    레플리카 간 무효화 이벤트와 curriculums 변경을 구독합니다. (INVALIDATION_BUS=0 이면 로컬 전용)
+    """
+    if _watches or not env_flag("INVALIDATION_BUS", True):
+        return
+
+    from app.core.database import db
+
+    started_at = datetime.now(timezone.utc)
+    events = db.collection(EVENT_COLLECTION).where("created_at", ">=", started_at)
+    _watches.append(events.on_snapshot(_on_events))
+    _watches.append(db.collection("curriculums").on_snapshot(_curriculum_listener()))
+
+
+def stop():
+    while _watches:
+        watch = _watches.pop()
+        try:
+            watch.unsubscribe()
+        except Exception:
+            pass
+
+
+def stats() -> dict:
+    return {**_stats, "listening": bool(_watches), "subscribers": len(_subscribers)}
@@ -0,0 +1,236 @@
+import asyncio
+import hashlib
+import json
+import os
+import random
+import re
+import threading
+import time
+from collections import defaultdict
+from typing import Callable, Iterable, List, Optional
+
+from langchain_core.messages import AIMessage, AIMessageChunk
+
+from app.config.errors import LLMCassetteMissError
+
+MODES = ("record", "replay", "auto")
+FAILURE_MODES = ("empty", "malformed_json", "error")
+
+# 프롬프트 해시에서 제외하는 값 (실행마다 바뀌는 값)
+_VOLATILE_PATTERNS = [
+    (re.compile(r"\d{4}-\d{2}-\d{2}[T ]\d{2}:\d{2}:\d{2}(?:\.\d+)?(?:Z|[+-]\d{2}:?\d{2})?"), "<ts>"),
+    (re.compile(r"\b[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}\b", re.I), "<uuid>"),
+    (re.compile(r"\b[0-9a-f]{32,64}\b", re.I), "<hash>"),
+]
+_TOKEN = re.compile(r"\S+\s*|\s+")
+
+
+def normalize_messages(messages) -> list:
+    """
+    [(role, content)] 로 바꾸고 공백/들여쓰기와 휘발성 값(시각, uuid, 해시)을 정규화합니다.
+    """
+    normalized = []
+    for message in messages:
+        content = message.content if isinstance(message.content, str) else json.dumps(message.content, ensure_ascii=False)
+        content = " ".join(content.split())
+        for pattern, placeholder in _VOLATILE_PATTERNS:
+            content = pattern.sub(placeholder, content)
+        normalized.append([message.type, content])
+    return normalized
+
+
+def prompt_key(messages) -> str:
+    raw = json.dumps(normalize_messages(messages), ensure_ascii=False)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class CassetteLLM:
+    """
+    app.state.llm 대체용 녹화/재생 LLM. (invoke / ainvoke / stream / astream)
+
+    - record: 실제 LLM(inner)을 호출하고 프롬프트/응답/지연시간을 cassette(JSONL)에 추가
+    - replay: cassette 에서만 응답. 없는 프롬프트는 LLMCassetteMissError
+    - auto  : 있으면 재생, 없으면 녹화
+    같은 프롬프트가 여러 번 녹화되어 있으면 재생 시 순서대로 돌려가며 사용합니다.
+    """
+    def __init__(
+        self,
+        path: str,
+        mode: str = "replay",
+        inner=None,
+        latency_ms: Optional[float] = None,
+        latency_scale: float = 1.0,
+        tokens_per_sec: float = 0,
+        failure_rate: float = 0,
+        failure_modes: Iterable[str] = FAILURE_MODES,
+        seed: Optional[int] = None,
+    ):
+        if mode not in MODES:
+            raise ValueError(f"지원하지 않는 cassette 모드: {mode}")
+        if mode != "replay" and inner is None:
+            raise ValueError(f"{mode} 모드에는 실제 LLM 이 필요합니다.")
+
+        self.path = path
+        self.mode = mode
+        self.inner = inner
+        self.latency_ms = latency_ms
+        self.latency_scale = latency_scale
+        self.tokens_per_sec = tokens_per_sec
+        self.failure_rate = failure_rate
+        self.failure_modes = [m for m in failure_modes if m in FAILURE_MODES] or list(FAILURE_MODES)
+
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._entries = defaultdict(list)
+        self._cursors = defaultdict(int)
+        self.stats = {"replayed": 0, "recorded": 0, "misses": 0, "injected_failures": 0}
+        self._load()
+
+    # ---------- cassette 파일 ----------
+    def _load(self):
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    entry = json.loads(line)
+                    self._entries[entry["key"]].append(entry)
+
+    def _append(self, key: str, messages, content: str, latency_ms: float):
+        entry = {
+            "key": key,
+            "messages": normalize_messages(messages),
+            "response": content,
+            "latency_ms": round(latency_ms, 1),
+        }
+        with self._lock:
+            self._entries[key].append(entry)
+            self.stats["recorded"] += 1
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+
+    def _lookup(self, key: str):
+        with self._lock:
+            entries = self._entries.get(key)
+            if not entries:
+                return None
+            entry = entries[self._cursors[key] % len(entries)]
+            self._cursors[key] += 1
+            self.stats["replayed"] += 1
+            return entry
+
+    # ---------- 재생 시뮬레이션 ----------
+    def _delay(self, entry) -> float:
+        latency_ms = self.latency_ms if self.latency_ms is not None else entry.get("latency_ms", 0)
+        return latency_ms * self.latency_scale / 1000
+
+    def _inject(self, content: str) -> str:
+        if self.failure_rate <= 0 or self._random.random() >= self.failure_rate:
+            return content
+
+        with self._lock:
+            self.stats["injected_failures"] += 1
+        mode = self._random.choice(self.failure_modes)
+        if mode == "empty":
+            return ""
+        if mode == "malformed_json":
+            # 닫는 괄호를 없애고 중간을 잘라 JSON 파싱이 실패하도록
+            return content.replace("}", "")[: max(1, len(content) // 2)]
+        raise ConnectionError("cassette: 주입된 LLM 호출 실패")
+
+    def _tokens(self, content: str) -> List[str]:
+        return _TOKEN.findall(content) or [content]
+
+    def _resolve(self, messages):
+        """
+        (key, entry) 반환. 녹화해야 하면 entry 는 None
+        """
+        key = prompt_key(messages)
+        entry = self._lookup(key) if self.mode != "record" else None
+        if entry is not None:
+            return key, entry
+        if self.mode == "replay":
+            with self._lock:
+                self.stats["misses"] += 1
+            raise LLMCassetteMissError(f"cassette 에 없는 프롬프트입니다: {key[:12]}")
+        return key, None
+
+    # ---------- LangChain 호환 API ----------
+    def invoke(self, messages, **kwargs):
+        key, entry = self._resolve(messages)
+        if entry is None:
+            started = time.perf_counter()
+            content = self.inner.invoke(messages, **kwargs).content
+            self._append(key, messages, content, (time.perf_counter() - started) * 1000)
+            return AIMessage(content=content)
+
+        time.sleep(self._delay(entry))
+        return AIMessage(content=self._inject(entry["response"]))
+
+    def stream(self, messages, **kwargs):
+        key, entry = self._resolve(messages)
+        if entry is None:
+            started = time.perf_counter()
+            parts = []
+            for chunk in self.inner.stream(messages, **kwargs):
+                parts.append(chunk.content)
+                yield chunk
+            self._append(key, messages, "".join(parts), (time.perf_counter() - started) * 1000)
+            return
+
+        time.sleep(self._delay(entry))
+        for token in self._tokens(self._inject(entry["response"])):
+            yield AIMessageChunk(content=token)
+            if self.tokens_per_sec > 0:
+                time.sleep(1 / self.tokens_per_sec)
+
+    async def ainvoke(self, messages, **kwargs):
+        key, entry = self._resolve(messages)
+        if entry is None:
+            started = time.perf_counter()
+            content = (await self.inner.ainvoke(messages, **kwargs)).content
+            self._append(key, messages, content, (time.perf_counter() - started) * 1000)
+            return AIMessage(content=content)
+
+        await asyncio.sleep(self._delay(entry))
+        return AIMessage(content=self._inject(entry["response"]))
+
+    async def astream(self, messages, **kwargs):
+        key, entry = self._resolve(messages)
+        if entry is None:
+            started = time.perf_counter()
+            parts = []
+            async for chunk in self.inner.astream(messages, **kwargs):
+                parts.append(chunk.content)
+                yield chunk
+            self._append(key, messages, "".join(parts), (time.perf_counter() - started) * 1000)
+            return
+
+        await asyncio.sleep(self._delay(entry))
+        for token in self._tokens(self._inject(entry["response"])):
+            yield AIMessageChunk(content=token)
+            if self.tokens_per_sec > 0:
+                await asyncio.sleep(1 / self.tokens_per_sec)
+
+
+def cassette_from_env(path: str, create_llm: Callable):
+    """
+    LLM_CASSETTE_* 환경 변수로 CassetteLLM 을 만듭니다. replay 모드에서는 실제 LLM 을 만들지 않습니다.
+    """
+    mode = os.getenv("LLM_CASSETTE_MODE", "replay")
+    latency_ms = os.getenv("LLM_CASSETTE_LATENCY_MS")
+    seed = os.getenv("LLM_CASSETTE_SEED")
+    failure_modes = os.getenv("LLM_CASSETTE_FAILURES")
+
+    return CassetteLLM(
+        path,
+        mode=mode,
+        inner=create_llm() if mode != "replay" else None,
+        latency_ms=float(latency_ms) if latency_ms else None,
+        latency_scale=float(os.getenv("LLM_CASSETTE_LATENCY_SCALE", "1")),
+        tokens_per_sec=float(os.getenv("LLM_CASSETTE_TOKENS_PER_SEC", "0")),
+        failure_rate=float(os.getenv("LLM_CASSETTE_FAILURE_RATE", "0")),
+        failure_modes=failure_modes.split(",") if failure_modes else FAILURE_MODES,
+        seed=int(seed) if seed else None,
+    )
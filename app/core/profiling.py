@@ -0,0 +1,312 @@
+import hmac
+import json
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+import uuid
+from collections import defaultdict
+from typing import Optional
+
+from starlette.concurrency import run_in_threadpool
+
+# 요청 프로파일링 설정. PROFILE_TOKEN / PROFILE_SAMPLE_RATE 가 모두 없으면 미들웨어를 등록하지 않음
+PROFILE_TOKEN = os.getenv("PROFILE_TOKEN")
+PROFILE_SAMPLE_RATE = float(os.getenv("PROFILE_SAMPLE_RATE", "0"))
+PROFILE_HEADER = "x-profile-token"
+PROFILE_INTERVAL = float(os.getenv("PROFILE_INTERVAL_MS", "5")) / 1000
+PROFILE_TRACEMALLOC = os.getenv("PROFILE_TRACEMALLOC", "1") == "1"
+PROFILE_DIR = os.getenv("PROFILE_DIR", os.path.join(tempfile.gettempdir(), "nexture-profiles"))
+PROFILE_KEEP = int(os.getenv("PROFILE_KEEP", "50"))
+
+# 쉬고 있는 스레드의 최상단 프레임 (파일명, 함수명) → 샘플에서 제외
+IDLE_FRAMES = {
+    ("threading.py", "wait"),
+    ("threading.py", "_wait_for_tstate_lock"),
+    ("selectors.py", "select"),
+    ("queue.py", "get"),
+}
+
+# 동시에 하나의 요청만 프로파일링 (오버헤드/결과 혼선 제한)
+_session_lock = threading.Lock()
+
+# 샘플러는 프로세스의 모든 스레드를, tracemalloc 은 프로세스 전체 할당을 기록합니다.
+# 프로파일 중 다른 요청이 함께 처리되면 그 요청도 결과에 섞이므로, 겹친 요청 수를 meta 의
+# overlapping_requests 로 남깁니다. 0 이 아닌 결과는 다른 요청이 없을 때 다시 측정하세요.
+_inflight_requests = 0
+_active_session = None
+
+
+def enabled() -> bool:
+    return bool(PROFILE_TOKEN) or PROFILE_SAMPLE_RATE > 0
+
+
+# ================================
+# 샘플링 프로파일러
+# ================================
+class _Sampler(threading.Thread):
+    """
+    interval 마다 모든 스레드의 스택을 읽어 기록합니다. (sys._current_frames)
+    """
+    def __init__(self, interval: float):
+        super().__init__(name="request-profiler", daemon=True)
+        self.interval = interval
+        self.frames = {}
+        self.samples = defaultdict(list)
+        self.thread_names = {}
+        self._stop_event = threading.Event()
+
+    def _frame_id(self, code) -> int:
+        key = (code.co_name, code.co_filename, code.co_firstlineno)
+        frame_id = self.frames.get(key)
+        if frame_id is None:
+            frame_id = self.frames[key] = len(self.frames)
+        return frame_id
+
+    def run(self):
+        me = threading.get_ident()
+        last = time.perf_counter()
+        while not self._stop_event.wait(self.interval):
+            now = time.perf_counter()
+            weight, last = now - last, now
+
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == me:
+                    continue
+                code = frame.f_code
+                if (os.path.basename(code.co_filename), code.co_name) in IDLE_FRAMES:
+                    continue
+
+                stack = []
+                while frame is not None:
+                    stack.append(self._frame_id(frame.f_code))
+                    frame = frame.f_back
+                stack.reverse()
+                self.samples[thread_id].append((stack, weight))
+
+        self.thread_names = {t.ident: t.name for t in threading.enumerate()}
+
+    def stop(self):
+        self._stop_event.set()
+        self.join()
+
+    def to_speedscope(self, name: str) -> dict:
+        frames = [None] * len(self.frames)
+        for (func, filename, line), frame_id in self.frames.items():
+            frames[frame_id] = {"name": func, "file": filename, "line": line}
+
+        profiles = []
+        for thread_id, samples in sorted(self.samples.items(), key=lambda kv: -len(kv[1])):
+            total = sum(weight for _, weight in samples)
+            profiles.append({
+                "type": "sampled",
+                "name": self.thread_names.get(thread_id, str(thread_id)),
+                "unit": "seconds",
+                "startValue": 0,
+                "endValue": total,
+                "samples": [stack for stack, _ in samples],
+                "weights": [weight for _, weight in samples],
+            })
+
+        return {
+            "$schema": "https://www.speedscope.app/file-format-schema.json",
+            "name": name,
+            "exporter": "nexture-profiler",
+            "activeProfileIndex": 0,
+            "shared": {"frames": frames},
+            "profiles": profiles,
+        }
+
+
+class ProfileSession:
+    """
+    요청 1건의 CPU 샘플 + tracemalloc 할당 스냅샷
+    """
+    def __init__(self, name: str, interval: float = PROFILE_INTERVAL, trace_memory: bool = PROFILE_TRACEMALLOC):
+        self.profile_id = uuid.uuid4().hex
+        self.name = name
+        self.started_at = time.time()
+        self.elapsed = None
+        self._sampler = _Sampler(interval)
+        # 이미 다른 곳에서 tracemalloc 을 쓰고 있으면 건드리지 않음
+        self._trace_memory = trace_memory and not tracemalloc.is_tracing()
+        self._memory = None
+        self.overlapping_requests = 0
+
+    def start(self):
+        if self._trace_memory:
+            tracemalloc.start(25)
+        self._started = time.perf_counter()
+        self._sampler.start()
+
+    def stop(self):
+        self._sampler.stop()
+        self.elapsed = time.perf_counter() - self._started
+        if self._trace_memory:
+            snapshot = tracemalloc.take_snapshot()
+            current, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            snapshot = snapshot.filter_traces([
+                tracemalloc.Filter(False, tracemalloc.__file__),
+                tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+            ])
+            self._memory = {
+                "current_kb": round(current / 1024, 1),
+                "peak_kb": round(peak / 1024, 1),
+                "top": [
+                    {
+                        "file": stat.traceback[0].filename,
+                        "line": stat.traceback[0].lineno,
+                        "size_kb": round(stat.size / 1024, 1),
+                        "count": stat.count,
+                    }
+                    for stat in snapshot.statistics("lineno")[:30]
+                ],
+            }
+
+    def save(self, status_code: Optional[int] = None):
+        os.makedirs(PROFILE_DIR, exist_ok=True)
+        with open(_path(self.profile_id, "speedscope.json"), "w", encoding="utf-8") as f:
+            json.dump(self._sampler.to_speedscope(self.name), f)
+
+        with open(_path(self.profile_id, "meta.json"), "w", encoding="utf-8") as f:
+            json.dump({
+                "profile_id": self.profile_id,
+                "name": self.name,
+                "status_code": status_code,
+                "started_at": self.started_at,
+                "elapsed_ms": round(self.elapsed * 1000, 1),
+                "samples": sum(len(s) for s in self._sampler.samples.values()),
+                "overlapping_requests": self.overlapping_requests,
+                "memory": self._memory,
+            }, f, ensure_ascii=False)
+
+        _prune()
+
+
+# ================================
+# 저장소
+# ================================
+def _path(profile_id: str, kind: str) -> str:
+    return os.path.join(PROFILE_DIR, f"{profile_id}.{kind}")
+
+
+def _prune():
+    try:
+        metas = sorted(
+            (f for f in os.listdir(PROFILE_DIR) if f.endswith(".meta.json")),
+            key=lambda f: os.path.getmtime(os.path.join(PROFILE_DIR, f)),
+        )
+    except OSError:
+        return
+    for meta in metas[:-PROFILE_KEEP] if len(metas) > PROFILE_KEEP else []:
+        profile_id = meta[:-len(".meta.json")]
+        for kind in ("meta.json", "speedscope.json"):
+            try:
+                os.remove(_path(profile_id, kind))
+            except OSError:
+                pass
+
+
+def list_profiles() -> list:
+    if not os.path.isdir(PROFILE_DIR):
+        return []
+    profiles = []
+    for name in os.listdir(PROFILE_DIR):
+        if name.endswith(".meta.json"):
+            try:
+                with open(os.path.join(PROFILE_DIR, name), encoding="utf-8") as f:
+                    profiles.append(json.load(f))
+            except (OSError, ValueError):
+                continue
+    return sorted(profiles, key=lambda p: p.get("started_at", 0), reverse=True)
+
+
+def profile_file(profile_id: str, kind: str) -> Optional[str]:
+    """
+    kind: "speedscope.json" | "meta.json". 없거나 잘못된 id 면 None
+    """
+    if not profile_id.isalnum():
+        return None
+    path = _path(profile_id, kind)
+    return path if os.path.isfile(path) else None
+
+
+# ================================
+# ASGI 미들웨어
+# ================================
+class ProfilingMiddleware:
+    """
+    X-Profile-Token 헤더가 PROFILE_TOKEN 과 같거나 sample_rate 확률에 걸린 요청을 프로파일링합니다.
+    결과 id 는 응답 헤더 X-Profile-Id 로 돌려주고, /api/admin/profiles 에서 내려받습니다.
+    결과는 프로세스 단위이므로 정확한 측정은 프로파일 요청만 처리 중일 때 합니다. (overlapping_requests)
+    """
+    def __init__(self, app, token: Optional[str] = PROFILE_TOKEN, sample_rate: float = PROFILE_SAMPLE_RATE):
+        self.app = app
+        self.token = token
+        self.sample_rate = sample_rate
+
+    def _should_profile(self, scope) -> bool:
+        if self.token:
+            for name, value in scope.get("headers", []):
+                if name == PROFILE_HEADER.encode() and hmac.compare_digest(value, self.token.encode()):
+                    return True
+        return self.sample_rate > 0 and random.random() < self.sample_rate
+
+    async def _call_untracked(self, scope, receive, send):
+        global _inflight_requests
+
+        _inflight_requests += 1
+        if _active_session is not None:
+            _active_session.overlapping_requests += 1
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            _inflight_requests -= 1
+
+    async def __call__(self, scope, receive, send):
+        global _active_session
+
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        if not self._should_profile(scope) or not _session_lock.acquire(blocking=False):
+            await self._call_untracked(scope, receive, send)
+            return
+
+        session = ProfileSession(f"{scope['method']} {scope['path']}")
+        # 이미 처리 중인 요청도 결과에 섞임
+        session.overlapping_requests = _inflight_requests
+        status_code = None
+
+        async def send_with_id(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                headers = list(message.get("headers", []))
+                headers.append((b"x-profile-id", session.profile_id.encode()))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            _active_session = session
+            session.start()
+            await self.app(scope, receive, send_with_id)
+        finally:
+            _active_session = None
+            try:
+                # 샘플러 join / tracemalloc 스냅샷 / 파일 쓰기는 이벤트 루프를 막지 않도록 스레드에서
+                await run_in_threadpool(self._finish, session, status_code)
+            except Exception as e:
+                print(f"[ERROR] 프로파일 저장 실패: {e}")
+            finally:
+                _session_lock.release()
+
+    @staticmethod
+    def _finish(session: ProfileSession, status_code: Optional[int]):
+        session.stop()
+        session.save(status_code)
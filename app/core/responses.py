@@ -0,0 +1,23 @@
+from datetime import datetime
+
+import orjson
+from fastapi.responses import JSONResponse
+
+
+def _default(obj):
+    # Firestore DatetimeWithNanoseconds 등 datetime 하위 클래스는 orjson 이 직접 처리하지 않음
+    if isinstance(obj, datetime):
+        return obj.isoformat()
+    return str(obj)
+
+
+def dumps(content) -> bytes:
+    return orjson.dumps(content, default=_default, option=orjson.OPT_NON_STR_KEYS)
+
+
+class FastJSONResponse(JSONResponse):
+    """
+    orjson 기반 기본 응답 클래스 (app 의 default_response_class)
+    """
+    def render(self, content) -> bytes:
+        return dumps(content)
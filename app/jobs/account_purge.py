@@ -0,0 +1,277 @@
+import os
+import threading
+import time
+import uuid
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from typing import List, Optional
+
+from app.config.errors import PurgeIncompleteError
+from app.core import invalidation
+from app.core.database import db
+from app.jobs import job_lease
+
+JOB_COLLECTION = "purge_jobs"
+
+# 하위 트리 탐색 병렬도 / 삭제 쓰기 속도 상한(ops/s)
+PURGE_MAX_WORKERS = int(os.getenv("PURGE_MAX_WORKERS", "8"))
+PURGE_MAX_OPS_PER_SECOND = int(os.getenv("PURGE_MAX_OPS_PER_SECOND", "500"))
+# 삭제 1건당 재시도 횟수 (넘으면 실패로 집계)
+PURGE_MAX_WRITE_ATTEMPTS = int(os.getenv("PURGE_MAX_WRITE_ATTEMPTS", "5"))
+LIST_PAGE_SIZE = 500
+# role 을 명시하지 않은 일괄 삭제에서 제외하는 역할
+ADMIN_ROLE = "관리자"
+WRITE_BATCH_SIZE = 400
+FAILURE_PREVIEW = 50
+
+
+def _job_ref(job_id: str):
+    return db.collection(JOB_COLLECTION).document(job_id)
+
+
+def _users_ref(job_id: str):
+    """
+    purge_jobs/{job_id}/users/{user_uuid} : 대상 사용자별 상태 (status: pending | done | failed)
+    """
+    return _job_ref(job_id).collection("users")
+
+
+def _collect_subtree(doc_ref) -> list:
+    """
+    doc_ref 아래 모든 하위 문서와 doc_ref 자신의 참조 (자식 먼저)
+    list_documents 를 사용해 상위 문서가 없는 하위 컬렉션도 빠짐없이 찾습니다.
+    """
+    refs = []
+    for collection in doc_ref.collections():
+        for child in collection.list_documents(page_size=LIST_PAGE_SIZE):
+            refs.extend(_collect_subtree(child))
+    refs.append(doc_ref)
+    return refs
+
+
+def _invalidate_user_caches(user_uuid: str):
+    invalidation.publish(f"user:{user_uuid}")
+
+
+def purge_user(
+    user_uuid: str,
+    max_workers: int = PURGE_MAX_WORKERS,
+    max_ops_per_second: int = PURGE_MAX_OPS_PER_SECOND,
+    on_progress=None,
+) -> int:
+    """
+    users/{uuid} 와 그 아래 모든 하위 컬렉션(chats, messages, assistant, book_report,
+    final_report, total_report, dashboard ...)을 삭제하고 삭제한 문서 수를 반환합니다.
+
+    최상위 하위 문서(채팅 등)별 트리 탐색은 max_workers 개까지 병렬로,
+    삭제는 속도 제한이 걸린 BulkWriter 하나로 처리합니다.
+    삭제는 멱등이므로 중간에 멈춰도 다시 실행하면 남은 문서만 지웁니다.
+    재시도 후에도 실패한 삭제가 있으면 캐시 무효화 없이 PurgeIncompleteError 를 던집니다.
+    """
+    from google.cloud.firestore_v1.bulk_writer import BulkWriterOptions
+
+    user_ref = db.collection("users").document(user_uuid)
+
+    writer = db.bulk_writer(options=BulkWriterOptions(
+        initial_ops_per_second=min(500, max_ops_per_second),
+        max_ops_per_second=max_ops_per_second,
+    ))
+    deleted = failed = 0
+    last_error = ""
+    deleted_lock = threading.Lock()
+
+    def on_result(reference, result, bulk_writer):
+        nonlocal deleted
+        with deleted_lock:
+            deleted += 1
+            count = deleted
+        if on_progress is not None and count % 500 == 0:
+            on_progress(count)
+
+    def on_error(error, bulk_writer) -> bool:
+        # True 를 반환하면 BulkWriter 가 같은 삭제를 다시 시도함
+        nonlocal failed, last_error
+        if error.attempts < PURGE_MAX_WRITE_ATTEMPTS:
+            return True
+        with deleted_lock:
+            failed += 1
+            last_error = f"{error.code}: {error.message}"
+        return False
+
+    writer.on_write_result(on_result)
+    writer.on_write_error(on_error)
+
+    def enqueue(refs):
+        for ref in refs:
+            writer.delete(ref)
+
+    # 진행 중인 탐색을 max_workers * 2 개로 제한해 메모리 사용을 일정하게 유지
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        in_flight = deque()
+        for collection in user_ref.collections():
+            for child in collection.list_documents(page_size=LIST_PAGE_SIZE):
+                in_flight.append(executor.submit(_collect_subtree, child))
+                if len(in_flight) >= max_workers * 2:
+                    enqueue(in_flight.popleft().result())
+
+        while in_flight:
+            enqueue(in_flight.popleft().result())
+
+    writer.delete(user_ref)
+    writer.close()
+
+    if failed:
+        raise PurgeIncompleteError(f"{user_uuid}: {failed}건 삭제 실패 (삭제 {deleted}건) - {last_error}")
+
+    _invalidate_user_caches(user_uuid)
+    return deleted
+
+
+def find_inactive_users(
+    inactive_days: int,
+    role: Optional[str] = None,
+    exclude: Optional[List[str]] = None,
+) -> List[str]:
+    """
+    마지막 로그인(refresh_token_created)이 inactive_days 보다 오래된 사용자 uuid 목록
+    한 번도 로그인하지 않은 사용자는 가입 시각(created_at)으로 판단합니다.
+    role 을 지정하지 않으면 관리자 계정은 제외하며, exclude(요청한 관리자 등)는 항상 제외합니다.
+    """
+    cutoff = datetime.now(timezone.utc) - timedelta(days=inactive_days)
+    users = db.collection("users")
+    excluded = set(exclude or [])
+
+    def matches(doc_id: str, data: dict) -> bool:
+        if doc_id in excluded:
+            return False
+        if role is None:
+            return data.get("role") != ADMIN_ROLE
+        return data.get("role") == role
+
+    user_uuids = []
+    for doc in users.where("refresh_token_created", "<", cutoff).select(["role"]).stream():
+        if matches(doc.id, doc.to_dict()):
+            user_uuids.append(doc.id)
+
+    for doc in users.where("created_at", "<", cutoff).select(["role", "refresh_token_created"]).stream():
+        data = doc.to_dict()
+        if data.get("refresh_token_created") is None and matches(doc.id, data):
+            user_uuids.append(doc.id)
+    return user_uuids
+
+
+# ================================
+# 삭제 작업 (재개 가능)
+# ================================
+def create_job(requested_by: str, user_uuids: List[str], reason: str) -> str:
+    """
+    대상 사용자 목록은 문서 크기 제한을 피해 users 하위 컬렉션에 둡니다.
+    """
+    job_id = str(uuid.uuid4())
+
+    users = _users_ref(job_id)
+    for i in range(0, len(user_uuids), WRITE_BATCH_SIZE):
+        batch = db.batch()
+        for user_uuid in user_uuids[i:i + WRITE_BATCH_SIZE]:
+            batch.set(users.document(user_uuid), {"status": "pending"})
+        batch.commit()
+
+    _job_ref(job_id).set({
+        "status": "pending",
+        "reason": reason,
+        "requested_by": requested_by,
+        "deleted_docs": 0,
+        "done_users": 0,
+        "failed_users": 0,
+        "total_users": len(user_uuids),
+        "created_at": datetime.now(timezone.utc),
+    })
+    return job_id
+
+
+def get_job(job_id: str):
+    snap = _job_ref(job_id).get()
+    if not snap.exists:
+        return None
+
+    job = snap.to_dict()
+    job.pop("lease_token", None)
+    job["job_id"] = job_id
+    job["running"] = job_lease.is_running(job)
+    job["failures"] = [
+        {"user_uuid": doc.id, **doc.to_dict()}
+        for doc in _users_ref(job_id).where("status", "==", "failed").limit(FAILURE_PREVIEW).stream()
+    ]
+    return job
+
+
+def claim_job(job_id: str) -> Optional[str]:
+    """
+    실행 권한(lease) 선점. 다른 실행이 살아 있으면 None (heartbeat 가 끊긴 작업은 다시 선점 가능)
+    """
+    return job_lease.claim(_job_ref(job_id))
+
+
+def run_job(job_id: str, lease_token: Optional[str] = None):
+    """
+    삭제 작업 실행(재개 포함). 사용자 단위로 완료를 기록하고,
+    진행 중인 사용자의 삭제 문서 수도 주기적으로 기록합니다.
+    lease_token 이 없으면 직접 선점하며, 어떤 경우에도 종료 상태를 기록합니다.
+    """
+    from google.cloud.firestore_v1 import Increment
+
+    job_ref = _job_ref(job_id)
+    token = lease_token or claim_job(job_id)
+    if token is None:
+        print(f"[ERROR] 삭제 작업을 실행할 수 없음 (없거나 실행 중): {job_id}")
+        return
+
+    started = time.perf_counter()
+    failed = 0
+    final_status = "failed"
+    error = None
+
+    try:
+        with job_lease.Heartbeat(job_ref, token) as heartbeat:
+            users = _users_ref(job_id)
+            remaining = [doc.id for doc in users.where("status", "in", ["pending", "failed"]).select([]).stream()]
+            job_ref.update({"failed_users": 0})
+
+            for user_uuid in remaining:
+                if heartbeat.lost:
+                    break
+                job_ref.update({"current_user": user_uuid, "current_user_deleted": 0})
+                try:
+                    deleted = purge_user(
+                        user_uuid,
+                        on_progress=lambda count: job_ref.update({"current_user_deleted": count}),
+                    )
+                    users.document(user_uuid).set({"status": "done", "deleted": deleted, "error": None})
+                    job_ref.update({"done_users": Increment(1), "deleted_docs": Increment(deleted)})
+                    print(f"[PURGE] {user_uuid}: {deleted}건 삭제")
+                except Exception as e:
+                    failed += 1
+                    print(f"[ERROR] 사용자 삭제 실패 {user_uuid}: {e}")
+                    users.document(user_uuid).set({"status": "failed", "error": str(e)})
+                    job_ref.update({"failed_users": Increment(1)})
+
+            if heartbeat.lost:
+                final_status = "interrupted"
+            else:
+                final_status = "completed" if failed == 0 else "completed_with_errors"
+    except Exception as e:
+        error = str(e)
+        print(f"[ERROR] 삭제 작업 실패 {job_id}: {e}")
+    finally:
+        elapsed = time.perf_counter() - started
+        try:
+            job_lease.release(job_ref, token, {
+                "status": final_status,
+                "error": error,
+                "current_user": None,
+                "finished_at": datetime.now(timezone.utc),
+                "elapsed_sec": round(elapsed, 2),
+            })
+        except Exception as e:
+            print(f"[ERROR] 삭제 작업 상태 기록 실패 {job_id}: {e}")
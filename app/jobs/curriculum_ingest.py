@@ -0,0 +1,384 @@
+"""
+커리큘럼 일괄 적재.
+
+    python -m app.jobs.curriculum_ingest curriculum.json [--dry-run] [--replace] [--summaries]
+
+입력 형식
+- JSON: {"step1": {"1": {...책...}, ...}, ...} (curriculums 컬렉션 내보내기 형식)
+        또는 [{"step": 1, "id": 1, ...책...}, ...]
+- CSV : step,id,title,author,contents,questions 열 (questions 는 JSON 배열 또는 | 구분)
+
+검증 후 책마다 본문 해시/글자 수/토큰 수/구절(chunk)을 계산하고, 다음 작품 순서와 함께 저장한 뒤
+curriculum_meta/version 을 올려 모든 워커의 커리큘럼 캐시를 갱신합니다.
+"""
+import argparse
+import csv
+import json
+import os
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.core.database import db
+from app.core import invalidation
+from app.services.book_service import (
+    CURRICULUM_META_COLLECTION,
+    CURRICULUM_ORDER_DOC,
+    CURRICULUM_PASSAGE_COLLECTION,
+    CURRICULUM_VERSION_DOC,
+    build_next_item_map,
+)
+from app.utils.retrieval import PASSAGE_CHARS, content_hash, split_passages
+
+REQUIRED_FIELDS = ("title", "contents", "questions")
+# 적재 시 계산하는 필드 (입력에 있으면 무시하고 다시 계산)
+DERIVED_FIELDS = (
+    "content_hash", "char_count", "token_count", "passage_count", "question_count",
+    "gold_summary", "gold_summary_hash",
+)
+
+# Firestore 문서 1MiB 제한보다 여유 있게
+MAX_STEP_DOC_BYTES = 900 * 1024
+# batch 1회 쓰기 수 / 크기 (Firestore 상한 500건, 요청 10MiB)
+BATCH_SIZE = 400
+BATCH_MAX_BYTES = 8 * 1024 * 1024
+
+
+# ================================
+# 입력 읽기
+# ================================
+def _parse_questions(value) -> list:
+    if isinstance(value, list):
+        return value
+    value = (value or "").strip()
+    if value.startswith("["):
+        return json.loads(value)
+    return [q.strip() for q in value.split("|") if q.strip()]
+
+
+def _normalize_number(value) -> str:
+    """
+    "03" -> "3". 숫자가 아니면 그대로 문자열로 두고 validate 에서 오류로 보고합니다.
+    """
+    text = str(value).strip() if value is not None else ""
+    return str(int(text)) if text.isdigit() else text
+
+
+def _rows_to_curriculums(rows) -> Tuple[Dict[str, Dict[str, Any]], List[str]]:
+    """
+    (curriculums, 행 단위 오류 목록)
+    """
+    curriculums, errors = {}, []
+    for line, row in enumerate(rows, start=1):
+        if not isinstance(row, dict):
+            errors.append(f"{line}행: 작품 데이터가 객체가 아닙니다.")
+            continue
+        book = {k: v for k, v in row.items() if k not in ("step", "id") and v not in (None, "")}
+        try:
+            book["questions"] = _parse_questions(row.get("questions"))
+        except ValueError:
+            errors.append(f"{line}행: questions 를 JSON 배열로 읽을 수 없습니다.")
+            continue
+        step_key = f"step{_normalize_number(row.get('step'))}"
+        book_id = _normalize_number(row.get("id"))
+        if book_id in curriculums.setdefault(step_key, {}):
+            errors.append(f"{line}행: {step_key}/{book_id} 가 중복되었습니다.")
+            continue
+        curriculums[step_key][book_id] = book
+    return curriculums, errors
+
+
+def load_source(path: str) -> Tuple[Dict[str, Dict[str, Any]], List[str]]:
+    """
+    (curriculums, 읽는 중 발견한 오류 목록). 형식 오류는 예외 대신 오류 목록으로 보고합니다.
+    """
+    if path.lower().endswith(".csv"):
+        with open(path, encoding="utf-8-sig", newline="") as f:
+            return _rows_to_curriculums(csv.DictReader(f))
+
+    with open(path, encoding="utf-8") as f:
+        data = json.load(f)
+    if isinstance(data, list):
+        return _rows_to_curriculums(data)
+    if not isinstance(data, dict):
+        return {}, ["최상위는 step 객체 또는 작품 목록이어야 합니다."]
+    return {
+        step_key: {str(book_id): book for book_id, book in books.items()} if isinstance(books, dict) else books
+        for step_key, books in data.items()
+    }, []
+
+
+# ================================
+# 검증
+# ================================
+def validate(curriculums: Dict[str, Dict[str, Any]]) -> List[str]:
+    """
+    오류 메시지 목록 (비어 있으면 통과).
+    step 안의 id 는 1부터 빈 번호 없이 이어져야 합니다. (다음 작품 순서 계산 규칙)
+    """
+    errors = []
+    for step_key, books in curriculums.items():
+        if not step_key.startswith("step") or not step_key[4:].isdigit():
+            errors.append(f"{step_key}: step 이름은 step{{N}} 이어야 합니다.")
+            continue
+        if not isinstance(books, dict) or not books:
+            errors.append(f"{step_key}: 작품이 없습니다.")
+            continue
+
+        ids = []
+        for book_id, book in books.items():
+            where = f"{step_key}/{book_id}"
+            if not str(book_id).isdigit():
+                errors.append(f"{where}: id 는 숫자여야 합니다.")
+                continue
+            ids.append(int(book_id))
+
+            if not isinstance(book, dict):
+                errors.append(f"{where}: 작품 데이터가 객체가 아닙니다.")
+                continue
+            for field in REQUIRED_FIELDS:
+                if not book.get(field):
+                    errors.append(f"{where}: {field} 가 비어 있습니다.")
+            if not isinstance(book.get("contents", ""), str):
+                errors.append(f"{where}: contents 는 문자열이어야 합니다.")
+            questions = book.get("questions")
+            if questions and (
+                not isinstance(questions, list)
+                or not all(isinstance(q, str) and q.strip() for q in questions)
+            ):
+                errors.append(f"{where}: questions 는 비어 있지 않은 문자열 목록이어야 합니다.")
+
+        if ids and sorted(ids) != list(range(1, len(ids) + 1)):
+            errors.append(f"{step_key}: id 는 1부터 빈 번호 없이 이어져야 합니다. ({sorted(ids)})")
+
+    return errors + step_size_errors(curriculums)
+
+
+def step_size_errors(curriculums: Dict[str, Dict[str, Any]]) -> List[str]:
+    """
+    step 문서 크기 검사. 파생 필드(요약 등)를 채운 뒤 쓰기 직전에 다시 확인합니다.
+    """
+    errors = []
+    for step_key, books in curriculums.items():
+        size = len(json.dumps(books, ensure_ascii=False, default=str).encode("utf-8"))
+        if size > MAX_STEP_DOC_BYTES:
+            errors.append(f"{step_key}: 문서 크기 {size // 1024}KB 가 제한({MAX_STEP_DOC_BYTES // 1024}KB)을 넘습니다.")
+    return errors
+
+
+# ================================
+# 파생 데이터
+# ================================
+def _token_counter():
+    """
+    tiktoken 이 있으면 LLM 토큰 수, 없으면(또는 인코딩을 받을 수 없으면) 근사치
+    """
+    try:
+        import tiktoken
+
+        encoding = tiktoken.get_encoding(os.getenv("TOKEN_ENCODING", "o200k_base"))
+        return lambda text: len(encoding.encode(text))
+    except Exception as e:
+        print(f"[WARN] tiktoken 을 사용할 수 없어 토큰 수를 근사합니다: {e}")
+        return lambda text: len(text.encode("utf-8")) // 3
+
+
+def derive_book(book: dict, count_tokens, previous: Optional[dict] = None) -> Tuple[dict, List[str]]:
+    """
+    (파생 필드를 채운 책, 구절 목록). 본문이 같으면 기존 기준 요약(gold_summary)을 유지합니다.
+    """
+    book = {k: v for k, v in book.items() if k not in DERIVED_FIELDS}
+    contents = book["contents"]
+    digest = content_hash(contents)
+    passages = split_passages(contents)
+
+    book.update({
+        "content_hash": digest,
+        "char_count": len(contents),
+        "token_count": count_tokens(contents),
+        "passage_count": len(passages),
+        "question_count": len(book["questions"]),
+    })
+    if previous and previous.get("gold_summary") and previous.get("gold_summary_hash") == digest:
+        book["gold_summary"] = previous["gold_summary"]
+        book["gold_summary_hash"] = digest
+
+    return book, passages
+
+
+def _add_summaries(curriculums: Dict[str, Dict[str, Any]], llm) -> int:
+    from app.services.report_service import ReportService
+
+    report_service = ReportService()
+    created = 0
+    for step_key, books in curriculums.items():
+        for book_id, book in books.items():
+            if book.get("gold_summary"):
+                continue
+            try:
+                book["gold_summary"] = report_service.generate_gold_summary(
+                    llm, book.get("title", ""), book.get("author", ""), book["contents"]
+                )
+                book["gold_summary_hash"] = book["content_hash"]
+                created += 1
+            except Exception as e:
+                print(f"[ERROR] 기준 요약 생성 실패 {step_key}/{book_id}: {e}")
+    return created
+
+
+# ================================
+# 적재
+# ================================
+def _next_version(current) -> int:
+    try:
+        return int(current) + 1
+    except (TypeError, ValueError):
+        return 1
+
+
+def _commit_in_batches(operations):
+    batch, pending, size = db.batch(), 0, 0
+    for op, ref, data in operations:
+        data_size = len(json.dumps(data, ensure_ascii=False, default=str).encode("utf-8"))
+        if pending and (pending >= BATCH_SIZE or size + data_size > BATCH_MAX_BYTES):
+            batch.commit()
+            batch, pending, size = db.batch(), 0, 0
+
+        if op == "set":
+            batch.set(ref, data)
+        else:
+            batch.delete(ref)
+        pending += 1
+        size += data_size
+    if pending:
+        batch.commit()
+
+
+def ingest(
+    curriculums: Dict[str, Dict[str, Any]],
+    dry_run: bool = False,
+    replace: bool = False,
+    llm=None,
+    source: str = "",
+) -> dict:
+    """
+    curriculums 의 step 문서를 덮어씁니다. (replace 면 입력에 없는 step 은 삭제)
+    덮어쓰거나 삭제한 step 에서 빠진 책의 구절 문서도 함께 지웁니다.
+    구절은 curriculum_passages/step{N}_{id}, 다음 작품 순서는 curriculum_meta/order 에 저장하고,
+    모든 쓰기가 끝난 뒤 같은 batch 에서 order 와 version 을 올립니다.
+    llm 이 있으면 기준 요약이 없는 책의 요약도 미리 만듭니다.
+    """
+    started = time.perf_counter()
+    errors = validate(curriculums)
+    if errors:
+        return {"ok": False, "errors": errors}
+
+    collection = db.collection("curriculums")
+    existing = {doc.id: doc.to_dict() or {} for doc in collection.stream()}
+
+    count_tokens = _token_counter()
+    derived, passages = {}, {}
+    for step_key, books in curriculums.items():
+        derived[step_key] = {}
+        for book_id, book in books.items():
+            previous = existing.get(step_key, {}).get(book_id)
+            derived[step_key][book_id], passages[(step_key, book_id)] = derive_book(book, count_tokens, previous)
+
+    summaries = _add_summaries(derived, llm) if llm is not None else 0
+
+    errors = step_size_errors(derived)
+    if errors:
+        return {"ok": False, "errors": errors}
+
+    merged = {} if replace else dict(existing)
+    merged.update(derived)
+    next_map = build_next_item_map(merged)
+    removed = sorted(set(existing) - set(derived)) if replace else []
+
+    # 덮어쓴 step 에서 빠진 책, 삭제하는 step 의 책의 구절 문서 (step{N}_{id})
+    passage_collection = db.collection(CURRICULUM_PASSAGE_COLLECTION)
+    kept_passages = {f"{step_key}_{book_id}" for step_key, books in derived.items() for book_id in books}
+    stale_prefixes = tuple(f"{step_key}_" for step_key in [*derived, *removed])
+    stale_passages = sorted(
+        ref.id for ref in passage_collection.list_documents(page_size=500)
+        if ref.id.startswith(stale_prefixes) and ref.id not in kept_passages
+    )
+
+    report = {
+        "ok": True,
+        "dry_run": dry_run,
+        "steps": len(derived),
+        "books": sum(len(books) for books in derived.values()),
+        "removed_steps": removed,
+        "removed_passages": len(stale_passages),
+        "tokens": sum(b["token_count"] for books in derived.values() for b in books.values()),
+        "passages": sum(len(p) for p in passages.values()),
+        "summaries_created": summaries,
+    }
+    if dry_run:
+        report["elapsed_ms"] = int((time.perf_counter() - started) * 1000)
+        return report
+
+    operations = [
+        ("set", passage_collection.document(f"{step_key}_{book_id}"), {
+            "content_hash": derived[step_key][book_id]["content_hash"],
+            "passage_chars": PASSAGE_CHARS,
+            "passages": book_passages,
+        })
+        for (step_key, book_id), book_passages in passages.items()
+    ]
+    operations += [("set", collection.document(step_key), books) for step_key, books in derived.items()]
+    operations += [("delete", collection.document(step_key), None) for step_key in removed]
+    operations += [("delete", passage_collection.document(doc_id), None) for doc_id in stale_passages]
+    _commit_in_batches(operations)
+
+    meta = db.collection(CURRICULUM_META_COLLECTION)
+    version_snap = meta.document(CURRICULUM_VERSION_DOC).get()
+    version = _next_version(version_snap.to_dict().get("version") if version_snap.exists else None)
+    now = datetime.now(timezone.utc)
+
+    batch = db.batch()
+    batch.set(meta.document(CURRICULUM_ORDER_DOC), {
+        "version": version,
+        "next": {key: list(value) if value else None for key, value in next_map.items()},
+        "updated_at": now,
+    })
+    batch.set(meta.document(CURRICULUM_VERSION_DOC), {
+        "version": version,
+        "updated_at": now,
+        "source": os.path.basename(source),
+    })
+    batch.commit()
+
+    invalidation.publish("curriculum:")
+
+    report["version"] = version
+    report["elapsed_ms"] = int((time.perf_counter() - started) * 1000)
+    return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="커리큘럼 JSON/CSV 를 검증하고 적재합니다.")
+    parser.add_argument("path")
+    parser.add_argument("--dry-run", action="store_true", help="검증/계산만 하고 쓰지 않음")
+    parser.add_argument("--replace", action="store_true", help="입력에 없는 step 문서와 그 구절 문서 삭제")
+    parser.add_argument("--summaries", action="store_true", help="기준 줄거리 요약을 LLM 으로 미리 생성")
+    args = parser.parse_args(argv)
+
+    llm = None
+    if args.summaries and not args.dry_run:
+        from app.main import _create_llm
+
+        llm = _create_llm()
+
+    curriculums, load_errors = load_source(args.path)
+    if load_errors:
+        result = {"ok": False, "errors": load_errors + validate(curriculums)}
+    else:
+        result = ingest(curriculums, dry_run=args.dry_run, replace=args.replace, llm=llm, source=args.path)
+    print(json.dumps(result, ensure_ascii=False, indent=2))
+    return 0 if result["ok"] else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
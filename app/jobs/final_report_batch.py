@@ -0,0 +1,217 @@
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime, timezone
+from typing import List, Optional
+
+from app.core.database import db
+from app.jobs import job_lease
+
+JOB_COLLECTION = "batch_jobs"
+JOB_TYPE = "final_report"
+DEFAULT_MAX_CONCURRENCY = 4
+MAX_CONCURRENCY_LIMIT = 16
+# 작업 조회 시 함께 보여 줄 실패 항목 수
+FAILURE_PREVIEW = 50
+WRITE_BATCH_SIZE = 400
+
+
+def _job_ref(job_id: str):
+    return db.collection(JOB_COLLECTION).document(job_id)
+
+
+def _targets_ref(job_id: str):
+    """
+    batch_jobs/{job_id}/targets/{user_uuid} : 대상 학생
+    """
+    return _job_ref(job_id).collection("targets")
+
+
+def _items_ref(job_id: str):
+    """
+    batch_jobs/{job_id}/items/{user_uuid}_{chat_id} : 항목별 결과 (status: succeeded | failed)
+    """
+    return _job_ref(job_id).collection("items")
+
+
+def _item_key(user_uuid: str, chat_id: str) -> str:
+    return f"{user_uuid}/{chat_id}"
+
+
+def _list_student_uuids() -> List[str]:
+    docs = db.collection("users").where("role", "==", "학생").select([]).stream()
+    return [doc.id for doc in docs]
+
+
+def find_pending_chats(user_uuids: List[str], completed: set = frozenset()):
+    """
+    book_report 는 있고 final_report 는 없는 채팅 목록 [(user_uuid, chat_id)]
+    보고서 존재 여부는 사용자별 get_all 한 번으로 확인합니다.
+    """
+    pending = []
+
+    for user_uuid in user_uuids:
+        chats_ref = db.collection("users").document(user_uuid).collection("chats")
+        chat_docs = list(chats_ref.select([]).stream())
+        if not chat_docs:
+            continue
+
+        refs = []
+        for chat_doc in chat_docs:
+            refs.append(chat_doc.reference.collection("book_report").document("data"))
+            refs.append(chat_doc.reference.collection("final_report").document("data"))
+
+        existing = {snap.reference.path for snap in db.get_all(refs, field_paths=[]) if snap.exists}
+
+        for chat_doc in chat_docs:
+            has_book = chat_doc.reference.collection("book_report").document("data").path in existing
+            has_final = chat_doc.reference.collection("final_report").document("data").path in existing
+            if has_book and not has_final and _item_key(user_uuid, chat_doc.id) not in completed:
+                pending.append((user_uuid, chat_doc.id))
+
+    return pending
+
+
+def create_job(
+    requested_by: str,
+    user_uuids: Optional[List[str]] = None,
+    max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+) -> str:
+    """
+    배치 작업 문서를 만들고 job_id 를 반환합니다. 실제 평가는 run_job 에서 수행합니다.
+    user_uuids 가 없으면 모든 학생이 대상입니다. 대상 목록은 문서 크기 제한을 피해 targets 하위 컬렉션에 둡니다.
+    """
+    job_id = str(uuid.uuid4())
+    user_uuids = user_uuids or _list_student_uuids()
+
+    targets = _targets_ref(job_id)
+    for i in range(0, len(user_uuids), WRITE_BATCH_SIZE):
+        batch = db.batch()
+        for user_uuid in user_uuids[i:i + WRITE_BATCH_SIZE]:
+            batch.set(targets.document(user_uuid), {"user_uuid": user_uuid})
+        batch.commit()
+
+    _job_ref(job_id).set({
+        "type": JOB_TYPE,
+        "status": "pending",
+        "requested_by": requested_by,
+        "total_users": len(user_uuids),
+        "max_concurrency": max(1, min(max_concurrency, MAX_CONCURRENCY_LIMIT)),
+        "total": 0,
+        "succeeded": 0,
+        "failed": 0,
+        "created_at": datetime.now(timezone.utc),
+    })
+    return job_id
+
+
+def get_job(job_id: str):
+    snap = _job_ref(job_id).get()
+    if not snap.exists:
+        return None
+
+    job = snap.to_dict()
+    job.pop("lease_token", None)
+    job["job_id"] = job_id
+    job["running"] = job_lease.is_running(job)
+    job["failures"] = [
+        doc.to_dict()
+        for doc in _items_ref(job_id).where("status", "==", "failed").limit(FAILURE_PREVIEW).stream()
+    ]
+    return job
+
+
+def claim_job(job_id: str) -> Optional[str]:
+    """
+    실행 권한(lease) 선점. 다른 실행이 살아 있으면 None (heartbeat 가 끊긴 작업은 다시 선점 가능)
+    """
+    return job_lease.claim(_job_ref(job_id))
+
+
+def _completed_items(job_id: str) -> set:
+    docs = _items_ref(job_id).where("status", "==", "succeeded").select(["user_uuid", "chat_id"]).stream()
+    return {_item_key(d.get("user_uuid"), d.get("chat_id")) for d in docs}
+
+
+def run_job(job_id: str, llm, report_service, lease_token: Optional[str] = None):
+    """
+    배치 평가 실행(재개 포함). 이미 완료된 항목은 건너뛰고,
+    항목별 결과를 즉시 items 하위 컬렉션에 기록해 중단되더라도 이어서 실행할 수 있습니다.
+    책별 기준 요약은 report_service 의 gold_summary 캐시로 한 번만 생성됩니다.
+    lease_token 이 없으면 직접 선점하며, 어떤 경우에도 종료 상태를 기록합니다.
+    """
+    from google.cloud.firestore_v1 import Increment
+
+    job_ref = _job_ref(job_id)
+    token = lease_token or claim_job(job_id)
+    if token is None:
+        print(f"[ERROR] 배치 작업을 실행할 수 없음 (없거나 실행 중): {job_id}")
+        return
+
+    started = time.perf_counter()
+    succeeded = failed = 0
+    final_status = "failed"
+    error = None
+
+    try:
+        with job_lease.Heartbeat(job_ref, token) as heartbeat:
+            job = job_ref.get().to_dict()
+            user_uuids = [doc.id for doc in _targets_ref(job_id).select([]).stream()]
+            completed = _completed_items(job_id)
+            pending = find_pending_chats(user_uuids, completed)
+
+            # 실패 항목은 completed 에 없으므로 재개 시 다시 시도됨
+            job_ref.update({
+                "total": len(completed) + len(pending),
+                "succeeded": len(completed),
+                "failed": 0,
+            })
+            print(f"[BATCH] {job_id}: {len(pending)}건 평가 시작 (완료 {len(completed)}건)")
+
+            def evaluate(user_uuid: str, chat_id: str):
+                if heartbeat.lost:
+                    raise RuntimeError("작업 lease 를 잃어 중단합니다.")
+                report_service.create_final_report(llm=llm, user_uuid=user_uuid, chat_id=chat_id)
+
+            with ThreadPoolExecutor(max_workers=job.get("max_concurrency", DEFAULT_MAX_CONCURRENCY)) as executor:
+                futures = {
+                    executor.submit(evaluate, user_uuid, chat_id): (user_uuid, chat_id)
+                    for user_uuid, chat_id in pending
+                }
+
+                for future in as_completed(futures):
+                    user_uuid, chat_id = futures[future]
+                    item = {"user_uuid": user_uuid, "chat_id": chat_id, "updated_at": datetime.now(timezone.utc)}
+                    try:
+                        future.result()
+                        succeeded += 1
+                        _items_ref(job_id).document(f"{user_uuid}_{chat_id}").set({**item, "status": "succeeded"})
+                        job_ref.update({"succeeded": Increment(1)})
+                    except Exception as e:
+                        failed += 1
+                        print(f"[ERROR] 최종 보고서 배치 실패 {user_uuid}/{chat_id}: {e}")
+                        _items_ref(job_id).document(f"{user_uuid}_{chat_id}").set(
+                            {**item, "status": "failed", "error": str(e)}
+                        )
+                        job_ref.update({"failed": Increment(1)})
+
+            if heartbeat.lost:
+                final_status = "interrupted"
+            else:
+                final_status = "completed" if failed == 0 else "completed_with_errors"
+    except Exception as e:
+        error = str(e)
+        print(f"[ERROR] 배치 작업 실패 {job_id}: {e}")
+    finally:
+        elapsed = time.perf_counter() - started
+        try:
+            job_lease.release(job_ref, token, {
+                "status": final_status,
+                "error": error,
+                "finished_at": datetime.now(timezone.utc),
+                "elapsed_sec": round(elapsed, 2),
+                "throughput_per_min": round(succeeded / elapsed * 60, 2) if elapsed > 0 else None,
+            })
+        except Exception as e:
+            print(f"[ERROR] 배치 작업 상태 기록 실패 {job_id}: {e}")
+        print(f"[BATCH] {job_id}: {final_status}, 성공 {succeeded}건, 실패 {failed}건, {elapsed:.1f}s")
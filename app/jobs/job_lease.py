@@ -0,0 +1,110 @@
+import os
+import threading
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+
+from app.core.database import db
+
+# 실행 중 작업의 heartbeat 간격 / 이 시간 동안 heartbeat 가 없으면 멈춘 작업으로 보고 재개 허용
+JOB_HEARTBEAT_INTERVAL = float(os.getenv("JOB_HEARTBEAT_INTERVAL", "30"))
+JOB_LEASE_TTL = float(os.getenv("JOB_LEASE_TTL", "120"))
+
+
+def is_running(job: dict, now: Optional[datetime] = None) -> bool:
+    """
+    status 가 running 이고 heartbeat 가 JOB_LEASE_TTL 안에 있으면 True
+    (프로세스가 죽어 running 으로 남은 작업은 False)
+    """
+    if job.get("status") != "running":
+        return False
+    heartbeat_at = job.get("heartbeat_at")
+    if heartbeat_at is None:
+        return False
+    now = now or datetime.now(timezone.utc)
+    return now - heartbeat_at < timedelta(seconds=JOB_LEASE_TTL)
+
+
+def claim(job_ref) -> Optional[str]:
+    """
+    트랜잭션으로 작업을 선점하고 lease token 을 반환합니다.
+    문서가 없거나 다른 실행이 살아 있으면 None
+    """
+    from google.cloud.firestore_v1 import transactional
+
+    token = uuid.uuid4().hex
+
+    @transactional
+    def claim_in_transaction(transaction):
+        snap = job_ref.get(transaction=transaction)
+        if not snap.exists or is_running(snap.to_dict()):
+            return None
+        now = datetime.now(timezone.utc)
+        transaction.update(job_ref, {
+            "status": "running",
+            "lease_token": token,
+            "heartbeat_at": now,
+            "started_at": now,
+        })
+        return token
+
+    return claim_in_transaction(db.transaction())
+
+
+def release(job_ref, token: str, fields: dict) -> bool:
+    """
+    lease 를 가진 실행만 종료 상태(fields)를 기록합니다. 이미 다른 실행이 가져갔으면 False
+    """
+    from google.cloud.firestore_v1 import transactional
+
+    @transactional
+    def release_in_transaction(transaction):
+        snap = job_ref.get(field_paths=["lease_token"], transaction=transaction)
+        if not snap.exists or snap.to_dict().get("lease_token") != token:
+            return False
+        transaction.update(job_ref, {**fields, "lease_token": None, "heartbeat_at": None})
+        return True
+
+    return release_in_transaction(db.transaction())
+
+
+class Heartbeat(threading.Thread):
+    """
+    실행 중 heartbeat_at 을 주기적으로 갱신합니다.
+    lease 를 다른 실행에 빼앗기면 lost 가 True 가 되며, 작업 루프는 이를 보고 멈춥니다.
+    """
+    def __init__(self, job_ref, token: str, interval: float = JOB_HEARTBEAT_INTERVAL):
+        super().__init__(name="job-heartbeat", daemon=True)
+        self.job_ref = job_ref
+        self.token = token
+        self.interval = interval
+        self.lost = False
+        self._stop_event = threading.Event()
+
+    def run(self):
+        from google.cloud.firestore_v1 import transactional
+
+        @transactional
+        def beat(transaction):
+            snap = self.job_ref.get(field_paths=["lease_token"], transaction=transaction)
+            if not snap.exists or snap.to_dict().get("lease_token") != self.token:
+                return False
+            transaction.update(self.job_ref, {"heartbeat_at": datetime.now(timezone.utc)})
+            return True
+
+        while not self._stop_event.wait(self.interval):
+            try:
+                if not beat(db.transaction()):
+                    self.lost = True
+                    print(f"[WARN] 작업 lease 를 잃었습니다: {self.job_ref.id}")
+                    return
+            except Exception as e:
+                print(f"[WARN] 작업 heartbeat 실패 ({self.job_ref.id}): {e}")
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop_event.set()
+        self.join()
@@ -0,0 +1,81 @@
+import time
+from collections import defaultdict
+from datetime import datetime, timezone
+
+from app.core.database import db
+from app.services import score_stats_service
+from app.services.dashboard_service import SCORE_FIELDS
+
+
+def _iter_final_reports():
+    """
+    모든 사용자의 최종 보고서를 (user_uuid, chat_id, step, idx, final_report) 로 생성합니다.
+    채팅은 진행 필드만, 보고서는 점수 필드만 읽습니다. (사용자별 get_all 한 번)
+    """
+    for user_doc in db.collection("users").select([]).stream():
+        chat_docs = list(
+            user_doc.reference.collection("chats")
+            .select(["current_step", "current_id"])
+            .stream()
+        )
+        if not chat_docs:
+            continue
+
+        refs = [doc.reference.collection("final_report").document("data") for doc in chat_docs]
+        reports = {
+            snap.reference.path: snap.to_dict()
+            for snap in db.get_all(refs, field_paths=["title", *SCORE_FIELDS])
+            if snap.exists
+        }
+
+        for chat_doc, ref in zip(chat_docs, refs):
+            report = reports.get(ref.path)
+            chat = chat_doc.to_dict()
+            step, idx = chat.get("current_step"), chat.get("current_id")
+            if report is None or step is None or idx is None:
+                continue
+            yield user_doc.id, chat_doc.id, step, idx, report
+
+
+def run_backfill() -> dict:
+    """
+    기존 최종 보고서 전체로 책별 점수 집계를 처음부터 다시 만듭니다.
+    합계는 shard 0 에 쓰고 나머지 shard 는 비우며, 채팅별 반영 내역(contributions)도 덮어쓰므로
+    여러 번 실행해도 결과가 같습니다.
+    실행 중 새로 저장되는 보고서는 덮어써질 수 있으니 사용량이 적을 때 실행합니다.
+    """
+    started = time.perf_counter()
+    books = defaultdict(lambda: {"title": "", "fields": {}})
+    contributions = []
+
+    for user_uuid, chat_id, step, idx, report in _iter_final_reports():
+        scores = score_stats_service.scores_of(report)
+        book = books[(step, idx)]
+        book["title"] = report.get("title", book["title"])
+        score_stats_service.merge_fields(book["fields"], score_stats_service.score_delta({}, scores))
+        contributions.append((step, idx, user_uuid, chat_id, scores))
+
+    now = datetime.now(timezone.utc)
+    writer = db.bulk_writer()
+    for (step, idx), book in books.items():
+        writer.set(score_stats_service.stats_ref(step, idx), {
+            "step": step,
+            "id": idx,
+            "title": book["title"],
+            "created_at": now,
+        })
+        for shard in range(score_stats_service.SCORE_STATS_SHARDS):
+            writer.set(score_stats_service.shard_ref(step, idx, shard), {
+                "fields": book["fields"] if shard == 0 else {},
+                "updated_at": now,
+            })
+    for step, idx, user_uuid, chat_id, scores in contributions:
+        writer.set(
+            score_stats_service.contribution_ref(step, idx, user_uuid, chat_id),
+            {"scores": scores, "updated_at": now},
+        )
+    writer.close()
+
+    elapsed = time.perf_counter() - started
+    print(f"[BACKFILL] 책별 점수 집계: 책 {len(books)}권, 보고서 {len(contributions)}건, {elapsed:.1f}s")
+    return {"books": len(books), "reports": len(contributions), "elapsed_sec": round(elapsed, 2)}
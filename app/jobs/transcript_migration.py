@@ -0,0 +1,40 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from app.core.database import db
+from app.services import transcript_service
+
+DEFAULT_MAX_WORKERS = 8
+
+
+def _migrate_user(user_uuid: str) -> dict:
+    counts = {"chats": 0, "migrated_messages": 0, "failures": 0}
+    for chat_doc in db.collection("users").document(user_uuid).collection("chats").select([]).stream():
+        counts["chats"] += 1
+        for channel in transcript_service.CHANNELS:
+            try:
+                counts["migrated_messages"] += transcript_service.migrate_chat(user_uuid, chat_doc.id, channel)
+            except Exception as e:
+                counts["failures"] += 1
+                print(f"[ERROR] 대화 기록 이전 실패 {user_uuid}/{chat_doc.id}/{channel}: {e}")
+    return counts
+
+
+def run_migration(max_workers: int = DEFAULT_MAX_WORKERS) -> dict:
+    """
+    모든 채팅의 메시지 문서를 chunk 형식으로 옮깁니다.
+    이미 옮긴 채팅은 meta 문서 확인 1회로 건너뛰므로 여러 번 실행해도 됩니다.
+    (메시지 저장 시에도 같은 트랜잭션에서 옮기므로, 이 작업은 오래된 채팅 정리용)
+    """
+    started = time.perf_counter()
+    user_uuids = [doc.id for doc in db.collection("users").select([]).stream()]
+
+    totals = {"users": len(user_uuids), "chats": 0, "migrated_messages": 0, "failures": 0}
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        for counts in executor.map(_migrate_user, user_uuids):
+            for key, value in counts.items():
+                totals[key] += value
+
+    totals["elapsed_sec"] = round(time.perf_counter() - started, 2)
+    print(f"[MIGRATION] 대화 기록 chunk 이전: {totals}")
+    return totals
@@ -1,32 +1,108 @@
 import os
+import time
+from contextlib import asynccontextmanager, contextmanager
 from fastapi import FastAPI, Request
 from fastapi.responses import JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
 from fastapi.openapi.utils import get_openapi
-from langchain_openai import ChatOpenAI
+from starlette.concurrency import run_in_threadpool
 
-from app.services.chat_service import FirebaseChatService
-from app.services.report_service import ReportService
-from app.services.book_service import BookService
-from app.api import (auth, user, chat, report, book)
+from app.api import (auth, user, chat, report, book, admin, parent, export)
 from app.config.errors import *
+from app.config.settings import env_flag
+from app.core.database import init_db, warm_db, start_health_checks, stop_health_checks, db_pool_stats
+from app.core.cache import configure_l2, cache_stats
+from app.core import degradation, profiling, invalidation
+from app.core.responses import FastJSONResponse
+
+
+@contextmanager
+def _phase(timings: dict, name: str):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings[name] = round((time.perf_counter() - start) * 1000, 1)
+        print(f"[STARTUP] {name}: {timings[name]}ms")
+
+
+def _create_llm():
+    from langchain_openai import ChatOpenAI
+
+    return ChatOpenAI(
+        model=os.getenv("OPENAI_API_MODEL", "gpt-4o-mini"),
+        api_key=os.getenv("OPENAI_API_KEY")
+    )
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    클라이언트/서비스 초기화와 워밍업을 기동 단계에서 한 번만 수행합니다.
+    무거운 모듈(langchain, firebase_admin)도 이 시점에 임포트합니다.
+    """
+    app.state.ready = False
+    timings = {}
+    app.state.startup_timings = timings
+
+    with _phase(timings, "firestore_init"):
+        await run_in_threadpool(init_db)
+
+    with _phase(timings, "cache_l2_init"):
+        configure_l2()
+
+    with _phase(timings, "llm_init"):
+        # 부하 테스트용: LLM_CASSETTE 가 있으면 녹화/재생 LLM 으로 대체
+        cassette_path = os.getenv("LLM_CASSETTE")
+        if cassette_path:
+            from app.core.llm_cassette import cassette_from_env
+
+            app.state.llm = cassette_from_env(cassette_path, _create_llm)
+            print(f"[STARTUP] LLM cassette: {cassette_path} ({os.getenv('LLM_CASSETTE_MODE', 'replay')})")
+        else:
+            app.state.llm = _create_llm()
+
+    with _phase(timings, "services_init"):
+        from app.services.chat_service import FirebaseChatService
+        from app.services.report_service import ReportService
+        from app.services.book_service import BookService
+
+        app.state.chat_service = FirebaseChatService()
+        app.state.report_service = ReportService()
+        app.state.book_service = BookService()
+
+    with _phase(timings, "invalidation_bus"):
+        await run_in_threadpool(invalidation.start)
+
+    if env_flag("WARMUP_FIRESTORE", True):
+        with _phase(timings, "firestore_warmup"):
+            await run_in_threadpool(warm_db)
+    start_health_checks()
+
+    if env_flag("WARMUP_CURRICULUM_CACHE"):
+        with _phase(timings, "curriculum_warmup"):
+            await run_in_threadpool(app.state.book_service.warm_cache)
+
+    app.state.ready = True
+    print(f"[STARTUP] ready in {sum(timings.values())}ms")
+
+    yield
+
+    app.state.ready = False
+    invalidation.stop()
+    stop_health_checks()
+
 
 # FastAPI 앱 생성
 app = FastAPI(
     title="nexture",
     version="1.0.0",
     description="A simple FastAPI example with clean structure.",
+    lifespan=lifespan,
+    default_response_class=FastJSONResponse,
 )
 
-# 
-app.state.llm = ChatOpenAI(
-    model=os.getenv("OPENAI_API_MODEL", "gpt-4o-mini"),
-    api_key=os.getenv("OPENAI_API_KEY")
-)
-app.state.chat_service = FirebaseChatService()
-app.state.report_service = ReportService()
-app.state.book_service = BookService()
-
 # CORS 설정 
 app.add_middleware(
     CORSMiddleware,
@@ -42,17 +118,50 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# 응답 압축 (작은 응답은 그대로)
+app.add_middleware(GZipMiddleware, minimum_size=1000)
+
+# 요청 프로파일링 (PROFILE_TOKEN / PROFILE_SAMPLE_RATE 설정 시에만 등록)
+if profiling.enabled():
+    app.add_middleware(profiling.ProfilingMiddleware)
+
 # 라우터 등록
 app.include_router(auth.router)
 app.include_router(user.router)
 app.include_router(chat.router)
 app.include_router(book.router)
 app.include_router(report.router)
+app.include_router(admin.router)
+app.include_router(parent.router)
+app.include_router(export.router)
 
 @app.get("/api/healthz")
 def health_check():
     return {"status": "ok"}
 
+# readiness probe: lifespan 초기화/워밍업이 끝나야 200
+@app.get("/api/readyz")
+def readiness_check(request: Request):
+    if not getattr(request.app.state, "ready", False):
+        return JSONResponse(status_code=503, content={"status": "starting"})
+    return {"status": "ready", "startup_ms": request.app.state.startup_timings}
+
+@app.get("/api/metrics/cache")
+def cache_metrics():
+    return cache_stats()
+
+@app.get("/api/metrics/invalidation")
+def invalidation_metrics():
+    return invalidation.stats()
+
+@app.get("/api/metrics/firestore")
+def firestore_metrics():
+    return db_pool_stats()
+
+@app.get("/api/metrics/degradation")
+def degradation_metrics():
+    return degradation.stats()
+
 def custom_openapi():
     if app.openapi_schema:
         return app.openapi_schema
@@ -92,6 +201,10 @@ app.add_exception_handler(FinalReportNotFoundError, make_handler(404, "최종 
 app.add_exception_handler(CurriculumNotFoundError, make_handler(500, "커리큘럼 데이터가 없습니다."))
 app.add_exception_handler(InvalidChatStateError, make_handler(400, "잘못된 토론 상태입니다."))
 app.add_exception_handler(LLMRetryFailedError, make_handler(500, "LLM 재시도 실패"))
+app.add_exception_handler(InvalidCursorError, make_handler(400, "잘못된 커서입니다."))
+app.add_exception_handler(IdempotencyConflictError, make_handler(409, "같은 요청을 처리하고 있습니다."))
+app.add_exception_handler(IdempotencyKeyReusedError, make_handler(422, "Idempotency-Key 를 다시 사용할 수 없습니다."))
+app.add_exception_handler(InvalidIdempotencyKeyError, make_handler(400, "Idempotency-Key 형식이 올바르지 않습니다."))
 
 if __name__ == "__main__":
     import uvicorn
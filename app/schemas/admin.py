@@ -0,0 +1,11 @@
+from pydantic import BaseModel, Field
+from typing import List, Literal, Optional
+
+class FinalReportBatchRequest(BaseModel):
+    user_uuids: Optional[List[str]] = None
+    max_concurrency: int = Field(4, ge=1, le=16)
+
+class PurgeInactiveRequest(BaseModel):
+    inactive_days: int = Field(365, ge=30)
+    role: Optional[Literal["학생", "학부모", "관리자"]] = None
+    dry_run: bool = True
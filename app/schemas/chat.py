@@ -1,4 +1,7 @@
 from pydantic import BaseModel
+from typing import Optional, List
+from datetime import datetime
+from app.schemas.book import Book
 
 class ChatCreateRequest(BaseModel):
     step_id: str
@@ -11,4 +14,47 @@ class BookReportRequest(BaseModel):
     subject: str
     summary: str
     book_review: str
-    debate_review: str
\ No newline at end of file
+    debate_review: str
+
+# =================================================
+# response
+# =================================================
+
+class ChatCreateResponse(BaseModel):
+    chat_id: str
+    book_data: Book
+    message: str
+
+class ChatReplyResponse(BaseModel):
+    reply: str
+
+class ChatSummary(BaseModel):
+    chat_id: str
+    created_at: Optional[datetime] = None
+    title: str = ""
+    current_step: Optional[int] = None
+    current_id: Optional[int] = None
+    current_question_index: Optional[int] = None
+    has_book_report: bool = False
+    has_final_report: bool = False
+
+class ChatListResponse(BaseModel):
+    chats: List[ChatSummary]
+    next_cursor: Optional[str] = None
+
+class ChatMessage(BaseModel):
+    messageId: str
+    role: str
+    content: str
+    timestamp: Optional[datetime] = None
+
+class ChatDetail(BaseModel):
+    title: Optional[str] = None
+    author: Optional[str] = None
+    step: Optional[int] = None
+    step_idx: Optional[int] = None
+    chat_messages: List[ChatMessage]
+    next_since: Optional[str] = None
+
+class ChatDetailResponse(BaseModel):
+    chat: ChatDetail
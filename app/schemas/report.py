@@ -0,0 +1,86 @@
+from pydantic import BaseModel
+from typing import Optional, List, Union
+from datetime import datetime
+
+# LLM 평가 점수 (보통 1~5 정수)
+Score = Optional[Union[int, float, str]]
+
+class FinalReport(BaseModel):
+    title: str = ""
+    author: str = ""
+    subject: str = ""
+    summary: str = ""
+    summary_accuracy: Score = None
+    expression: Score = None
+    logical_thinking: Score = None
+    manner: Score = None
+    reason: str = ""
+    created_at: Optional[datetime] = None
+
+class FinalReportCreateResponse(BaseModel):
+    final_report: FinalReport
+    chat_id: str
+    message: str
+
+class FinalReportItem(BaseModel):
+    chat_id: str
+    title: str = ""
+    author: str = ""
+    summary_accuracy: Score = None
+    expression: Score = None
+    logical_thinking: Score = None
+    manner: Score = None
+    reason: Optional[str] = None
+    created_at: Optional[datetime] = None
+
+class FinalReportListResponse(BaseModel):
+    final_reports: List[FinalReportItem]
+    next_cursor: Optional[str] = None
+
+class FinalReportDetail(BaseModel):
+    title: str = ""
+    author: str = ""
+    subject: str = ""
+    gold_summary: str = ""
+    students_summary: str = ""
+    summary_accuracy: Score = None
+    expression: Score = None
+    logical_thinking: Score = None
+    manner: Score = None
+    reason: str = ""
+    created_at: Optional[datetime] = None
+
+class FinalReportDetailResponse(BaseModel):
+    final_report: FinalReportDetail
+
+class BookReportItem(BaseModel):
+    chat_id: str
+    subject: str = ""
+    book_review: str = ""
+    debate_review: str = ""
+    summary: Optional[str] = None
+    created_at: Optional[datetime] = None
+
+class BookReportListResponse(BaseModel):
+    book_reports: List[BookReportItem]
+    next_cursor: Optional[str] = None
+
+class BookReportDetail(BaseModel):
+    title: str = ""
+    author: str = ""
+    subject: str = ""
+    summary: str = ""
+    book_review: str = ""
+    debate_review: str = ""
+    created_at: Optional[datetime] = None
+
+class BookReportDetailResponse(BaseModel):
+    book_report: BookReportDetail
+
+class TotalReport(BaseModel):
+    pros: str = ""
+    cons: str = ""
+    reports: List[FinalReport] = []
+
+class TotalReportResponse(BaseModel):
+    total_report: Optional[TotalReport] = None
@@ -1,18 +1,159 @@
 from app.core.database import db
-from typing import Dict, Any, List, Literal
+from typing import Dict, Any, List, Literal, Optional, Tuple
+import hashlib
+import os
+import threading
 import time
 from datetime import datetime, timezone
 import json
 from app.config.errors import *
+from app.core.cache import get_cache
+from app.core import invalidation
+from app.core import responses
+from app.utils.retrieval import PASSAGE_CHARS
 from langchain_core.messages import HumanMessage, AIMessage
 from ast import literal_eval
 
 
+CURRICULUM_META_COLLECTION = "curriculum_meta"
+CURRICULUM_VERSION_DOC = "version"
+# 커리큘럼 적재(app.jobs.curriculum_ingest) 시 미리 계산해 두는 데이터
+CURRICULUM_ORDER_DOC = "order"
+CURRICULUM_PASSAGE_COLLECTION = "curriculum_passages"
+
+# version 이 키에 포함된 항목은 내용이 바뀌지 않으므로 길게 보관
+VERSIONED_TTL = 24 * 60 * 60
+
+
+def _curriculum_cache():
+    return get_cache("curriculum", ttl=float(os.getenv("CURRICULUM_CACHE_TTL", "300")))
+
+
+def load_curriculum_step(step) -> Optional[Dict[str, Any]]:
+    """
+    curriculums/step{N} 문서를 캐시를 거쳐 읽습니다. 문서가 없으면 None
+    """
+    def load():
+        snap = db.collection("curriculums").document(f"step{step}").get()
+        return snap.to_dict() if snap.exists else None
+
+    return _curriculum_cache().get_or_load(f"step{step}", load)
+
+
+def _item_key(step, book_id) -> str:
+    return f"{step}:{book_id}"
+
+
+def build_next_item_map(curriculums: Dict[str, Any]) -> Dict[str, Optional[Tuple[int, int]]]:
+    """
+    (step, id) -> 다음 (step, id) 매핑을 미리 계산합니다.
+    같은 step 에 id + 1 이 있으면 그 작품, 없으면 다음 step 의 1번, 그것도 없으면 None
+    """
+    steps = {}
+    for step_key, step_data in curriculums.items():
+        if not step_key.startswith("step") or not step_key[4:].isdigit():
+            continue
+        steps[int(step_key[4:])] = {
+            int(book_id) for book_id in (step_data or {}) if str(book_id).isdigit()
+        }
+
+    next_map = {}
+    for step, book_ids in steps.items():
+        for book_id in book_ids:
+            if book_id + 1 in book_ids:
+                next_map[_item_key(step, book_id)] = (step, book_id + 1)
+            elif 1 in steps.get(step + 1, ()):
+                next_map[_item_key(step, book_id)] = (step + 1, 1)
+            else:
+                next_map[_item_key(step, book_id)] = None
+
+    return next_map
+
+
+def load_next_item_map() -> Dict[str, Optional[Tuple[int, int]]]:
+    """
+    적재 시 저장한 curriculum_meta/order 를 사용하고, 없거나 version 이 다르면
+    (콘솔에서 직접 고친 경우) 전체 커리큘럼으로 계산합니다.
+    """
+    def load():
+        meta = db.collection(CURRICULUM_META_COLLECTION)
+        snaps = {
+            snap.id: snap
+            for snap in db.get_all([meta.document(CURRICULUM_ORDER_DOC), meta.document(CURRICULUM_VERSION_DOC)])
+        }
+        order_snap, version_snap = snaps[CURRICULUM_ORDER_DOC], snaps[CURRICULUM_VERSION_DOC]
+
+        if order_snap.exists and version_snap.exists:
+            order = order_snap.to_dict()
+            if order.get("version") == version_snap.to_dict().get("version"):
+                return {key: tuple(value) if value else None for key, value in order.get("next", {}).items()}
+
+        curriculums = {doc.id: doc.to_dict() for doc in db.collection("curriculums").stream()}
+        return build_next_item_map(curriculums)
+
+    return _curriculum_cache().get_or_load("next_item_map", load)
+
+
+def load_curriculum_version():
+    """
+    curriculum_meta/version 의 version 값 (없으면 None). 커리큘럼 캐시와 함께 무효화됩니다.
+    """
+    def load():
+        snap = db.collection(CURRICULUM_META_COLLECTION).document(CURRICULUM_VERSION_DOC).get()
+        return snap.to_dict().get("version") if snap.exists else None
+
+    return _curriculum_cache().get_or_load("version", load)
+
+
+def load_book_passages(step, book_id, digest: str) -> Optional[List[str]]:
+    """
+    적재 시 나눠 둔 본문 구절. 본문 해시나 구절 길이 설정이 다르면 None
+    """
+    snap = db.collection(CURRICULUM_PASSAGE_COLLECTION).document(f"step{step}_{book_id}").get()
+    if not snap.exists:
+        return None
+    data = snap.to_dict()
+    if data.get("content_hash") != digest or data.get("passage_chars") != PASSAGE_CHARS:
+        return None
+    return data.get("passages")
+
+
+def get_next_item(step: int, book_id: int) -> Optional[Tuple[int, int]]:
+    """
+    커리큘럼 순서상 다음 작품. 마지막 작품이면 None
+    """
+    next_map = load_next_item_map()
+    key = _item_key(step, book_id)
+    if key not in next_map:
+        raise CurriculumNotFoundError(f"step{step} 커리큘럼에서 {book_id} 데이터를 찾을 수 없습니다")
+    return next_map[key]
+
+
 class BookService:
+    def __init__(self, cache_ttl: float = None, version_check_interval: float = None):
+        if cache_ttl is None:
+            cache_ttl = float(os.getenv("CURRICULUM_CACHE_TTL", "300"))
+        if version_check_interval is None:
+            version_check_interval = float(os.getenv("CURRICULUM_VERSION_CHECK_INTERVAL", "30"))
+        self._cache_ttl = cache_ttl
+        self._version_check_interval = version_check_interval
+        self._curriculums = None
+        self._version = None
+        self._loaded_at = 0.0
+        self._checked_at = 0.0
+        self._cache = _curriculum_cache()
+        self._lock = threading.Lock()
+        # 다른 레플리카/콘솔에서 커리큘럼이 바뀌면 즉시 다시 읽도록 (다른 레플리카의 이벤트는 L1 만 비움)
+        invalidation.subscribe(
+            "curriculum:",
+            lambda _: self._drop(),
+            on_remote=lambda _: self._drop(l1_only=True),
+        )
+
     # ==========================================
-    # 1) 모든 커리큘럼(step1 ~ n, 각 index까지) 불러오기
+    # 0) 커리큘럼 캐시
     # ==========================================
-    def load_all_curriculums(self) -> Dict[str, Any]:
+    def _fetch_all_curriculums(self) -> Dict[str, Any]:
         ref = db.collection("curriculums")
         docs = ref.stream()
 
@@ -24,6 +165,115 @@ class BookService:
             all_curriculums[step_key] = step_data
 
         return all_curriculums
+
+    @staticmethod
+    def _fetch_version():
+        """
+        curriculum_meta/version 문서의 version 값 (없으면 None)
+        """
+        snap = db.collection(CURRICULUM_META_COLLECTION).document(CURRICULUM_VERSION_DOC).get()
+        if not snap.exists:
+            return None
+        version = snap.to_dict().get("version")
+        return None if version is None else str(version)
+
+    @staticmethod
+    def _content_version(curriculums: Dict[str, Any]) -> str:
+        raw = json.dumps(curriculums, ensure_ascii=False, sort_keys=True, default=str)
+        return "h" + hashlib.sha256(raw.encode("utf-8")).hexdigest()[:16]
+
+    def _reload(self, version=None):
+        """
+        version 이 있으면 워커 간 공유 캐시(all:{version})에서, 없으면 TTL 캐시(all)에서 가져옵니다.
+        """
+        if version is not None:
+            self._curriculums = self._cache.get_or_load(
+                f"all:{version}", self._fetch_all_curriculums, ttl=VERSIONED_TTL
+            )
+        else:
+            self._curriculums = self._cache.get_or_load(
+                "all", self._fetch_all_curriculums, ttl=self._cache_ttl
+            )
+        self._version = version or self._content_version(self._curriculums)
+        self._loaded_at = self._checked_at = time.monotonic()
+
+    def _ensure_fresh(self):
+        """
+        version 문서가 있으면 주기적으로 version만 확인하고, 바뀌었을 때만 전체를 다시 읽습니다.
+        version 문서가 없으면 TTL 기준으로 다시 읽습니다.
+        """
+        now = time.monotonic()
+        if self._curriculums is not None and now - self._checked_at < self._version_check_interval:
+            return
+
+        version = self._fetch_version()
+        self._checked_at = now
+
+        if self._curriculums is None:
+            self._reload(version)
+        elif version is not None:
+            if version != self._version:
+                self._reload(version)
+        elif now - self._loaded_at > self._cache_ttl:
+            self._reload()
+
+    def warm_cache(self):
+        """
+        기동 시 커리큘럼 전체를 미리 읽어 캐시에 올립니다.
+        """
+        with self._lock:
+            self._reload(self._fetch_version())
+
+    def _drop(self, l1_only: bool = False):
+        with self._lock:
+            self._curriculums = None
+            self._cache.delete_prefix("", l1_only=l1_only)
+
+    def invalidate_cache(self):
+        invalidation.publish("curriculum:")
+
+    def get_curriculum_version(self) -> str:
+        with self._lock:
+            self._ensure_fresh()
+            return self._version
+
+    # ==========================================
+    # 1) 모든 커리큘럼(step1 ~ n, 각 index까지) 불러오기
+    # ==========================================
+    def load_all_curriculums(self) -> Dict[str, Any]:
+        with self._lock:
+            self._ensure_fresh()
+            return self._curriculums
+
+    def get_curriculum_payload(self, fields: Optional[List[str]] = None) -> Tuple[str, bytes]:
+        """
+        /api/list/curriculum 응답 본문과 ETag를 반환합니다.
+        fields가 주어지면 각 작품에서 해당 필드만 남깁니다. 직렬화 결과는 version별로 캐시됩니다.
+        """
+        key = tuple(sorted(set(fields))) if fields else None
+        fields_tag = hashlib.sha1(",".join(key or ("*",)).encode("utf-8")).hexdigest()[:8]
+
+        with self._lock:
+            self._ensure_fresh()
+            curriculums, version = self._curriculums, self._version
+
+        def build():
+            projected = curriculums
+            if key is not None:
+                projected = {
+                    step_key: {
+                        book_id: {f: book[f] for f in key if f in book}
+                        if isinstance(book, dict) else book
+                        for book_id, book in (step_data or {}).items()
+                    }
+                    for step_key, step_data in curriculums.items()
+                }
+
+            body = responses.dumps({"curriculums": projected})
+
+            return f'"{version}-{fields_tag}"', body
+
+        return self._cache.get_or_load(f"payload:{version}:{fields_tag}", build, ttl=VERSIONED_TTL)
     
     # ==========================================
     # 2) final_report가 존재하는 모든 작품의 점수 반환
@@ -46,13 +296,11 @@ class BookService:
         current_id = chat_data.get("current_id")
 
         # 커리큘럼 문서 조회
-        curriculum_ref = db.collection("curriculums").document(f"step{current_step}")
-        curriculum_doc = curriculum_ref.get()
+        curriculum_data = load_curriculum_step(current_step)
 
-        if not curriculum_doc.exists:
+        if curriculum_data is None:
             raise ValueError("Curriculum step not found")
 
-        curriculum_data = curriculum_doc.to_dict()
         book_data = curriculum_data.get(str(current_id))
 
         if not book_data:
@@ -1,20 +1,74 @@
 from app.core.database import db
 from datetime import datetime, timezone
 from langchain_core.messages import HumanMessage, AIMessage
-from typing import Literal
+from typing import Literal, Optional, Tuple
 from ast import literal_eval
+import asyncio
+import hashlib
+import os
 import time
 import uuid
+from concurrent.futures import TimeoutError as FutureTimeout
+
+from google.api_core.exceptions import FailedPrecondition
+from google.cloud.firestore_v1 import transactional
 
 from app.config.errors import (
     ChatNotFoundError,
     CurriculumNotFoundError,
     InvalidChatStateError,
+    InvalidCursorError,
     LLMRetryFailedError,
 )
+from app.core.cache import get_cache, MISSING
+from app.core import degradation, invalidation
+from app.services import transcript_service
+from app.services.book_service import (
+    load_curriculum_step,
+    load_book_passages,
+    load_curriculum_version,
+    get_next_item,
+)
+from app.utils.common import paginate_query, doc_cursor, encode_cursor, decode_cursor
+from app.utils.retrieval import content_hash, relevant_passages
+
+DEBATE_END_MESSAGE = "오늘 질문은 모두 끝났어요. 이제 감상문을 작성해볼까요?"
+
+# 목록 조회 시 읽는 필드 (field mask)
+LIST_CHAT_FIELDS = [
+    "chat_id", "created_at", "title",
+    "current_step", "current_id", "current_question_index",
+]
+
+# 상태 전이 충돌(다른 요청/워커가 먼저 씀) 시 재시도 횟수
+STATE_WRITE_RETRIES = 3
+
+# 마감 후에도 진행 중인 공감 스트림 (GC 로 취소되지 않도록 참조 유지)
+_late_tasks = set()
 
 
 class FirebaseChatService:
+    def __init__(self):
+        # 채팅 진행 상태(current_step/current_id/current_question_index + update_time).
+        # 워커 간 공유되며 쓰기는 write-through 로 반영됩니다.
+        self._state_cache = get_cache(
+            "chat_state",
+            ttl=float(os.getenv("CHAT_STATE_CACHE_TTL", "3600")),
+            l1_size=int(os.getenv("CHAT_STATE_CACHE_SIZE", "10000")),
+        )
+        # 이전 대화 맥락 없이 들어온 도우미 질문의 답변 (책 + 질문 단위)
+        self._answer_cache = get_cache(
+            "assistant_answer",
+            ttl=float(os.getenv("ASSISTANT_ANSWER_CACHE_TTL", "86400")),
+        )
+
+        invalidation.bind_cache(self._state_cache, "user:", lambda user_uuid: f"{user_uuid}:")
+        # 답변 키는 step{N}:{id}:... 이므로 바뀐 step 의 답변만 지움
+        invalidation.bind_cache(self._answer_cache, "curriculum:", lambda step_doc: f"{step_doc}:")
+
+    @staticmethod
+    def _state_key(user_uuid: str, chat_id: str) -> str:
+        return f"{user_uuid}:{chat_id}"
 
     # ================================
     # Firestore Helper
@@ -25,6 +79,84 @@ class FirebaseChatService:
             .collection("chats").document(chat_id)
         )
     
+    def _get_state(self, user_uuid: str, chat_id: str, refresh: bool = False) -> dict:
+        """
+        채팅 진행 상태. 캐시에 없을 때만 채팅 문서를 읽습니다.
+        """
+        key = self._state_key(user_uuid, chat_id)
+        state = MISSING if refresh else self._state_cache.get(key)
+        if state is not MISSING:
+            return state
+
+        snap = self._get_chat_ref(user_uuid, chat_id).get()
+        if not snap.exists:
+            raise ChatNotFoundError("chat_id 없음")
+
+        chat_data = snap.to_dict()
+        state = {
+            "step": chat_data.get("current_step"),
+            "idx": chat_data.get("current_id"),
+            "q_index": chat_data.get("current_question_index"),
+            "update_time": snap.update_time,
+        }
+        self._state_cache.set(key, state)
+        return state
+
+    def _write_state(self, user_uuid: str, chat_id: str, state: dict, q_index) -> dict:
+        """
+        state 를 읽은 이후 문서가 바뀌지 않았을 때만 current_question_index 를 씁니다.
+        다른 쓰기가 먼저 반영됐으면 FailedPrecondition 이 발생합니다.
+        """
+        result = self._get_chat_ref(user_uuid, chat_id).update(
+            {"current_question_index": q_index},
+            option=db.write_option(last_update_time=state["update_time"]),
+        )
+        new_state = dict(state, q_index=q_index, update_time=result.update_time)
+        self._state_cache.set(self._state_key(user_uuid, chat_id), new_state)
+        return new_state
+
+    def _advance_question(self, user_uuid: str, chat_id: str, next_index_fn):
+        """
+        질문 인덱스를 낙관적 동시성으로 전진시킵니다.
+        동시에 들어온 두 메시지가 같은 q_index 를 읽어도 한쪽만 성공하고,
+        나머지는 최신 상태를 다시 읽어 재시도하므로 질문이 건너뛰거나 중복되지 않습니다.
+
+        :param next_index_fn: (step, idx, q_index) -> 다음 q_index
+        :return: (이전 state, 새 state)
+        """
+        refresh = False
+        for _ in range(STATE_WRITE_RETRIES):
+            state = self._get_state(user_uuid, chat_id, refresh=refresh)
+            if state["q_index"] is None:
+                raise InvalidChatStateError()
+
+            next_index = next_index_fn(state["step"], state["idx"], state["q_index"])
+            try:
+                return state, self._write_state(user_uuid, chat_id, state, next_index)
+            except FailedPrecondition:
+                refresh = True
+
+        raise InvalidChatStateError("동시에 처리 중인 메시지가 있습니다. 다시 시도해주세요.")
+
+    def _rollback_question(self, user_uuid: str, chat_id: str, prev_state: dict, new_state: dict):
+        """
+        답변 생성 실패 시 전진시킨 인덱스를 되돌립니다. (그 사이 다른 쓰기가 있었다면 포기)
+        """
+        try:
+            self._write_state(user_uuid, chat_id, new_state, prev_state["q_index"])
+        except FailedPrecondition:
+            self._state_cache.delete(self._state_key(user_uuid, chat_id))
+
+    @staticmethod
+    def _next_question_index(questions: list):
+        def next_index(step, idx, q_index):
+            if q_index == 0:
+                return 1
+            if q_index + 1 < len(questions):
+                return q_index + 1
+            return None
+        return next_index
+
     def _get_latest_chat(self, user_uuid: str):
         chats_ref = (
             db.collection("users")
@@ -40,97 +172,175 @@ class FirebaseChatService:
 
         return None
 
-    def _get_next_curriculum(self, current_step: int, current_id: int):
-        curriculum_ref = db.collection("curriculums").document(f"step{current_step}")
-        curriculum = curriculum_ref.get().to_dict()
-
-        if curriculum is None:
-            raise CurriculumNotFoundError(f"step{current_step} 커리큘럼 없음")
-
-        next_id = current_id + 1
-
-        # 같은 step에 다음 id가 있으면
-        if str(next_id) in curriculum:
-            return current_step, next_id
-
-        # 없으면 다음 step으로
-        next_step = current_step + 1
-        next_step_ref = db.collection("curriculums").document(f"step{next_step}")
-        next_curriculum = next_step_ref.get().to_dict()
-
-        if next_curriculum is None or "1" not in next_curriculum:
-            raise CurriculumNotFoundError("다음 커리큘럼이 존재하지 않습니다")
-
-        return next_step, 1
-
     @staticmethod
     def _save_message(user_uuid: str, chat_id: str, role: str, content: str):
-        ref = (
-            db.collection("users").document(user_uuid)
-            .collection("chats").document(chat_id)
-            .collection("messages").document()
-        )
-        ref.set({
-            "messageId": ref.id,
-            "role": role,
-            "content": content,
-            "timestamp": datetime.now(timezone.utc)
-        })
+        transcript_service.append_message(user_uuid, chat_id, "messages", role, content)
+
+    @staticmethod
+    def _save_messages(user_uuid: str, chat_id: str, entries):
+        """
+        (role, content) 여러 개를 트랜잭션 한 번으로 저장
+        """
+        transcript_service.append_messages(user_uuid, chat_id, "messages", entries)
 
     @staticmethod
     def _save_assistant_message(user_uuid: str, chat_id: str, role: str, content: str):
-        ref = (
-            db.collection("users").document(user_uuid)
-            .collection("chats").document(chat_id)
-            .collection("assistant").document()
-        )
-        ref.set({
-            "messageId": ref.id,
-            "role": role,
-            "content": content,
-            "timestamp": datetime.now(timezone.utc)
-        })
+        transcript_service.append_message(user_uuid, chat_id, "assistant", role, content)
 
     @staticmethod
     def _load_messages(user_uuid: str, chat_id: str):
-        ref = (
-            db.collection("users").document(user_uuid)
-            .collection("chats").document(chat_id)
-            .collection("messages")
-        )
-        docs = ref.order_by("timestamp").stream()
-
-        return [{"role": d.to_dict()["role"], "content": d.to_dict()["content"]} for d in docs]
+        messages = transcript_service.load_messages(user_uuid, chat_id, "messages")
+        return [{"role": m["role"], "content": m["content"]} for m in messages]
     
     @staticmethod
     def _load_assistant_messages(user_uuid: str, chat_id: str):
-        ref = (
-            db.collection("users").document(user_uuid)
-            .collection("chats").document(chat_id)
-            .collection("assistant")
-        )
-        docs = ref.order_by("timestamp").stream()
+        messages = transcript_service.load_messages(user_uuid, chat_id, "assistant")
+        return [{"role": m["role"], "content": m["content"]} for m in messages]
+
+    @staticmethod
+    def _load_messages_since(
+        user_uuid: str,
+        chat_id: str,
+        since_ts: Optional[datetime] = None,
+        since_id: Optional[str] = None,
+    ):
+        """
+        (since_ts, since_id) 이후 메시지만 (timestamp, messageId) 순으로 읽습니다.
+        새 메시지가 없으면 transcript meta 문서 1회로 끝납니다.
+        """
+        messages = transcript_service.load_messages(user_uuid, chat_id, "messages", since_ts, since_id)
+        return [
+            {
+                "messageId": m["messageId"],
+                "role": m["role"],
+                "content": m["content"],
+                "timestamp": m.get("timestamp"),
+            }
+            for m in messages
+        ]
+
+    @staticmethod
+    def _resolve_since(user_uuid: str, chat_id: str, since: str) -> Tuple[datetime, Optional[str]]:
+        """
+        since 커서를 (timestamp, messageId) 로 변환합니다.
+        - next_since 로 받은 커서 → (timestamp, messageId)
+        - messageId → 해당 메시지의 (timestamp, messageId)
+        - ISO timestamp → (timestamp, None) : 그 시각 초과 메시지만
+        """
+        try:
+            since_ts = datetime.fromisoformat(since)
+            if since_ts.tzinfo is None:
+                since_ts = since_ts.replace(tzinfo=timezone.utc)
+            return since_ts, None
+        except ValueError:
+            pass
+
+        try:
+            return decode_cursor(since)
+        except InvalidCursorError:
+            pass
 
-        return [{"role": d.to_dict()["role"], "content": d.to_dict()["content"]} for d in docs]
+        since_ts = transcript_service.find_message_timestamp(user_uuid, chat_id, "messages", since)
+        if since_ts is None:
+            raise InvalidCursorError("since 에 해당하는 메시지가 없습니다.")
 
+        return since_ts, since
 
     @staticmethod
     def _load_curriculum(step: int, index: int):
-        ref = db.collection("curriculums").document(f"step{step}").get()
+        curriculum = load_curriculum_step(step)
 
-        if not ref.exists:
+        if curriculum is None:
             raise CurriculumNotFoundError(f"step{step} 문서를 찾을 수 없습니다.")
 
-        data = ref.to_dict().get(str(index))
+        data = curriculum.get(str(index))
         if data is None:
             raise CurriculumNotFoundError(f"step{step}/{index} 데이터를 찾을 수 없습니다.")
 
         return {
             "title": data.get("title", ""),
             "contents": data.get("contents", ""),
-            "questions": data.get("questions", [])
+            "questions": data.get("questions", []),
+            "content_hash": data.get("content_hash"),
         }
 
+    @staticmethod
+    def _empathy_prompt(user_message: str) -> str:
+        return f"""
+        사용자가 이렇게 말했어요:
+        "{user_message}"
+        너무 길지 않게, 따뜻하고 자연스럽게 공감해주세요. 해요(~요, 비격식 존대)체를 써서 대답해주세요.
+        """
+
+    def _empathy_with_deadline(self, llm, user_uuid: str, chat_id: str, user_message: str) -> Optional[str]:
+        """
+        공감 답변을 마감 시간(EMPATHY_DEADLINE_MS)까지만 기다립니다.
+        넘기거나 실패하면 대체 문구(skip 모드면 None)를 반환하고, 늦게 온 답변은 설정에 따라 이어 붙입니다.
+        """
+        if not degradation.should_call_llm():
+            return degradation.fallback_phrase(user_message)
+
+        future = degradation.submit(llm.invoke, [HumanMessage(content=self._empathy_prompt(user_message))])
+        try:
+            text = future.result(timeout=degradation.EMPATHY_DEADLINE or None).content
+            if text.strip():
+                degradation.record("llm")
+                return text
+            degradation.record("error")
+        except FutureTimeout:
+            degradation.record("timeout")
+            if degradation.EMPATHY_LATE_APPEND:
+                future.add_done_callback(lambda f: self._append_late_empathy(user_uuid, chat_id, f))
+        except Exception as e:
+            degradation.record("error")
+            print(f"[WARN] 공감 답변 생성 실패, 대체 문구 사용: {e}")
+
+        return degradation.fallback_phrase(user_message)
+
+    def _append_late_empathy(self, user_uuid: str, chat_id: str, future):
+        try:
+            text = future.result().content
+            if not text.strip():
+                raise ValueError("빈 응답")
+            self._save_message(user_uuid, chat_id, "assistant", text)
+            degradation.record("late_appended")
+        except Exception as e:
+            degradation.record("late_dropped")
+            print(f"[WARN] 늦은 공감 답변 저장 실패: {e}")
+
+    def _finish_late_stream(self, user_uuid: str, chat_id: str, first, stream):
+        """
+        마감 후 남은 공감 스트림. EMPATHY_LATE_APPEND 면 끝까지 받아 저장하고, 아니면 취소합니다.
+        """
+        if not degradation.EMPATHY_LATE_APPEND:
+            first.cancel()
+            return
+
+        async def drain():
+            parts = []
+            try:
+                chunk = await first
+                while True:
+                    parts.append(chunk.content or "")
+                    chunk = await stream.__anext__()
+            except StopAsyncIteration:
+                pass
+            except Exception as e:
+                degradation.record("late_dropped")
+                print(f"[WARN] 늦은 공감 답변 수신 실패: {e}")
+                return
+
+            text = "".join(parts)
+            if not text.strip():
+                degradation.record("late_dropped")
+                return
+            await asyncio.to_thread(self._save_message, user_uuid, chat_id, "assistant", text)
+            degradation.record("late_appended")
+
+        task = asyncio.ensure_future(drain())
+        _late_tasks.add(task)
+        task.add_done_callback(_late_tasks.discard)
+
     @staticmethod
     def _llm_retry(llm, system_prompt: str, user_prompt: str, retries=3, delay=1):
 
@@ -157,27 +367,39 @@ class FirebaseChatService:
     # Public Methods
     # ================================
 
-    def create_chat(self, user_uuid: str):
-        latest_chat = self._get_latest_chat(user_uuid)
+    def _plan_chat(self, user_uuid: str, progress: Optional[dict]) -> dict:
+        """
+        progress 커서로 다음 채팅의 작품(step/id)과 그다음 작품을 정합니다.
+        커서가 마지막 작품에서 멈췄거나(next 없음) 이전 커리큘럼 version 으로 만들어졌으면
+        마지막 작품(last_step/last_id) 기준으로 다음 작품을 다시 계산합니다. (작품 추가 반영)
+        """
+        version = load_curriculum_version()
 
         # 시작 step/id 결정
-        if latest_chat is None:
-            current_step, current_id = 1, 1
+        if progress:
+            current_step, current_id = progress.get("next_step"), progress.get("next_id")
+            stale = current_step is None or progress.get("curriculum_version") != version
+            if stale and progress.get("last_step") is not None:
+                try:
+                    next_item = get_next_item(progress["last_step"], progress["last_id"])
+                    current_step, current_id = next_item if next_item else (None, None)
+                except CurriculumNotFoundError:
+                    # 마지막 작품이 커리큘럼에서 빠졌으면 저장된 커서를 그대로 사용
+                    pass
+            if current_step is None:
+                raise CurriculumNotFoundError("다음 커리큘럼이 존재하지 않습니다")
         else:
-            current_step = latest_chat["current_step"]
-            current_id = latest_chat["current_id"]
-            current_step, current_id = self._get_next_curriculum(current_step, current_id)
-
-        # chat 생성
-        chat_id = str(uuid.uuid4())
-        chat_ref = self._get_chat_ref(user_uuid, chat_id)
-
-        curriculum = (
-            db.collection("curriculums")
-            .document(f"step{current_step}")
-            .get()
-            .to_dict()
-        )
+            # progress 가 아직 없는 기존 사용자: 최근 채팅 기준으로 1회 계산
+            latest_chat = self._get_latest_chat(user_uuid)
+            if latest_chat is None:
+                current_step, current_id = 1, 1
+            else:
+                next_item = get_next_item(latest_chat["current_step"], latest_chat["current_id"])
+                if next_item is None:
+                    raise CurriculumNotFoundError("다음 커리큘럼이 존재하지 않습니다")
+                current_step, current_id = next_item
+
+        curriculum = load_curriculum_step(current_step)
 
         if curriculum is None:
             raise CurriculumNotFoundError(f"step{current_step} 커리큘럼을 찾을 수 없습니다")
@@ -187,21 +409,88 @@ class FirebaseChatService:
                 f"step{current_step} 커리큘럼에서 {current_id} 데이터를 찾을 수 없습니다"
             )
 
-        book_data = curriculum[str(current_id)] 
+        return {
+            "progress": progress,
+            "version": version,
+            "step": current_step,
+            "id": current_id,
+            "book_data": curriculum[str(current_id)],
+            "next_item": get_next_item(current_step, current_id),
+        }
 
-        chat_ref.set({
-            "chat_id": chat_id,
-            "title": book_data.get("title", ""),
-            "created_at": datetime.now(timezone.utc),
-            "current_step": current_step,
-            "current_id": current_id,
-            "current_question_index": 0
+    @staticmethod
+    def _read_progress(user_snap) -> Optional[dict]:
+        return (user_snap.to_dict() or {}).get("progress") if user_snap.exists else None
+
+    def prepare_chat(self, user_uuid: str) -> dict:
+        """
+        다음 채팅의 작품을 미리 정합니다. 읽기만 하므로 다른 작업(보고서 평가 등)과 겹쳐 실행하고,
+        결과를 commit_chat 에 넘깁니다.
+        """
+        user_snap = db.collection("users").document(user_uuid).get(field_paths=["progress"])
+        return self._plan_chat(user_uuid, self._read_progress(user_snap))
+
+    def commit_chat(self, user_uuid: str, plan: Optional[dict] = None):
+        """
+        채팅을 만들고 progress 커서를 같은 트랜잭션에서 전진시킵니다.
+        plan(prepare_chat 결과)을 만든 뒤 progress 가 바뀌었으면 트랜잭션 안에서 다시 정합니다.
+        """
+        user_ref = db.collection("users").document(user_uuid)
+        chat_id = str(uuid.uuid4())
+        chat_ref = self._get_chat_ref(user_uuid, chat_id)
+
+        @transactional
+        def create_in_transaction(transaction):
+            progress = self._read_progress(user_ref.get(field_paths=["progress"], transaction=transaction))
+            chat_plan = plan
+            if chat_plan is None or chat_plan["progress"] != progress:
+                chat_plan = self._plan_chat(user_uuid, progress)
+
+            book_data, next_item = chat_plan["book_data"], chat_plan["next_item"]
+
+            transaction.set(chat_ref, {
+                "chat_id": chat_id,
+                "title": book_data.get("title", ""),
+                "created_at": datetime.now(timezone.utc),
+                "current_step": chat_plan["step"],
+                "current_id": chat_plan["id"],
+                "current_question_index": 0
+            })
+            transaction.set(user_ref, {
+                "progress": {
+                    "last_step": chat_plan["step"],
+                    "last_id": chat_plan["id"],
+                    "next_step": next_item[0] if next_item else None,
+                    "next_id": next_item[1] if next_item else None,
+                    "curriculum_version": chat_plan["version"],
+                }
+            }, merge=True)
+
+            return chat_plan
+
+        transaction = db.transaction()
+        chat_plan = create_in_transaction(transaction)
+        book_data = chat_plan["book_data"]
+
+        # 커밋 시각이 채팅 문서의 update_time 이므로 첫 답변이 문서를 다시 읽지 않도록 상태 캐시를 채움
+        self._state_cache.set(self._state_key(user_uuid, chat_id), {
+            "step": chat_plan["step"],
+            "idx": chat_plan["id"],
+            "q_index": 0,
+            "update_time": transaction.commit_time,
         })
 
         return chat_id, {
             "title": book_data.get("title", ""),
             "contents": book_data.get("contents", "")
         }
+
+    def create_chat(self, user_uuid: str):
+        """
+        사용자 문서의 progress 커서(last/next step·id)를 읽어 다음 작품으로 채팅을 만들고,
+        커서를 같은 트랜잭션에서 전진시킵니다. 다음 작품은 미리 계산된 순서에서 찾습니다.
+        """
+        return self.commit_chat(user_uuid)
     
     def process_chat(self, llm, user_uuid: str, chat_id: str, user_message: str):
         """
@@ -215,89 +504,153 @@ class FirebaseChatService:
 
         FirebaseChatService._save_message(user_uuid, chat_id, "user", user_message)
 
-        chat_ref = self._get_chat_ref(user_uuid, chat_id)
-        chat_data = chat_ref.get().to_dict()
-
-        if chat_data is None:
-            raise ChatNotFoundError("chat_id 없음")
-
-        step, idx, q_index = (
-            chat_data.get("current_step"),
-            chat_data.get("current_id"),
-            chat_data.get("current_question_index"),
-        )
-
-        if q_index is None:
+        state = self._get_state(user_uuid, chat_id)
+        if state["q_index"] is None:
             raise InvalidChatStateError()
 
-        curriculum = self._load_curriculum(step, idx)
+        curriculum = self._load_curriculum(state["step"], state["idx"])
         questions = curriculum["questions"]
 
+        # 질문 인덱스를 먼저 확보 (동시 요청 시 한쪽은 재시도)
+        prev_state, new_state = self._advance_question(
+            user_uuid, chat_id, self._next_question_index(questions)
+        )
+        q_index = prev_state["q_index"]
+
         # 첫 질문
         if q_index == 0:
-            chat_ref.update({"current_question_index": 1})
             first_q = questions[0]
             self._save_message(user_uuid, chat_id, "assistant", first_q)
             return first_q
 
-        # 공감 생성
-        empathy_prompt = f"""
-        사용자가 이렇게 말했어요:
-        "{user_message}"
-        너무 길지 않게, 따뜻하고 자연스럽게 공감해주세요. 해요(~요, 비격식 존대)체를 써서 대답해주세요.
+        # 공감 생성 (마감 시간 초과/실패 시 대체 문구)
+        empathy_text = self._empathy_with_deadline(llm, user_uuid, chat_id, user_message)
+
+        # 다음 질문 존재? 없으면 마지막 질문 → 종료
+        if new_state["q_index"] is not None:
+            next_q = questions[new_state["q_index"]]
+        else:
+            next_q = DEBATE_END_MESSAGE
+
+        entries = [("assistant", empathy_text)] if empathy_text else []
+        self._save_messages(user_uuid, chat_id, entries + [("assistant", next_q)])
+
+        return degradation.join_reply(empathy_text, next_q)
+    
+    # ================================
+    # WebSocket 세션
+    # ================================
+    def open_session(self, user_uuid: str, chat_id: str) -> dict:
+        """
+        WebSocket 연결 시 1회만 채팅/커리큘럼을 읽어 세션 상태를 만듭니다.
+        질문 인덱스는 상태 캐시(_get_state)에서 가져오므로 턴마다 문서를 읽지 않습니다.
+        """
+        state = self._get_state(user_uuid, chat_id, refresh=True)
+        curriculum = self._load_curriculum(state["step"], state["idx"])
+
+        return {
+            "user_uuid": user_uuid,
+            "chat_id": chat_id,
+            "step": state["step"],
+            "idx": state["idx"],
+            "questions": curriculum["questions"],
+        }
+
+    async def stream_session_chat(self, llm, session: dict, user_message: str):
         """
+        세션 상태를 사용하는 토론 1턴. process_chat 과 같은 흐름이며
+        공감 답변은 토큰 단위로 흘려보냅니다.
+
+        yield {"type": "token", "content": ...} / {"type": "reply", "reply": ...}
+        """
+        user_uuid, chat_id = session["user_uuid"], session["chat_id"]
+        questions = session["questions"]
+
+        await asyncio.to_thread(self._save_message, user_uuid, chat_id, "user", user_message)
 
-        empathy_text = llm.invoke([HumanMessage(content=empathy_prompt)]).content
-        self._save_message(user_uuid, chat_id, "assistant", empathy_text)
+        prev_state, new_state = await asyncio.to_thread(
+            self._advance_question, user_uuid, chat_id, self._next_question_index(questions)
+        )
+        q_index = prev_state["q_index"]
+
+        # 첫 질문
+        if q_index == 0:
+            first_q = questions[0]
+            await asyncio.to_thread(self._save_message, user_uuid, chat_id, "assistant", first_q)
+            yield {"type": "reply", "reply": first_q}
+            return
+
+        # 공감 생성 (스트리밍). 첫 토큰이 마감 시간 안에 오지 않거나 실패하면 대체 문구
+        chunks = []
+        if degradation.should_call_llm():
+            stream = llm.astream([HumanMessage(content=self._empathy_prompt(user_message))]).__aiter__()
+            first = asyncio.ensure_future(stream.__anext__())
+            done, _ = await asyncio.wait({first}, timeout=degradation.EMPATHY_DEADLINE or None)
+
+            if not done:
+                degradation.record("timeout")
+                self._finish_late_stream(user_uuid, chat_id, first, stream)
+            else:
+                try:
+                    chunk = first.result()
+                    while True:
+                        if chunk.content:
+                            chunks.append(chunk.content)
+                            yield {"type": "token", "content": chunk.content}
+                        chunk = await stream.__anext__()
+                except StopAsyncIteration:
+                    pass
+                except Exception as e:
+                    # 이미 토큰을 보냈으면 대체할 수 없으므로 기존처럼 되돌림
+                    if chunks:
+                        await asyncio.to_thread(self._rollback_question, user_uuid, chat_id, prev_state, new_state)
+                        raise
+                    print(f"[WARN] 공감 답변 생성 실패, 대체 문구 사용: {e}")
+                degradation.record("llm" if chunks else "error")
+
+        empathy_text = "".join(chunks) or degradation.fallback_phrase(user_message)
+        if empathy_text and not chunks:
+            yield {"type": "token", "content": empathy_text}
 
         # 다음 질문 존재?
-        if q_index + 1 < len(questions):
-            next_q = questions[q_index + 1]
-            chat_ref.update({"current_question_index": q_index + 1})
-            self._save_message(user_uuid, chat_id, "assistant", next_q)
-            return empathy_text + "\n\n" + next_q
-
-        # 마지막 질문 → 종료
-        end_msg = "오늘 질문은 모두 끝났어요. 이제 감상문을 작성해볼까요?"
-        self._save_message(user_uuid, chat_id, "assistant", end_msg)
-
-        chat_ref.update({
-            "current_question_index": None
-        })
+        if new_state["q_index"] is not None:
+            next_q = questions[new_state["q_index"]]
+        else:
+            next_q = DEBATE_END_MESSAGE
 
-        return empathy_text + "\n\n" + end_msg
-    
-    def list_chats(self, user_uuid: str):
+        entries = [("assistant", empathy_text)] if empathy_text else []
+        await asyncio.to_thread(self._save_messages, user_uuid, chat_id, entries + [("assistant", next_q)])
+
+        yield {"type": "reply", "reply": degradation.join_reply(empathy_text, next_q)}
+
+    def list_chats(self, user_uuid: str, limit: int = 20, start_after: Optional[str] = None):
+        """
+        created_at 내림차순 채팅 목록 한 페이지
+
+        :param start_after: 이전 페이지의 next_cursor
+        :return: (chats, next_cursor)
+        """
         chats_ref = db.collection("users").document(user_uuid).collection("chats")
-        docs = chats_ref.order_by("created_at", direction="DESCENDING").stream()
+        query = chats_ref.select(LIST_CHAT_FIELDS)
+        docs, has_more = paginate_query(query, limit, start_after)
+
+        # 감상문/최종 보고서 존재 여부는 한 번의 batch get 으로 확인 (필드 없이 존재만)
+        report_refs = []
+        for doc in docs:
+            report_refs.append(doc.reference.collection("book_report").document("data"))
+            report_refs.append(doc.reference.collection("final_report").document("data"))
+
+        existing = {
+            snap.reference.path
+            for snap in db.get_all(report_refs, field_paths=[])
+            if snap.exists
+        } if report_refs else set()
 
         results = []
         for doc in docs:
             data = doc.to_dict()
             chat_ref = doc.reference
 
-            has_book_report = (
-                len(
-                    list(
-                        chat_ref
-                        .collection("book_report")
-                        .limit(1)
-                        .stream()
-                    )
-                ) > 0
-            )
-
-            has_final_report = (
-                len(
-                    list(
-                        chat_ref
-                        .collection("final_report")
-                        .limit(1)
-                        .stream()
-                    )
-                ) > 0
-            )
-
             results.append({
                 "chat_id": data["chat_id"],
                 "created_at": data["created_at"],
@@ -305,11 +658,12 @@ class FirebaseChatService:
                 "current_step": data["current_step"],
                 "current_id": data["current_id"],
                 "current_question_index": data["current_question_index"],
-                "has_book_report": has_book_report,
-                "has_final_report": has_final_report,
+                "has_book_report": chat_ref.collection("book_report").document("data").path in existing,
+                "has_final_report": chat_ref.collection("final_report").document("data").path in existing,
             })
 
-        return results
+        next_cursor = doc_cursor(docs[-1]) if has_more else None
+        return results, next_cursor
     
     def process_assistant_chat(self, llm, user_uuid: str, chat_id: str, user_message: str):
         """
@@ -323,24 +677,24 @@ class FirebaseChatService:
 
         FirebaseChatService._save_assistant_message(user_uuid, chat_id, "user", user_message)
 
-        chat_ref = self._get_chat_ref(user_uuid, chat_id)
-        chat_data = chat_ref.get().to_dict()
-
-        if chat_data is None:
-            raise ChatNotFoundError("chat_id 없음")
-
-        step, idx, q_index = (
-            chat_data.get("current_step"),
-            chat_data.get("current_id"),
-            chat_data.get("current_question_index"),
-        )
+        state = self._get_state(user_uuid, chat_id)
 
-        if q_index is None:
+        if state["q_index"] is None:
             raise InvalidChatStateError()
 
-        curriculum = self._load_curriculum(step, idx)
-        contents = curriculum["contents"]
-        messages = self.load_assistant_messages(user_uuid, chat_id)
+        curriculum = self._load_curriculum(state["step"], state["idx"])
+        messages = self._load_assistant_messages(user_uuid, chat_id)
+
+        # 책 전체 대신 질문과 관련된 구절만 프롬프트에 넣음 (적재 시 나눠 둔 구절이 있으면 사용)
+        load_passages = None
+        if curriculum["content_hash"]:
+            load_passages = lambda: load_book_passages(
+                state["step"], state["idx"], content_hash(curriculum["contents"])
+            )
+        contents = relevant_passages(
+            f"step{state['step']}_{state['idx']}", curriculum["contents"], user_message,
+            load_passages=load_passages,
+        )
 
         # 공감 생성
         empathy_prompt = f"""
@@ -353,45 +707,76 @@ class FirebaseChatService:
         너무 길지 않게, 따뜻하고 자연스럽게 답변해주세요. 해요(~요, 비격식 존대)체를 써서 대답해주세요.
         """
 
-        answer = llm.invoke([HumanMessage(content=empathy_prompt)]).content
+        def generate():
+            return llm.invoke([HumanMessage(content=empathy_prompt)]).content
+
+        if len(messages) > 2:
+            answer = generate()
+        else:
+            # 이전 맥락이 없으면 프롬프트가 책 + 질문으로만 정해지므로 답변을 공유
+            question = " ".join(user_message.split())
+            question_hash = hashlib.sha1(question.encode("utf-8")).hexdigest()
+            answer = self._answer_cache.get_or_load(
+                f"step{state['step']}:{state['idx']}:{question_hash}", generate
+            )
         self._save_assistant_message(user_uuid, chat_id, "assistant", answer)
 
         return answer
 
 
-    def get_chat_detail(self, user_uuid: str, chat_id: str):
+    def get_chat_detail(
+        self,
+        user_uuid: str,
+        chat_id: str,
+        since: Optional[str] = None,
+        include_meta: bool = True,
+    ):
         """
         채팅 1개에 대한 세부 정보
         
         :type user_uuid: str
         :type chat_id: str
+        :param since: 이전 응답의 next_since, 마지막으로 받은 messageId 또는 ISO timestamp. 이후 메시지만 반환
+        :param include_meta: False 면 채팅/커리큘럼 문서를 읽지 않고 메시지만 반환
         """
 
-        chat_ref = self._get_chat_ref(user_uuid, chat_id)
-        chat_data = chat_ref.get().to_dict()
-        if chat_data is None:
-            raise ChatNotFoundError()
-        step, idx = chat_data.get("current_step"), chat_data.get("current_id")
-        if step is None or idx is None:
-            raise InvalidChatStateError("토론이 종료되었거나 손상되었습니다.")
-        
-        # curriculum
-        curriculum_ref = db.collection("curriculums").document(f"step{step}").get()
-        if not curriculum_ref.exists:
-            raise CurriculumNotFoundError()
-        curriculum_data = curriculum_ref.to_dict().get(str(idx))
-        if curriculum_data is None:
-            raise CurriculumNotFoundError()
-        title, author = (
-            curriculum_data.get("title", ""),
-            curriculum_data.get("author", ""),
-        )
+        since_ts, since_id = self._resolve_since(user_uuid, chat_id, since) if since else (None, None)
+
+        result = {}
+        if include_meta:
+            state = self._get_state(user_uuid, chat_id)
+            step, idx = state["step"], state["idx"]
+            if step is None or idx is None:
+                raise InvalidChatStateError("토론이 종료되었거나 손상되었습니다.")
+            
+            # curriculum
+            curriculum = load_curriculum_step(step)
+            if curriculum is None:
+                raise CurriculumNotFoundError()
+            curriculum_data = curriculum.get(str(idx))
+            if curriculum_data is None:
+                raise CurriculumNotFoundError()
+            title, author = (
+                curriculum_data.get("title", ""),
+                curriculum_data.get("author", ""),
+            )
 
-        chat_messages = self.load_messages(user_uuid, chat_id)
-        return {
-            "title": title,
-            "author": author,
-            "step": step,
-            "step_idx": idx,
-            "chat_messages": chat_messages
-        }
\ No newline at end of file
+            result.update({
+                "title": title,
+                "author": author,
+                "step": step,
+                "step_idx": idx,
+            })
+
+        chat_messages = self._load_messages_since(user_uuid, chat_id, since_ts, since_id)
+
+        result["chat_messages"] = chat_messages
+        # 다음 폴링에 그대로 넘길 커서 ((timestamp, messageId) 라서 추가 조회 없이 해석되고 같은 시각 메시지도 놓치지 않음)
+        if chat_messages and chat_messages[-1]["timestamp"] is not None:
+            last = chat_messages[-1]
+            result["next_since"] = encode_cursor(last["timestamp"], last["messageId"])
+        elif since_ts is None:
+            result["next_since"] = None
+        else:
+            result["next_since"] = encode_cursor(since_ts, since_id) if since_id else since_ts.isoformat()
+        return result
@@ -0,0 +1,184 @@
+from app.core.database import db
+from datetime import datetime, timezone
+
+# 점수 추이로 보관하는 최근 최종 보고서 수
+SCORE_TREND_SIZE = 20
+
+SCORE_FIELDS = ("summary_accuracy", "expression", "logical_thinking", "manner")
+
+WRITE_BATCH_SIZE = 400
+
+
+def _dashboard_ref(user_uuid: str):
+    return (
+        db.collection("users").document(user_uuid)
+        .collection("dashboard").document("summary")
+    )
+
+
+def _completed_ref(user_uuid: str, chat_id: str):
+    """
+    완료 권수에 반영된 채팅 표시 (score_trend 는 최근 항목만 남으므로 별도로 기록)
+    """
+    return _dashboard_ref(user_uuid).collection("completed_chats").document(chat_id)
+
+
+def _trend_entry(chat_id: str, final_report: dict) -> dict:
+    entry = {
+        "chat_id": chat_id,
+        "title": final_report.get("title", ""),
+        "author": final_report.get("author", ""),
+        "created_at": final_report.get("created_at"),
+    }
+    for field in SCORE_FIELDS:
+        entry[field] = final_report.get(field)
+    return entry
+
+
+# ================================
+# 보고서 저장 시 증분 갱신
+# ================================
+def record_book_report(user_uuid: str, chat_id: str):
+    """
+    감상문 저장 → 마지막 활동 시각만 갱신
+    """
+    now = datetime.now(timezone.utc)
+    _dashboard_ref(user_uuid).set({
+        "last_activity": "book_report",
+        "last_activity_chat_id": chat_id,
+        "last_activity_at": now,
+        "updated_at": now,
+    }, merge=True)
+
+
+def record_final_report(user_uuid: str, chat_id: str, final_report: dict):
+    """
+    최종 보고서 저장 → 완료 권수/점수 추이/마지막 활동을 트랜잭션으로 갱신
+    같은 채팅의 보고서가 재생성되면 완료 권수는 그대로 두고 추이 항목만 교체합니다.
+    (이미 반영된 채팅인지는 completed_chats 표시로 판단)
+    """
+    from google.cloud.firestore_v1 import transactional
+
+    ref = _dashboard_ref(user_uuid)
+    completed_ref = _completed_ref(user_uuid, chat_id)
+
+    @transactional
+    def update(transaction):
+        snap, completed_snap = ref.get(transaction=transaction), completed_ref.get(transaction=transaction)
+        summary = snap.to_dict() if snap.exists else {}
+        is_new = not completed_snap.exists
+
+        trend = [e for e in summary.get("score_trend", []) if e.get("chat_id") != chat_id]
+        trend.append(_trend_entry(chat_id, final_report))
+        trend = trend[-SCORE_TREND_SIZE:]
+
+        now = datetime.now(timezone.utc)
+        if is_new:
+            transaction.set(completed_ref, {"completed_at": now})
+        transaction.set(ref, {
+            "books_completed": summary.get("books_completed", 0) + (1 if is_new else 0),
+            "score_trend": trend,
+            "last_activity": "final_report",
+            "last_activity_chat_id": chat_id,
+            "last_activity_at": now,
+            "updated_at": now,
+        }, merge=True)
+
+    update(db.transaction())
+
+
+def record_total_report(user_uuid: str, total_report: dict):
+    """
+    종합 보고서 생성 → 최신 장점/개선점 갱신
+    """
+    now = datetime.now(timezone.utc)
+    _dashboard_ref(user_uuid).set({
+        "latest_total_report": {
+            "pros": total_report.get("pros", ""),
+            "cons": total_report.get("cons", ""),
+            "updated_at": now,
+        },
+        "last_activity": "total_report",
+        "last_activity_at": now,
+        "updated_at": now,
+    }, merge=True)
+
+
+# ================================
+# 조회
+# ================================
+def rebuild_dashboard(user_uuid: str) -> dict:
+    """
+    기존 기록으로 요약 문서를 처음부터 다시 만듭니다. (요약 문서가 없거나 built 표시가 없는 사용자용, 1회)
+    완료 권수에 반영한 채팅 표시(completed_chats)도 함께 기록합니다.
+    """
+    user_ref = db.collection("users").document(user_uuid)
+    chat_docs = list(
+        user_ref.collection("chats")
+        .select(["created_at"])
+        .order_by("created_at")
+        .stream()
+    )
+
+    book_refs = [doc.reference.collection("book_report").document("data") for doc in chat_docs]
+    final_refs = [doc.reference.collection("final_report").document("data") for doc in chat_docs]
+    snaps = {
+        snap.reference.path: snap
+        for snap in db.get_all(book_refs + final_refs)
+        if snap.exists
+    } if chat_docs else {}
+
+    trend = []
+    last_activity, last_activity_at, last_chat_id = None, None, None
+    for chat_doc, book_ref, final_ref in zip(chat_docs, book_refs, final_refs):
+        for kind, ref in (("book_report", book_ref), ("final_report", final_ref)):
+            snap = snaps.get(ref.path)
+            if snap is None:
+                continue
+            data = snap.to_dict()
+            if kind == "final_report":
+                trend.append(_trend_entry(chat_doc.id, data))
+            created_at = data.get("created_at")
+            if created_at and (last_activity_at is None or created_at > last_activity_at):
+                last_activity, last_activity_at, last_chat_id = kind, created_at, chat_doc.id
+
+    summary = {
+        "built": True,
+        "books_completed": len(trend),
+        "score_trend": trend[-SCORE_TREND_SIZE:],
+        "last_activity": last_activity,
+        "last_activity_chat_id": last_chat_id,
+        "last_activity_at": last_activity_at,
+        "updated_at": datetime.now(timezone.utc),
+    }
+
+    total_snap = user_ref.collection("total_report").document("data").get()
+    if total_snap.exists:
+        total = total_snap.to_dict()
+        summary["latest_total_report"] = {
+            "pros": total.get("pros", ""),
+            "cons": total.get("cons", ""),
+            "updated_at": summary["updated_at"],
+        }
+
+    completed_ids = [entry["chat_id"] for entry in trend]
+    for i in range(0, len(completed_ids), WRITE_BATCH_SIZE):
+        batch = db.batch()
+        for chat_id in completed_ids[i:i + WRITE_BATCH_SIZE]:
+            batch.set(_completed_ref(user_uuid, chat_id), {"completed_at": summary["updated_at"]})
+        batch.commit()
+
+    _dashboard_ref(user_uuid).set(summary)
+    return summary
+
+
+def get_dashboard(user_uuid: str) -> dict:
+    """
+    학생 1명의 요약 문서 (문서 1회 조회).
+    없거나 증분 갱신만으로 생긴 문서(built 표시 없음)면 기존 기록으로 한 번 만들어 둡니다.
+    """
+    snap = _dashboard_ref(user_uuid).get()
+    summary = snap.to_dict() if snap.exists else None
+    if summary and summary.get("built"):
+        return summary
+    return rebuild_dashboard(user_uuid)
@@ -0,0 +1,95 @@
+from app.core.database import db
+from app.services import user_service, transcript_service
+from app.utils.common import paginate_query, doc_cursor
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+import json
+import zlib
+
+# 한 번에 읽는 채팅 수 / 미리 읽어 두는 채팅 수
+CHAT_PAGE_SIZE = 50
+DEFAULT_PREFETCH = 4
+
+
+def _json_default(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return str(value)
+
+
+def _to_line(record: dict) -> bytes:
+    return (json.dumps(record, ensure_ascii=False, default=_json_default) + "\n").encode("utf-8")
+
+
+def _iter_chat_docs(user_uuid: str):
+    """
+    채팅 문서를 최신순으로 페이지 단위로 읽습니다. (한 번에 CHAT_PAGE_SIZE 개만 메모리에 보관)
+    """
+    chats_ref = db.collection("users").document(user_uuid).collection("chats")
+    cursor = None
+    while True:
+        docs, has_more = paginate_query(chats_ref, CHAT_PAGE_SIZE, cursor)
+        yield from docs
+        if not has_more:
+            return
+        cursor = doc_cursor(docs[-1])
+
+
+def _load_chat_bundle(chat_doc) -> list:
+    """
+    채팅 1개와 하위 컬렉션(messages, assistant, book_report, final_report)을 레코드 목록으로
+    """
+    chat_id = chat_doc.id
+    chat_ref = chat_doc.reference
+    records = [{"type": "chat", "chat_id": chat_id, **chat_doc.to_dict()}]
+
+    for channel, record_type in (("messages", "message"), ("assistant", "assistant_message")):
+        for message in transcript_service.load_messages(chat_ref.parent.parent.id, chat_id, channel):
+            records.append({"type": record_type, "chat_id": chat_id, **message})
+
+    report_refs = [
+        chat_ref.collection("book_report").document("data"),
+        chat_ref.collection("final_report").document("data"),
+    ]
+    for snap in db.get_all(report_refs):
+        if snap.exists:
+            records.append({"type": snap.reference.parent.id, "chat_id": chat_id, **snap.to_dict()})
+
+    return records
+
+
+def iter_user_export(user_uuid: str, prefetch: int = DEFAULT_PREFETCH):
+    """
+    사용자 전체 기록을 NDJSON bytes 로 생성합니다. (채팅 1개 단위로 한 덩어리)
+    채팅은 최신순(created_at 내림차순, paginate_query 순서)으로 내보내되, 다음 prefetch 개 채팅의 하위 컬렉션을 미리 읽어
+    네트워크 대기를 겹칩니다. 메모리에는 prefetch 개 채팅만 유지됩니다.
+    """
+    profile = user_service.get_user_profile(user_uuid) or {}
+    yield _to_line({"type": "user", "user_uuid": user_uuid, **profile})
+
+    with ThreadPoolExecutor(max_workers=prefetch) as executor:
+        in_flight = deque()
+        for chat_doc in _iter_chat_docs(user_uuid):
+            in_flight.append(executor.submit(_load_chat_bundle, chat_doc))
+            if len(in_flight) > prefetch:
+                yield b"".join(_to_line(record) for record in in_flight.popleft().result())
+
+        while in_flight:
+            yield b"".join(_to_line(record) for record in in_flight.popleft().result())
+
+    total_snap = db.collection("users").document(user_uuid).collection("total_report").document("data").get()
+    if total_snap.exists:
+        yield _to_line({"type": "total_report", **total_snap.to_dict()})
+
+
+def gzip_stream(chunks):
+    """
+    bytes 스트림을 gzip 으로 압축하며 흘려보냅니다. 덩어리마다 sync flush 해서 바로 전송되게 합니다.
+    """
+    compressor = zlib.compressobj(wbits=31)
+    for chunk in chunks:
+        data = compressor.compress(chunk) + compressor.flush(zlib.Z_SYNC_FLUSH)
+        if data:
+            yield data
+    yield compressor.flush()
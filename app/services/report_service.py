@@ -1,14 +1,59 @@
 from app.core.database import db
-from typing import Dict, Any, List, Literal
+from typing import Dict, Any, List, Literal, Optional
+import os
 import time
+from concurrent.futures import ThreadPoolExecutor, wait
 from datetime import datetime, timezone
 import json
 from app.config.errors import *
 from langchain_core.messages import HumanMessage, AIMessage
 from ast import literal_eval
+from app.core.cache import get_cache
+from app.core import invalidation
+from app.services import dashboard_service, score_stats_service, transcript_service
+from app.services.book_service import load_curriculum_step
+from app.utils.common import paginate_query, doc_cursor
+from app.utils.retrieval import content_hash
+
+# 보고서 생성 중 LLM 호출과 겹쳐 실행하는 읽기/집계 작업용
+_prefetch_executor = ThreadPoolExecutor(
+    max_workers=int(os.getenv("REPORT_PREFETCH_WORKERS", "16")),
+    thread_name_prefix="report-prefetch",
+)
+
+# 목록 조회 시 읽는 필드 (field mask)
+LIST_FINAL_REPORT_FIELDS = [
+    "title", "author", "summary_accuracy", "expression",
+    "logical_thinking", "manner", "reason", "created_at",
+]
+LIST_BOOK_REPORT_FIELDS = ["subject", "book_review", "debate_review", "summary", "created_at"]
+
+# 보고서 목록 한 페이지를 채우기 위해 훑는 채팅 수 상한 (limit 배수)
+MAX_SCAN_FACTOR = 5
 
 
 class ReportService:
+    def __init__(self):
+        # 책별 기준 줄거리 요약 (모든 학생이 공유)
+        self._gold_summary_cache = get_cache(
+            "gold_summary",
+            ttl=float(os.getenv("GOLD_SUMMARY_CACHE_TTL", str(7 * 24 * 60 * 60))),
+        )
+        invalidation.bind_cache(self._gold_summary_cache, "curriculum:", lambda step_doc: f"{step_doc}:")
+
+        # 조회용 보고서 view ({user}:{chat}:{mode}). 저장 후 바뀌지 않으므로 길게 보관하고,
+        # 프로세스 내 L1 은 메모리(bytes) 기준 LRU 로 제한
+        self._view_cache = get_cache(
+            "report_view",
+            ttl=float(os.getenv("REPORT_VIEW_CACHE_TTL", str(7 * 24 * 60 * 60))),
+            l1_size=int(os.getenv("REPORT_VIEW_CACHE_SIZE", "100000")),
+            l1_max_bytes=int(os.getenv("REPORT_VIEW_CACHE_BYTES", str(64 * 1024 * 1024))),
+        )
+        invalidation.bind_cache(self._view_cache, "report_view:")
+        invalidation.bind_cache(self._view_cache, "user:", lambda user_uuid: f"{user_uuid}:")
+        # view 에 제목/저자가 들어가므로 커리큘럼이 바뀌면 전부 비움
+        invalidation.bind_cache(self._view_cache, "curriculum:", lambda _: "")
+
     # ==========================================
     # 0) helper 함수
     # ==========================================
@@ -38,6 +83,75 @@ class ReportService:
                     raise LLMRetryFailedError("LLM 호출이 3회 모두 실패했습니다.", str(e))
                 time.sleep(delay)
 
+    def _update_aggregates(self, record, *args):
+        """
+        학부모 대시보드 / 책별 점수 집계 갱신. 실패해도 보고서 저장은 성공으로 처리합니다.
+        """
+        try:
+            record(*args)
+        except Exception as e:
+            print(f"[ERROR] 집계 갱신 실패 ({record.__module__}.{record.__name__}): {e}")
+
+    # ---------- 보고서 view ----------
+    @staticmethod
+    def _view_key(user_uuid: str, chat_id: str, mode: str) -> str:
+        return f"{user_uuid}:{chat_id}:{mode}"
+
+    @staticmethod
+    def _book_report_view(title: str, author: str, book_report_doc: dict) -> dict:
+        return {
+            "title": title,
+            "author": author,
+            "subject": book_report_doc["subject"],
+            "summary": book_report_doc["summary"],
+            "book_review": book_report_doc["book_review"],
+            "debate_review": book_report_doc["debate_review"],
+            "created_at": book_report_doc["created_at"]
+        }
+
+    @staticmethod
+    def _final_report_view(title: str, author: str, book_report_doc: dict, final_report_doc: dict) -> dict:
+        return {
+            "title": title,
+            "author": author,
+            "subject": book_report_doc["subject"],
+            "gold_summary": final_report_doc["summary"],
+            "students_summary": book_report_doc["summary"],
+            "summary_accuracy": final_report_doc["summary_accuracy"],
+            "expression": final_report_doc["expression"],
+            "logical_thinking": final_report_doc["logical_thinking"],
+            "manner": final_report_doc["manner"],
+            "reason": final_report_doc["reason"],
+            "created_at": final_report_doc["created_at"]
+        }
+
+    @staticmethod
+    def _book_title_author(step, idx):
+        curriculum = load_curriculum_step(step)
+        if curriculum is None:
+            raise CurriculumNotFoundError()
+        curriculum_data = curriculum.get(str(idx))
+        if curriculum_data is None:
+            raise CurriculumNotFoundError()
+        return curriculum_data.get("title", ""), curriculum_data.get("author", "")
+
+    def _store_views(self, user_uuid: str, chat_id: str, title: str, author: str,
+                     book_report_doc: dict, final_report_doc: Optional[dict] = None):
+        """
+        보고서를 저장한 직후 view 를 채웁니다. 먼저 무효화 이벤트로 다른 레플리카의 이전 view 를 지웁니다.
+        (final_report_doc 이 없으면 최종 보고서 view 는 다음 조회 때 다시 만듦)
+        """
+        invalidation.publish(f"report_view:{user_uuid}:{chat_id}:")
+        self._view_cache.set(
+            self._view_key(user_uuid, chat_id, "book_report"),
+            self._book_report_view(title, author, book_report_doc),
+        )
+        if final_report_doc is not None:
+            self._view_cache.set(
+                self._view_key(user_uuid, chat_id, "final_report"),
+                self._final_report_view(title, author, book_report_doc, final_report_doc),
+            )
+
     def _final_reports_to_text(self, reports: list[dict]) -> str:
         lines = []
 
@@ -62,39 +176,77 @@ class ReportService:
 
         return "\n\n".join(lines)
     
-    def _load_messages(self, user_uuid: str, chat_id: str):
-        ref = (
-            db.collection("users").document(user_uuid)
-            .collection("chats").document(chat_id)
-            .collection("messages")
+    def generate_gold_summary(self, llm, title: str, author: str, contents: str) -> str:
+        summary_prompt_system = f"""
+        다음은 '{title}'라는 책의 정보입니다.
+        저자: {author}
+        내용: {contents}
+        """
+
+        summary_prompt_user = """
+        이 책의 줄거리를 간단하게 2단락 이내로 요약해 주세요.
+        해요체로 작성하고, '단락'이라는 단어를 넣지 마세요.
+        """
+        return self._llm_retry(llm, summary_prompt_system, summary_prompt_user)
+
+    def _get_gold_summary(self, llm, step, idx, book: dict) -> str:
+        """
+        책의 기준 줄거리 요약. 커리큘럼 적재 시 만들어 둔 요약이 있으면 그대로 쓰고,
+        없으면 같은 책당 학생/워커와 관계없이 한 번만 생성합니다.
+        """
+        title, author, contents = book.get("title", ""), book.get("author", ""), book.get("contents", "")
+        if book.get("gold_summary") and book.get("gold_summary_hash") == content_hash(contents):
+            return book["gold_summary"]
+
+        return self._gold_summary_cache.get_or_load(
+            f"step{step}:{idx}", lambda: self.generate_gold_summary(llm, title, author, contents)
         )
-        docs = ref.order_by("timestamp").stream()
 
-        return [{"role": d.to_dict()["role"], "content": d.to_dict()["content"]} for d in docs]
+    def _load_messages(self, user_uuid: str, chat_id: str):
+        messages = transcript_service.load_messages(user_uuid, chat_id, "messages")
+        return [{"role": m["role"], "content": m["content"]} for m in messages]
     
     
     # ================================
     # 감상문 저장
     # ================================
     def create_book_report(self, user_uuid: str, chat_id: str, subject: str, summary: str, book_review: str, debate_review: str):
-        ref = self._get_chat_ref(user_uuid, chat_id).collection("book_report").document("data")
-
-        ref.set({
+        chat_ref = self._get_chat_ref(user_uuid, chat_id)
+        book_report_doc = {
             "subject": subject,
             "summary": summary,
             "book_review": book_review,
             "debate_review": debate_review,
             "created_at": datetime.now(timezone.utc)
-        })
+        }
+
+        chat_ref.collection("book_report").document("data").set(book_report_doc)
+        self._update_aggregates(dashboard_service.record_book_report, user_uuid, chat_id)
+
+        try:
+            chat_data = chat_ref.get(field_paths=["current_step", "current_id"]).to_dict() or {}
+            title, author = self._book_title_author(chat_data.get("current_step"), chat_data.get("current_id"))
+            self._store_views(user_uuid, chat_id, title, author, book_report_doc)
+        except Exception as e:
+            # view 를 못 채워도 이전 view 는 지워 다음 조회 때 다시 읽도록
+            invalidation.publish(f"report_view:{user_uuid}:{chat_id}:")
+            print(f"[WARN] 감상문 view 캐시 갱신 실패 ({chat_id}): {e}")
         return True
 
     # ================================
     # 최종 보고서 생성
     # ================================
     def create_final_report(self, llm, user_uuid: str, chat_id: str):
-
+        """
+        대화 기록은 처음부터 따로 읽어 두고(요약 LLM 과 겹침), 채팅/감상문은 get_all 한 번으로 읽습니다.
+        평가 LLM 호출 전까지 기다리는 것은 요약 LLM 뿐입니다.
+        """
         chat_ref = self._get_chat_ref(user_uuid, chat_id)
-        chat_data = chat_ref.get().to_dict()
+        book_report_ref = chat_ref.collection("book_report").document("data")
+        messages_future = _prefetch_executor.submit(self._load_messages, user_uuid, chat_id)
+
+        snaps = {snap.reference.path: snap for snap in db.get_all([chat_ref, book_report_ref])}
+        chat_data = snaps[chat_ref.path].to_dict()
 
         if chat_data is None:
             raise ChatNotFoundError()
@@ -104,16 +256,16 @@ class ReportService:
             raise InvalidChatStateError("토론이 종료되었거나 손상되었습니다.")
 
         # book report
-        book_report_doc = chat_ref.collection("book_report").document("data").get().to_dict()
+        book_report_doc = snaps[book_report_ref.path].to_dict()
         if book_report_doc is None:
             raise BookReportNotFoundError()
 
         # curriculum
-        curriculum_ref = db.collection("curriculums").document(f"step{step}").get()
-        if not curriculum_ref.exists:
+        curriculum = load_curriculum_step(step)
+        if curriculum is None:
             raise CurriculumNotFoundError()
 
-        curriculum_data = curriculum_ref.to_dict().get(str(idx))
+        curriculum_data = curriculum.get(str(idx))
         if curriculum_data is None:
             raise CurriculumNotFoundError()
 
@@ -123,20 +275,9 @@ class ReportService:
             curriculum_data.get("contents", ""),
         )
 
-        messages = self._load_messages(user_uuid, chat_id)
-
-        # 줄거리 요약 LLM
-        summary_prompt_system = f"""
-        다음은 '{title}'라는 책의 정보입니다.
-        저자: {author}
-        내용: {contents}
-        """
-
-        summary_prompt_user = """
-        이 책의 줄거리를 간단하게 2단락 이내로 요약해 주세요.
-        해요체로 작성하고, '단락'이라는 단어를 넣지 마세요.
-        """
-        summary = self._llm_retry(llm, summary_prompt_system, summary_prompt_user)
+        # 줄거리 요약 LLM (책별 캐시)
+        summary = self._get_gold_summary(llm, step, idx, curriculum_data)
+        messages = messages_future.result()
 
         max_retries = 3 
         delay = 1 
@@ -205,39 +346,94 @@ class ReportService:
                 }
 
                 chat_ref.collection("final_report").document("data").set(final_report)
-                return final_report
+                break
             except Exception as e:
                 if attempt == max_retries:
                     raise LLMRetryFailedError("LLM 호출이 3회 모두 실패했습니다.: ", str(e))
                 time.sleep(delay)
-    # ==========================================
-    # 2) final_report가 존재하는 모든 작품의 점수 반환
-    # ==========================================
-    def list_all_final_reports(self, user_uuid: str) -> List[Dict[str, Any]]:
+
+        # 저장 이후 단계는 재평가(LLM 재호출)로 이어지지 않도록 재시도 루프 밖에서 처리
+        try:
+            self._store_views(user_uuid, chat_id, title, author, book_report_doc, final_report)
+        except Exception as e:
+            invalidation.publish(f"report_view:{user_uuid}:{chat_id}:")
+            print(f"[WARN] 최종 보고서 view 캐시 갱신 실패 ({chat_id}): {e}")
+
+        # 두 집계는 서로 다른 문서이므로 동시에 갱신
+        wait([
+            _prefetch_executor.submit(
+                self._update_aggregates, dashboard_service.record_final_report,
+                user_uuid, chat_id, final_report,
+            ),
+            _prefetch_executor.submit(
+                self._update_aggregates, score_stats_service.record_final_report,
+                user_uuid, chat_id, step, idx, final_report,
+            ),
+        ])
+        return final_report
+
+    def _page_chats_with_report(
+        self,
+        user_uuid: str,
+        report: Literal["book_report", "final_report"],
+        field_paths: List[str],
+        limit: int,
+        start_after: Optional[str],
+    ):
         """
-        특정 user_uuid 의 모든 chat 중 final_report 가 있는 항목을 반환
+        created_at 내림차순으로 채팅을 훑으며 report 문서가 있는 항목을 limit 개까지 모읍니다.
+        한 요청에서 훑는 채팅 수는 MAX_SCAN_FACTOR * limit 로 제한되고,
+        채팅 batch 마다 report 문서는 get_all 한 번으로 읽습니다.
+
+        :return: ([(chat_id, report_data)], next_cursor)
         """
         chats_ref = db.collection("users").document(user_uuid).collection("chats")
-        chat_docs = chats_ref.order_by("created_at", direction="DESCENDING").stream()
+        query = chats_ref.select(["created_at"])
 
         results = []
+        cursor = start_after
+        scanned = 0
+
+        while len(results) < limit and scanned < limit * MAX_SCAN_FACTOR:
+            chat_docs, has_more = paginate_query(query, limit, cursor)
+            if not chat_docs:
+                return results, None
+
+            refs = [doc.reference.collection(report).document("data") for doc in chat_docs]
+            snaps = {
+                snap.reference.path: snap
+                for snap in db.get_all(refs, field_paths=field_paths)
+            }
 
-        for chat_doc in chat_docs:
-            chat_id = chat_doc.id
+            for chat_doc, ref in zip(chat_docs, refs):
+                scanned += 1
+                cursor = doc_cursor(chat_doc)
+                snap = snaps.get(ref.path)
+                if snap is not None and snap.exists:
+                    results.append((chat_doc.id, snap.to_dict()))
+                if len(results) == limit:
+                    break
+            else:
+                if not has_more:
+                    return results, None
 
-            # final_report 존재 여부 확인
-            final_doc = (
-                chats_ref.document(chat_id)
-                .collection("final_report")
-                .document("data")
-                .get()
-            )
+        return results, cursor
 
-            if not final_doc.exists:
-                continue  # final_report 없는 채팅은 스킵
+    # ==========================================
+    # 2) final_report가 존재하는 모든 작품의 점수 반환
+    # ==========================================
+    def list_all_final_reports(self, user_uuid: str, limit: int = 20, start_after: Optional[str] = None):
+        """
+        특정 user_uuid 의 chat 중 final_report 가 있는 항목을 한 페이지 반환
 
-            final_data = final_doc.to_dict()
+        :return: (final_reports, next_cursor)
+        """
+        reports, next_cursor = self._page_chats_with_report(
+            user_uuid, "final_report", LIST_FINAL_REPORT_FIELDS, limit, start_after
+        )
 
+        results = []
+        for chat_id, final_data in reports:
             results.append({
                 "chat_id": chat_id,
                 "title": final_data.get("title", ""),
@@ -250,44 +446,33 @@ class ReportService:
                 "created_at": final_data.get("created_at"),
             })
 
-        return results
+        return results, next_cursor
     
     # ==========================================
     # 3) book_report가 존재하는 모든 작품의 점수 반환
     # ==========================================
-    def list_all_book_reports(self, user_uuid: str) -> List[Dict[str, Any]]:
+    def list_all_book_reports(self, user_uuid: str, limit: int = 20, start_after: Optional[str] = None):
         """
-        특정 user_uuid 의 모든 chat 중 final_report 가 있는 항목을 반환
+        특정 user_uuid 의 chat 중 book_report 가 있는 항목을 한 페이지 반환
+
+        :return: (book_reports, next_cursor)
         """
-        chats_ref = db.collection("users").document(user_uuid).collection("chats")
-        chat_docs = chats_ref.order_by("created_at", direction="DESCENDING").stream()
+        reports, next_cursor = self._page_chats_with_report(
+            user_uuid, "book_report", LIST_BOOK_REPORT_FIELDS, limit, start_after
+        )
 
         results = []
-
-        for chat_doc in chat_docs:
-            chat_id = chat_doc.id
-
-            book_doc = (
-                chats_ref.document(chat_id)
-                .collection("book_report")
-                .document("data")
-                .get()
-            )
-
-            if not book_doc.exists:
-                continue  # book_doc 없는 채팅은 스킵
-
-            final_data = book_doc.to_dict()
-
+        for chat_id, book_data in reports:
             results.append({
-                "subject": final_data.get("subject", ""),
-                "book_review": final_data.get("book_review", ""),
-                "debate_review": final_data.get("debate_review", ""),
-                "summary": final_data.get("summary"),
-                "created_at": final_data.get("created_at"),
+                "chat_id": chat_id,
+                "subject": book_data.get("subject", ""),
+                "book_review": book_data.get("book_review", ""),
+                "debate_review": book_data.get("debate_review", ""),
+                "summary": book_data.get("summary"),
+                "created_at": book_data.get("created_at"),
             })
 
-        return results
+        return results, next_cursor
     
     def get_total_report(self, user_uuid: str):
         snap = (
@@ -412,69 +597,56 @@ class ReportService:
             "reports": final_reports
         }
         user_ref.collection("total_report").document("data").set(total_report)
+        self._update_aggregates(dashboard_service.record_total_report, user_uuid, total_report)
 
         return total_report
             
     def get_report_detail(self, user_uuid: str, chat_id: str, mode: Literal["book_report", "final_report"]):
-
-        chat_ref = self._get_chat_ref(user_uuid, chat_id)
-        chat_data = chat_ref.get().to_dict()
-        if chat_data is None:
-            raise ChatNotFoundError()
-        step, idx = chat_data.get("current_step"), chat_data.get("current_id")
-        if step is None or idx is None:
-            raise InvalidChatStateError("토론이 종료되었거나 손상되었습니다.")
-        
-        # curriculum
-        curriculum_ref = db.collection("curriculums").document(f"step{step}").get()
-        if not curriculum_ref.exists:
-            raise CurriculumNotFoundError()
-        curriculum_data = curriculum_ref.to_dict().get(str(idx))
-        if curriculum_data is None:
-            raise CurriculumNotFoundError()
-        title, author, contents = (
-            curriculum_data.get("title", ""),
-            curriculum_data.get("author", ""),
-            curriculum_data.get("contents", ""),
-        )
-
-        # book report
-        book_report_doc = chat_ref.collection("book_report").document("data").get().to_dict()
-        if book_report_doc is None:
-            raise BookReportNotFoundError()
-            
-        if mode == "book_report":
-            book_report = {
-                "title": title,
-                "author": author,
-                "subject": book_report_doc["subject"],
-                "summary": book_report_doc["summary"],
-                "book_review": book_report_doc["book_review"],
-                "debate_review": book_report_doc["debate_review"],
-                "created_at": book_report_doc["created_at"]
+        """
+        view 캐시에서 먼저 찾고, 없으면 채팅/감상문/최종 보고서를 get_all 한 번으로 읽어
+        두 view 를 함께 채웁니다. (없는 보고서는 캐시하지 않음)
+        """
+        def load():
+            chat_ref = self._get_chat_ref(user_uuid, chat_id)
+            book_report_ref = chat_ref.collection("book_report").document("data")
+            final_report_ref = chat_ref.collection("final_report").document("data")
+            snaps = {
+                snap.reference.path: snap
+                for snap in db.get_all([chat_ref, book_report_ref, final_report_ref])
             }
-            return book_report
 
-        else:
-            final_report_doc = chat_ref.collection("final_report").document("data").get().to_dict()
-            if final_report_doc is None:
+            chat_data = snaps[chat_ref.path].to_dict()
+            if chat_data is None:
+                raise ChatNotFoundError()
+            step, idx = chat_data.get("current_step"), chat_data.get("current_id")
+            if step is None or idx is None:
+                raise InvalidChatStateError("토론이 종료되었거나 손상되었습니다.")
+
+            # curriculum
+            title, author = self._book_title_author(step, idx)
+
+            # book report
+            book_report_doc = snaps[book_report_ref.path].to_dict()
+            if book_report_doc is None:
+                raise BookReportNotFoundError()
+            book_report = self._book_report_view(title, author, book_report_doc)
+
+            final_report_doc = snaps[final_report_ref.path].to_dict()
+            final_report = None
+            if final_report_doc is not None:
+                final_report = self._final_report_view(title, author, book_report_doc, final_report_doc)
+
+            if mode == "book_report":
+                if final_report is not None:
+                    self._view_cache.set(self._view_key(user_uuid, chat_id, "final_report"), final_report)
+                return book_report
+
+            if final_report is None:
                 raise FinalReportNotFoundError()
-            
-            final_report = {
-                "title": title,
-                "author": author,
-                "subject": book_report_doc["subject"],
-                "gold_summary": final_report_doc["summary"],
-                "students_summary": book_report_doc["summary"],
-                "summary_accuracy": final_report_doc["summary_accuracy"],
-                "expression": final_report_doc["expression"],
-                "logical_thinking": final_report_doc["logical_thinking"],
-                "manner": final_report_doc["manner"],
-                "reason": final_report_doc["reason"],
-                "created_at": final_report_doc["created_at"]
-            }
-
+            self._view_cache.set(self._view_key(user_uuid, chat_id, "book_report"), book_report)
             return final_report
+
+        return self._view_cache.get_or_load(self._view_key(user_uuid, chat_id, mode), load)
         
 
         
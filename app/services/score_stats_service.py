@@ -0,0 +1,228 @@
+import math
+import os
+import random
+from datetime import datetime, timezone
+
+from app.core.database import db
+from app.services.dashboard_service import SCORE_FIELDS
+
+STATS_COLLECTION = "curriculum_stats"
+CONTRIBUTION_COLLECTION = "contributions"
+SHARD_COLLECTION = "shards"
+
+# 책별 집계를 나눠 담는 shard 수. 보고서마다 임의의 shard 하나만 갱신해 쓰기 경합을 줄입니다.
+# (줄이면 남는 shard 가 읽히지 않으므로 늘리기만 하고, 바꾼 뒤에는 backfill 로 다시 만듦)
+SCORE_STATS_SHARDS = int(os.getenv("SCORE_STATS_SHARDS", "10"))
+
+# 평가 점수 범위 (1~5점) → 히스토그램 구간
+SCORE_MIN, SCORE_MAX = 1, 5
+
+
+def _stats_id(step, idx) -> str:
+    return f"step{step}_{idx}"
+
+
+def stats_ref(step, idx):
+    """
+    책별 집계 문서. step/id/title 만 담고 점수 합계는 shards 하위 컬렉션에 있습니다.
+    """
+    return db.collection(STATS_COLLECTION).document(_stats_id(step, idx))
+
+
+def shard_ref(step, idx, shard: int):
+    return stats_ref(step, idx).collection(SHARD_COLLECTION).document(str(shard))
+
+
+def contribution_ref(step, idx, user_uuid: str, chat_id: str):
+    return stats_ref(step, idx).collection(CONTRIBUTION_COLLECTION).document(f"{user_uuid}_{chat_id}")
+
+
+def scores_of(final_report: dict) -> dict:
+    """
+    최종 보고서에서 숫자로 읽을 수 있는 점수만 추립니다.
+    """
+    scores = {}
+    for field in SCORE_FIELDS:
+        try:
+            scores[field] = float(final_report.get(field))
+        except (TypeError, ValueError):
+            continue
+    return scores
+
+
+def _bucket(value: float) -> str:
+    return str(min(SCORE_MAX, max(SCORE_MIN, int(round(value)))))
+
+
+def _empty_field() -> dict:
+    return {
+        "count": 0,
+        "sum": 0.0,
+        "sum_sq": 0.0,
+        "histogram": {str(s): 0 for s in range(SCORE_MIN, SCORE_MAX + 1)},
+    }
+
+
+# ================================
+# 합계 누적 (shard 끼리 더할 수 있도록 count / sum / sum_sq)
+# ================================
+def score_delta(old_scores: dict, new_scores: dict) -> dict:
+    """
+    old_scores 를 빼고 new_scores 를 더하는 필드별 변화량
+    """
+    delta = {}
+    for field in SCORE_FIELDS:
+        agg = _empty_field()
+        for value, sign in ((old_scores.get(field), -1), (new_scores.get(field), 1)):
+            if value is None:
+                continue
+            agg["count"] += sign
+            agg["sum"] += sign * value
+            agg["sum_sq"] += sign * value * value
+            agg["histogram"][_bucket(value)] += sign
+        delta[field] = agg
+    return delta
+
+
+def merge_fields(target: dict, fields: dict) -> dict:
+    """
+    필드별 합계 fields 를 target 에 더합니다.
+    """
+    for field in SCORE_FIELDS:
+        agg = target.setdefault(field, _empty_field())
+        other = fields.get(field) or {}
+        agg["count"] += other.get("count", 0)
+        agg["sum"] += other.get("sum", 0.0)
+        agg["sum_sq"] += other.get("sum_sq", 0.0)
+        for bucket, count in (other.get("histogram") or {}).items():
+            agg["histogram"][bucket] = agg["histogram"].get(bucket, 0) + count
+    return target
+
+
+def _increments(delta: dict) -> dict:
+    from google.cloud.firestore_v1 import Increment
+
+    fields = {}
+    for field, agg in delta.items():
+        changed = {k: Increment(agg[k]) for k in ("count", "sum", "sum_sq") if agg[k]}
+        histogram = {b: Increment(c) for b, c in agg["histogram"].items() if c}
+        if histogram:
+            changed["histogram"] = histogram
+        if changed:
+            fields[field] = changed
+    return fields
+
+
+# ================================
+# 최종 보고서 저장 시 증분 갱신
+# ================================
+def record_final_report(user_uuid: str, chat_id: str, step, idx, final_report: dict):
+    """
+    책별 집계를 트랜잭션으로 갱신합니다.
+    채팅별 반영 내역(contributions)을 함께 기록해, 같은 채팅의 보고서가 재생성되면
+    이전 점수를 빼고 새 점수를 더합니다. (같은 보고서로 다시 호출해도 결과가 같음)
+    변화량은 임의의 shard 하나에 Increment 로 더하므로 같은 책의 보고서끼리 경합하지 않습니다.
+    """
+    from google.cloud.firestore_v1 import transactional
+
+    book_ref = stats_ref(step, idx)
+    chat_contribution_ref = contribution_ref(step, idx, user_uuid, chat_id)
+    new_scores = scores_of(final_report)
+
+    @transactional
+    def update(transaction):
+        book_snap, contribution_snap = (
+            book_ref.get(field_paths=["title"], transaction=transaction),
+            chat_contribution_ref.get(transaction=transaction),
+        )
+        old_scores = contribution_snap.to_dict().get("scores", {}) if contribution_snap.exists else {}
+
+        now = datetime.now(timezone.utc)
+        if not book_snap.exists:
+            transaction.set(book_ref, {
+                "step": step,
+                "id": idx,
+                "title": final_report.get("title", ""),
+                "created_at": now,
+            })
+        increments = _increments(score_delta(old_scores, new_scores))
+        if increments:
+            transaction.set(
+                shard_ref(step, idx, random.randrange(SCORE_STATS_SHARDS)),
+                {"fields": increments, "updated_at": now},
+                merge=True,
+            )
+        transaction.set(chat_contribution_ref, {"scores": new_scores, "updated_at": now})
+
+    update(db.transaction())
+
+
+# ================================
+# 조회
+# ================================
+def _summarize(book: dict, shards: list) -> dict:
+    totals = {}
+    updated_at = None
+    for shard in shards:
+        merge_fields(totals, shard.get("fields") or {})
+        if shard.get("updated_at") and (updated_at is None or shard["updated_at"] > updated_at):
+            updated_at = shard["updated_at"]
+
+    fields = {}
+    for field in SCORE_FIELDS:
+        agg = totals.get(field) or _empty_field()
+        count = agg["count"]
+        mean = agg["sum"] / count if count else None
+        variance = max(0.0, (agg["sum_sq"] - agg["sum"] * agg["sum"] / count) / (count - 1)) if count > 1 else None
+        fields[field] = {
+            "count": count,
+            "mean": round(mean, 4) if mean is not None else None,
+            "variance": round(variance, 4) if variance is not None else None,
+            "stddev": round(math.sqrt(variance), 4) if variance is not None else None,
+            "histogram": agg["histogram"],
+        }
+
+    return {
+        "step": book.get("step"),
+        "id": book.get("id"),
+        "title": book.get("title", ""),
+        "fields": fields,
+        "updated_at": updated_at,
+    }
+
+
+def _read_shards(book_refs: list) -> dict:
+    """
+    책 문서 경로 -> shard 데이터 목록 (모든 책의 shard 를 get_all 한 번으로)
+    """
+    refs = [ref.collection(SHARD_COLLECTION).document(str(i)) for ref in book_refs for i in range(SCORE_STATS_SHARDS)]
+    shards = {ref.path: [] for ref in book_refs}
+    for snap in db.get_all(refs):
+        if snap.exists:
+            shards[snap.reference.parent.parent.path].append(snap.to_dict())
+    return shards
+
+
+def get_book_stats(step, idx):
+    """
+    책 1권의 점수 집계. 집계가 없으면 None
+    """
+    book_ref = stats_ref(step, idx)
+    snap = book_ref.get()
+    if not snap.exists:
+        return None
+    return _summarize(snap.to_dict(), _read_shards([book_ref])[book_ref.path])
+
+
+def _id_order(book_id):
+    return (0, int(book_id), "") if str(book_id).isdigit() else (1, 0, str(book_id))
+
+
+def list_step_stats(step) -> list:
+    """
+    단계 안 모든 책의 점수 집계 (id 숫자 순)
+    """
+    docs = list(db.collection(STATS_COLLECTION).where("step", "==", step).stream())
+    shards = _read_shards([doc.reference for doc in docs])
+    stats = [_summarize(doc.to_dict(), shards[doc.reference.path]) for doc in docs]
+    return sorted(stats, key=lambda s: _id_order(s["id"]))
@@ -0,0 +1,224 @@
+from app.core.database import db
+from datetime import datetime, timedelta, timezone
+from typing import List, Optional, Tuple
+import os
+import uuid
+
+# 채널 이름은 기존(1문서 1메시지) 하위 컬렉션 이름과 같음
+CHANNELS = ("messages", "assistant")
+
+# chunk 1개에 담는 메시지 수 / 크기 상한 (Firestore 문서 1MiB 제한보다 여유 있게)
+CHUNK_MESSAGES = int(os.getenv("TRANSCRIPT_CHUNK_MESSAGES", "50"))
+CHUNK_MAX_BYTES = int(os.getenv("TRANSCRIPT_CHUNK_MAX_BYTES", str(800 * 1024)))
+
+
+# ================================
+# 참조
+# ================================
+def _chat_ref(user_uuid: str, chat_id: str):
+    return db.collection("users").document(user_uuid).collection("chats").document(chat_id)
+
+
+def _meta_ref(user_uuid: str, chat_id: str, channel: str):
+    """
+    chats/{chat_id}/transcripts/{channel} : chunk 진행 상태 (마지막 chunk, 메시지 수, 마지막 시각)
+    """
+    return _chat_ref(user_uuid, chat_id).collection("transcripts").document(channel)
+
+
+def _chunk_ref(meta_ref, index: int):
+    return meta_ref.collection("chunks").document(f"{index:05d}")
+
+
+def _message_bytes(message: dict) -> int:
+    return len(message["content"].encode("utf-8")) + 128
+
+
+# ================================
+# 쓰기
+# ================================
+def _pack(meta: dict, messages: List[dict]) -> Tuple[dict, dict]:
+    """
+    meta 상태에서 messages 를 이어 붙일 때 chunk 별로 나눕니다.
+    :return: ({chunk_index: [messages]}, 갱신된 meta)
+    """
+    meta = dict(meta)
+    chunks = {}
+    for message in messages:
+        size = _message_bytes(message)
+        full = (
+            meta["current_chunk_count"] >= CHUNK_MESSAGES
+            or meta["current_chunk_bytes"] + size > CHUNK_MAX_BYTES
+        )
+        if meta["current_chunk_count"] and full:
+            meta["current_chunk"] += 1
+            meta["current_chunk_count"] = 0
+            meta["current_chunk_bytes"] = 0
+
+        chunks.setdefault(meta["current_chunk"], []).append(message)
+        meta["current_chunk_count"] += 1
+        meta["current_chunk_bytes"] += size
+        meta["message_count"] += 1
+        meta["last_timestamp"] = message["timestamp"]
+
+    return chunks, meta
+
+
+def _empty_meta() -> dict:
+    return {
+        "current_chunk": 0,
+        "current_chunk_count": 0,
+        "current_chunk_bytes": 0,
+        "message_count": 0,
+        "last_timestamp": None,
+    }
+
+
+def _legacy_query(user_uuid: str, chat_id: str, channel: str):
+    return _chat_ref(user_uuid, chat_id).collection(channel).order_by("timestamp")
+
+
+def _legacy_message(doc) -> dict:
+    data = doc.to_dict()
+    return {
+        "messageId": data.get("messageId", doc.id),
+        "role": data["role"],
+        "content": data["content"],
+        "timestamp": data.get("timestamp"),
+    }
+
+
+def _write(user_uuid: str, chat_id: str, channel: str, new_messages: List[dict]) -> dict:
+    """
+    트랜잭션으로 chunk 에 메시지를 추가합니다. (meta 1회 읽기 + chunk ArrayUnion)
+    아직 chunk 형식이 아닌 채팅이면 같은 트랜잭션에서 기존 메시지 문서를 먼저 옮깁니다.
+    """
+    from google.cloud.firestore_v1 import ArrayUnion, Increment, transactional
+
+    meta_ref = _meta_ref(user_uuid, chat_id, channel)
+
+    @transactional
+    def write(transaction):
+        meta_snap = meta_ref.get(transaction=transaction)
+        if meta_snap.exists:
+            meta, messages, migrated = meta_snap.to_dict(), new_messages, 0
+        else:
+            legacy = [_legacy_message(d) for d in transaction.get(_legacy_query(user_uuid, chat_id, channel))]
+            meta, messages, migrated = _empty_meta(), legacy + new_messages, len(legacy)
+
+        chunks, new_meta = _pack(meta, messages)
+        for index, chunk_messages in chunks.items():
+            transaction.set(_chunk_ref(meta_ref, index), {
+                "messages": ArrayUnion(chunk_messages),
+                "count": Increment(len(chunk_messages)),
+                "last_timestamp": chunk_messages[-1]["timestamp"],
+            }, merge=True)
+
+        new_meta["updated_at"] = datetime.now(timezone.utc)
+        transaction.set(meta_ref, new_meta)
+        return migrated
+
+    return {"migrated": write(db.transaction()), "appended": len(new_messages)}
+
+
+def append_messages(user_uuid: str, chat_id: str, channel: str, entries: List[Tuple[str, str]]) -> List[dict]:
+    """
+    (role, content) 목록을 순서대로 한 번에 추가하고 저장된 메시지를 반환합니다.
+    같은 호출 안의 메시지는 timestamp 가 1µs 씩 증가하도록 맞춥니다. (since 커서 순서 보장)
+    """
+    now = datetime.now(timezone.utc)
+    messages = [
+        {
+            "messageId": uuid.uuid4().hex[:20],
+            "role": role,
+            "content": content,
+            "timestamp": now + timedelta(microseconds=i),
+        }
+        for i, (role, content) in enumerate(entries)
+    ]
+    _write(user_uuid, chat_id, channel, messages)
+    return messages
+
+
+def append_message(user_uuid: str, chat_id: str, channel: str, role: str, content: str) -> dict:
+    return append_messages(user_uuid, chat_id, channel, [(role, content)])[0]
+
+
+def migrate_chat(user_uuid: str, chat_id: str, channel: str) -> int:
+    """
+    기존 메시지 문서를 chunk 로 옮깁니다. 이미 옮겼으면 0 (기존 문서는 남겨 둠)
+    """
+    if _meta_ref(user_uuid, chat_id, channel).get(field_paths=[]).exists:
+        return 0
+    return _write(user_uuid, chat_id, channel, [])["migrated"]
+
+
+# ================================
+# 읽기 (chunk 형식 + 기존 형식 호환)
+# ================================
+def _message_key(message: dict):
+    return message["timestamp"], message["messageId"]
+
+
+def load_messages(
+    user_uuid: str,
+    chat_id: str,
+    channel: str,
+    since_ts: Optional[datetime] = None,
+    since_id: Optional[str] = None,
+) -> List[dict]:
+    """
+    (timestamp, messageId) 순 메시지 목록. since_ts 가 있으면 그 이후만.
+    since_id 가 있으면 (since_ts, since_id) 보다 뒤의 메시지를 반환하므로 timestamp 가 같은 메시지도 빠지지 않습니다.
+    (since_id 가 없으면 timestamp 가 since_ts 초과인 메시지만)
+    chunk 형식이면 meta 1회 + chunk 몇 개만 읽고, since_ts 이후 변화가 없으면 meta 1회로 끝납니다.
+    아직 옮기지 않은 채팅은 기존 메시지 문서를 읽습니다.
+    """
+    def after_since(message: dict) -> bool:
+        if since_id is None:
+            return message["timestamp"] > since_ts
+        return _message_key(message) > (since_ts, since_id)
+
+    meta_ref = _meta_ref(user_uuid, chat_id, channel)
+    meta_snap = meta_ref.get()
+
+    if not meta_snap.exists:
+        query = _legacy_query(user_uuid, chat_id, channel)
+        if since_ts is None:
+            return [_legacy_message(d) for d in query.stream()]
+        # 같은 timestamp 의 메시지는 messageId 로 가려야 하므로 이상(>=)으로 읽고 아래에서 거름
+        messages = [_legacy_message(d) for d in query.where("timestamp", ">=", since_ts).stream()]
+    else:
+        meta = meta_snap.to_dict()
+        last_timestamp = meta.get("last_timestamp")
+        if last_timestamp is None or (since_ts is not None and (
+            last_timestamp < since_ts or (since_id is None and last_timestamp == since_ts)
+        )):
+            return []
+
+        query = meta_ref.collection("chunks")
+        if since_ts is not None:
+            query = query.where("last_timestamp", ">=", since_ts)
+
+        messages = []
+        for chunk in sorted(query.stream(), key=lambda d: d.id):
+            messages.extend(chunk.to_dict().get("messages", []))
+
+    if since_ts is not None:
+        messages = [m for m in messages if after_since(m)]
+    messages.sort(key=_message_key)
+    return messages
+
+
+def find_message_timestamp(user_uuid: str, chat_id: str, channel: str, message_id: str) -> Optional[datetime]:
+    """
+    messageId 의 timestamp. (기존 문서 → chunk 순으로 찾음) 없으면 None
+    """
+    snap = _chat_ref(user_uuid, chat_id).collection(channel).document(message_id).get(field_paths=["timestamp"])
+    if snap.exists and (snap.to_dict() or {}).get("timestamp") is not None:
+        return snap.to_dict()["timestamp"]
+
+    for message in load_messages(user_uuid, chat_id, channel):
+        if message["messageId"] == message_id:
+            return message["timestamp"]
+    return None
@@ -3,13 +3,21 @@ from app.core.database import db
 from app.core import auth
 from passlib.context import CryptContext
 from app.schemas.user import RequestUserCreate
-from google.cloud.firestore_v1.field_path import FieldPath  
 from app.utils.common import generate_uuid_with_timestamp
+from app.core.cache import get_cache
+from app.core import invalidation
 from datetime import datetime, timezone
 
 # 비밀번호 해싱 설정
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
+# 프로필 캐시에 담는 필드 (비밀번호/토큰은 제외)
+PROFILE_FIELDS = ("id", "name", "role", "relation")
+
+_profile_cache = get_cache("profile", ttl=600)
+invalidation.bind_cache(_profile_cache, "profile:")
+invalidation.bind_cache(_profile_cache, "user:")
+
 # 사용자 존재 확인
 def is_user(user_id: str):
     existing = db.collection("users").where("id", "==", user_id).get()
@@ -49,6 +57,22 @@ def get_user_by_uuid(user_uuid: str, for_reissue: bool=False, refresh_token: str
     return None
 
 
+def get_user_profile(user_uuid: str):
+    """
+    uuid 기반 공개 프로필(id, name, role, relation) 조회. 캐시를 거치며, 없으면 None
+    """
+    def load():
+        snap = db.collection("users").document(user_uuid).get(field_paths=list(PROFILE_FIELDS))
+        if not snap.exists:
+            return None
+        data = snap.to_dict()
+        return {field: data.get(field) for field in PROFILE_FIELDS}
+
+    return _profile_cache.get_or_load(user_uuid, load)
+
+def invalidate_user_profile(user_uuid: str):
+    invalidation.publish(f"profile:{user_uuid}")
+
 
 def get_user_by_id(user_id: str, for_login: bool = False):
     """
@@ -106,10 +130,12 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
 # 사용자 및 관련 데이터 삭제
 def delete_user(user_uuid: str)->bool:
     """
-    회원 탈퇴 처리. 사용자 계정, 팔로우 관계 등을 모두 삭제합니다.
+    회원 탈퇴 처리. 사용자 계정과 하위 컬렉션(채팅, 메시지, 보고서 등)을 모두 삭제합니다.
     """
+    from app.jobs import account_purge
+
     try:
-        db.collection("users").document(user_uuid).delete()
+        account_purge.purge_user(user_uuid)
         return True
     except Exception as e:
         print(f"[ERROR] 유저 삭제 실패: {e}")
@@ -153,6 +179,8 @@ def update_user_relation(user_uuid: str, other_user_id: str) -> bool:
     other_user_id(로그인 ID)의 유저 문서 UUID를 저장합니다.
     단, 두 유저의 role 이 달라야 합니다.
     """
+    from google.cloud.firestore_v1.field_path import FieldPath
+
     try:
         # 1) 현재 로그인한 유저 데이터 조회
         current_user_ref = db.collection("users").document(user_uuid)
@@ -198,6 +226,7 @@ def update_user_relation(user_uuid: str, other_user_id: str) -> bool:
         current_user_ref.update({
             "relation": target_user_uuid
         })
+        invalidate_user_profile(user_uuid)
 
         print(f"[INFO] relation 업데이트 성공: {user_uuid} → {target_user_uuid}")
         return True
@@ -1,7 +1,56 @@
 from datetime import datetime
+from typing import Optional
+import base64
+import json
 import uuid
 
+from app.config.errors import InvalidCursorError
+
 def generate_uuid_with_timestamp():
     uid = str(uuid.uuid4())
     timestamp = datetime.utcnow().strftime("%Y%m%d%H%M%S")
-    return f"{uid}_{timestamp}"
\ No newline at end of file
+    return f"{uid}_{timestamp}"
+
+# ================================
+# 커서 기반 페이지네이션
+# ================================
+def encode_cursor(created_at: datetime, doc_id: str) -> str:
+    """
+    (created_at, 문서 id)를 URL에 실을 수 있는 불투명 커서로 인코딩합니다.
+    """
+    raw = json.dumps({"t": created_at.isoformat(), "id": doc_id}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str):
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        data = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        return datetime.fromisoformat(data["t"]), str(data["id"])
+    except Exception:
+        raise InvalidCursorError("잘못된 커서입니다.")
+
+
+def paginate_query(query, limit: int, start_after: Optional[str] = None, order_field: str = "created_at"):
+    """
+    order_field 내림차순(동률은 문서 id 내림차순)으로 한 페이지를 읽습니다.
+    limit + 1개를 읽어 다음 페이지 존재 여부를 함께 반환합니다.
+
+    :return: (docs, has_more)
+    """
+    query = (
+        query
+        .order_by(order_field, direction="DESCENDING")
+        .order_by("__name__", direction="DESCENDING")
+    )
+
+    if start_after:
+        value, doc_id = decode_cursor(start_after)
+        query = query.start_after({order_field: value, "__name__": doc_id})
+
+    docs = list(query.limit(limit + 1).stream())
+    return docs[:limit], len(docs) > limit
+
+
+def doc_cursor(doc, order_field: str = "created_at") -> str:
+    return encode_cursor(doc.get(order_field), doc.id)
@@ -0,0 +1,232 @@
+import hashlib
+import os
+import re
+import tempfile
+from collections import Counter
+from typing import Callable, List, Optional
+
+import numpy as np
+
+from app.core.cache import LRUCache, MISSING
+
+# 인덱스 형식이 바뀌면 올려서 디스크 캐시를 무효화
+INDEX_VERSION = 1
+
+PASSAGE_CHARS = int(os.getenv("PASSAGE_CHARS", "400"))
+PASSAGE_TOP_K = int(os.getenv("PASSAGE_TOP_K", "4"))
+# 이보다 짧은 본문은 나누지 않고 그대로 사용
+RETRIEVAL_MIN_CHARS = int(os.getenv("RETRIEVAL_MIN_CHARS", "2000"))
+RETRIEVAL_CACHE_DIR = os.getenv(
+    "RETRIEVAL_CACHE_DIR", os.path.join(tempfile.gettempdir(), "nexture-passages")
+)
+
+BM25_K1 = 1.5
+BM25_B = 0.75
+
+_SENTENCE_END = re.compile(r"(?<=[.!?。…])\s+")
+_WORD = re.compile(r"\w+")
+
+_indexes = LRUCache(int(os.getenv("RETRIEVAL_INDEX_CACHE_SIZE", "64")))
+
+
+# ================================
+# 본문 분할 / 토큰화
+# ================================
+def split_passages(text: str, max_chars: int = PASSAGE_CHARS) -> List[str]:
+    """
+    문장 단위로 나눈 뒤, max_chars 이하가 되도록 이어 붙여 구절을 만듭니다.
+    (짧은 문단은 앞뒤 문단과 합쳐짐)
+    """
+    passages = []
+    current = ""
+    for paragraph in text.splitlines():
+        paragraph = " ".join(paragraph.split())
+        if not paragraph:
+            continue
+
+        for sentence in _SENTENCE_END.split(paragraph):
+            if current and len(current) + len(sentence) + 1 > max_chars:
+                passages.append(current)
+                current = sentence
+            else:
+                current = f"{current} {sentence}" if current else sentence
+
+    if current:
+        passages.append(current)
+    return passages
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    단어별 문자 bigram. (형태소 분석기 없이 한국어 조사/어미 변화를 흡수)
+    """
+    tokens = []
+    for word in _WORD.findall(text.lower()):
+        if len(word) == 1:
+            tokens.append(word)
+        else:
+            tokens.extend(word[i:i + 2] for i in range(len(word) - 1))
+    return tokens
+
+
+# ================================
+# BM25 인덱스
+# ================================
+class PassageIndex:
+    """
+    구절 단위 BM25 역색인.
+    단어(bigram)별 구절 번호/가중치를 CSR 형태의 numpy 배열로 보관합니다.
+    """
+    def __init__(self, passages, terms, indptr, doc_ids, weights):
+        self.passages = list(passages)
+        self._term_ids = {term: i for i, term in enumerate(terms)}
+        self._terms = terms
+        self._indptr = indptr
+        self._doc_ids = doc_ids
+        self._weights = weights
+
+    @classmethod
+    def build(cls, passages: List[str]) -> "PassageIndex":
+        counts = [Counter(tokenize(p)) for p in passages]
+        terms = sorted({term for c in counts for term in c})
+        term_ids = {term: i for i, term in enumerate(terms)}
+
+        rows, cols, tfs = [], [], []
+        for doc_id, c in enumerate(counts):
+            for term, tf in c.items():
+                rows.append(term_ids[term])
+                cols.append(doc_id)
+                tfs.append(tf)
+
+        rows = np.asarray(rows, dtype=np.int32)
+        cols = np.asarray(cols, dtype=np.int32)
+        tfs = np.asarray(tfs, dtype=np.float32)
+
+        n_docs = len(passages)
+        doc_len = np.asarray([sum(c.values()) for c in counts], dtype=np.float32)
+        avg_len = doc_len.mean() if n_docs else 1.0
+        df = np.bincount(rows, minlength=len(terms)).astype(np.float32)
+        idf = np.log1p((n_docs - df + 0.5) / (df + 0.5))
+
+        norm = BM25_K1 * (1 - BM25_B + BM25_B * doc_len[cols] / max(avg_len, 1.0))
+        weights = idf[rows] * tfs * (BM25_K1 + 1) / (tfs + norm)
+
+        order = np.argsort(rows, kind="stable")
+        indptr = np.concatenate(([0], np.cumsum(np.bincount(rows, minlength=len(terms))))).astype(np.int64)
+
+        return cls(
+            passages,
+            np.asarray(terms, dtype=str),
+            indptr,
+            cols[order],
+            weights[order].astype(np.float32),
+        )
+
+    def search(self, query: str, k: int = PASSAGE_TOP_K) -> List[int]:
+        """
+        점수 상위 k 개 구절 번호 (본문 순서로 정렬). 겹치는 단어가 없으면 빈 목록
+        """
+        scores = np.zeros(len(self.passages), dtype=np.float32)
+        for term, qtf in Counter(tokenize(query)).items():
+            term_id = self._term_ids.get(term)
+            if term_id is None:
+                continue
+            start, end = self._indptr[term_id], self._indptr[term_id + 1]
+            np.add.at(scores, self._doc_ids[start:end], self._weights[start:end] * qtf)
+
+        hits = np.flatnonzero(scores)
+        if hits.size == 0:
+            return []
+        top = hits[np.argsort(-scores[hits], kind="stable")[:k]]
+        return sorted(top.tolist())
+
+    # ---------- 디스크 저장 ----------
+    def save(self, path: str):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            np.savez(
+                f,
+                passages=np.asarray(self.passages, dtype=str),
+                terms=self._terms,
+                indptr=self._indptr,
+                doc_ids=self._doc_ids,
+                weights=self._weights,
+            )
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str) -> "PassageIndex":
+        with np.load(path, allow_pickle=False) as data:
+            return cls(
+                data["passages"].tolist(),
+                data["terms"],
+                data["indptr"],
+                data["doc_ids"],
+                data["weights"],
+            )
+
+
+def content_hash(contents: str) -> str:
+    return hashlib.sha1(contents.encode("utf-8")).hexdigest()[:16]
+
+
+def _index_path(book_key: str, digest: str) -> str:
+    return os.path.join(RETRIEVAL_CACHE_DIR, f"{book_key}_{digest}_v{INDEX_VERSION}.npz")
+
+
+def get_index(
+    book_key: str,
+    contents: str,
+    load_passages: Optional[Callable[[], Optional[List[str]]]] = None,
+) -> PassageIndex:
+    """
+    책 본문의 인덱스. 메모리 → 디스크 순으로 찾고, 없으면 만들어 둘 다 저장합니다.
+    본문 해시가 키에 포함되므로 본문이 바뀌면 자동으로 다시 만들어집니다.
+    load_passages 가 있으면 미리 나눠 둔 구절(커리큘럼 적재 시 계산)을 먼저 사용합니다.
+    """
+    digest = content_hash(contents)
+    memory_key = f"{book_key}:{digest}"
+
+    index = _indexes.get(memory_key)
+    if index is not MISSING:
+        return index
+
+    path = _index_path(book_key, digest)
+    try:
+        index = PassageIndex.load(path)
+    except FileNotFoundError:
+        index = None
+    except Exception as e:
+        print(f"[WARN] 구절 인덱스 로드 실패 ({path}): {e}")
+        index = None
+
+    if index is None:
+        passages = load_passages() if load_passages else None
+        index = PassageIndex.build(passages or split_passages(contents))
+        try:
+            index.save(path)
+        except OSError as e:
+            print(f"[WARN] 구절 인덱스 저장 실패 ({path}): {e}")
+
+    _indexes.set(memory_key, index)
+    return index
+
+
+def relevant_passages(
+    book_key: str,
+    contents: str,
+    query: str,
+    k: int = PASSAGE_TOP_K,
+    load_passages: Optional[Callable[[], Optional[List[str]]]] = None,
+) -> str:
+    """
+    질문과 관련된 구절만 이어 붙인 본문. 짧은 본문은 그대로,
+    관련 구절을 찾지 못하면 앞부분 k 개 구절을 반환합니다.
+    """
+    if len(contents) <= RETRIEVAL_MIN_CHARS:
+        return contents
+
+    index = get_index(book_key, contents, load_passages)
+    hits = index.search(query, k) or list(range(min(k, len(index.passages))))
+    return "\n...\n".join(index.passages[i] for i in hits)